@@ -1,9 +1,13 @@
 import os
+import sys
 import json
-import requests
 import argparse
 from typing import Dict, Optional
 
+# Shared HTTP transport lives with the Streamlit app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+from foundry_transport import FoundryTransport
+
 # --- CONFIG ---
 # Map Filename (in this dir) -> Config Key (in foundry_config.json)
 FILE_MAP = {
@@ -23,8 +27,9 @@ FILE_MAP = {
 CONFIG_PATH = "../streamlit_app/foundry_config.json"
 
 class FoundryClient:
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, transport: Optional[FoundryTransport] = None):
         self.base_url = base_url.rstrip("/")
+        self.transport = transport or FoundryTransport()
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
@@ -38,7 +43,7 @@ class FoundryClient:
             "name": name
         }
         try:
-            resp = requests.post(url, headers=self.headers, json=payload)
+            resp = self.transport.post(url, headers=self.headers, json=payload)
             if resp.status_code == 200:
                 return resp.json().get("rid")
             else:
@@ -57,7 +62,7 @@ class FoundryClient:
         tx_payload = {"branchName": "master", "transactionType": "SNAPSHOT"}
         
         try:
-            tx_resp = requests.post(tx_url, headers=self.headers, json=tx_payload)
+            tx_resp = self.transport.post(tx_url, headers=self.headers, json=tx_payload)
             if tx_resp.status_code != 200:
                 print(f"Failed to start tx for {rid}: {tx_resp.text}")
                 return
@@ -73,7 +78,7 @@ class FoundryClient:
                 data = f.read()
                 
             put_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions/{tx_id}/files/{filename}"
-            put_resp = requests.post(put_url, headers=upload_headers, data=data) # API usually uses POST or PUT for file? Check params.
+            put_resp = self.transport.post(put_url, headers=upload_headers, data=data) # API usually uses POST or PUT for file? Check params.
             # V1 API: POST .../files/{path}
             
             if put_resp.status_code != 200:
@@ -82,7 +87,7 @@ class FoundryClient:
 
             # 3. Commit
             commit_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions/{tx_id}/commit"
-            commit_resp = requests.post(commit_url, headers=self.headers)
+            commit_resp = self.transport.post(commit_url, headers=self.headers)
             
             if commit_resp.status_code == 200:
                 print(f"✅ Successfully uploaded {filename} to {rid}")
@@ -122,7 +127,7 @@ def main():
         
     # ... rest of script logic ...
     
-    client = FoundryClient(url, token)
+    client = FoundryClient(url, token, transport=FoundryTransport.from_config(config))
     
     updated_datasets = datasets = config.get("DATASETS", {})
     
@@ -170,6 +175,8 @@ def main():
         json.dump(config, f, indent=4)
         
     print("------------------------------------------------")
+    for endpoint, stats in client.transport.latency_summary().items():
+        print(f"  {endpoint}: {stats['count']} calls, {stats['errors']} errors, avg {stats['avg_s']:.2f}s, max {stats['max_s']:.2f}s")
     print("✅ Done. Config processed.")
     
 if __name__ == "__main__":
@@ -3,11 +3,26 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+import os
+import time
 from datetime import datetime, timedelta, date
 
 from validators import validate_flight_import, CANCELLATION_REASONS
 from mock_db import MockDB
 from models import Flight
+from metrics import metrics_from_counts, choose_frequency, FREQUENCY_LABELS
+from shared_store import SharedStore
+from sqlite_db import SQLiteDB, SQLiteSession
+from foundry_backend import FoundryBackend
+from dataset_schemas import DATASET_SCHEMAS
+from figure_cache import FigureCache
+from readiness import asset_key
+from reports import ReportEngine, SitrepInputs, PERIODS, render_sitrep, report_frequency
+from exports import available_formats, export_file, export_name, export_mime, DEFAULT_CHUNK_ROWS
+from services import (
+    filter_flights, next_mission_id, save_flight_edits, save_equipment_edits, save_inventory_edits,
+    active_deployments, compliance_matrix, PAGE_SIZES, page_count, clamp_page, page_slice,
+)
 
 
 
@@ -36,9 +51,50 @@ except Exception:
     st.title("S.P.A.R.K.")
     st.caption("Status, Parts, Aircraft Readiness & Kits")
 
-# Initialize MockDB (Single Instance per Session)
+@st.cache_resource
+def get_shared_store() -> SharedStore:
+    """Loaded tables, shared read-only by every session in this server process."""
+    return SharedStore()
+
+@st.cache_resource
+def get_backend() -> FoundryBackend:
+    """One backend per process: connection pool, dataset cache and writeback queue are shared."""
+    # The config sits next to the app, wherever it is launched from
+    backend = FoundryBackend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "foundry_config.json"))
+    # Committed edits become part of the shared snapshot for every session
+    backend.on_commit = get_shared_store().merge_records
+    return backend
+
+@st.cache_resource
+def get_demo_store() -> SharedStore:
+    """Demo tables for sessions that could not reach Foundry; kept apart from the shared Foundry store."""
+    store = SharedStore()
+    store.publish(populate_mock_data(), source="Mock Data")
+    return store
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Built dashboard figures, shared by sessions that see the same data."""
+    return FigureCache.from_config(get_backend().config)
+
+@st.cache_resource
+def get_report_engine() -> ReportEngine:
+    """Background report workers and their finished outputs, shared by every session."""
+    return ReportEngine.from_config(get_backend().config)
+
+@st.cache_resource
+def get_local_db():
+    """Durable on-disk database when MODE is "sqlite" (None otherwise)."""
+    backend = get_backend()
+    return SQLiteDB.from_config(backend.config, base_dir=backend.config_dir)
+
+# Initialize MockDB (Single Instance per Session): a view over the shared
+# snapshot plus this session's own uncommitted edits. In "sqlite" mode every
+# session writes to the same durable database, keeping its own change journal.
 if 'mock_db' not in st.session_state:
-    st.session_state['mock_db'] = MockDB()
+    local_db = get_local_db()
+    st.session_state['mock_db'] = SQLiteSession(local_db) if local_db else MockDB(get_shared_store())
+    st.session_state['mock_db'].user = "Admin" # Mock
     
 db = st.session_state['mock_db']
 
@@ -139,8 +195,6 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-from foundry_backend import FoundryBackend
-
 # ...
 
 # Datasets RIDs (Reference for Load Logic)
@@ -159,53 +213,152 @@ DATASETS = {
     "parts_catalog": "ri.foundry.main.dataset.parts-catalog-mock-rid"
 }
 
+# Tables each page reads, in navigation order. With LAZY_LOAD only the
+# current page's tables are fetched up front; the rest load on first use
+# (and are prefetched in the background in this order).
+PAGE_TABLES = {
+    "Dashboard": ["flights", "equipment", "deployments"],
+    "Flights": ["flights", "deployments"],
+    "Equipment": ["equipment", "deployments"],
+    "Inventory": ["inventory", "shipping", "deployments"],
+    "Kits": ["kits", "deployments"],
+    "Deployments": ["deployments"],
+    "Shipping": ["shipping", "parts_catalog", "deployments"],
+    "Service Bulletins": ["service_bulletins", "deployments"],
+    "Reports": ["flights", "equipment", "inventory", "service_bulletins", "deployments"],
+}
+
+# Days of equipment status history the dashboard readiness trend covers
+READINESS_TREND_DAYS = 180
+
 def load_data_initial():
     """
-    Loads initial data into Session State.
-    Switches between Foundry API (if configured) and Mock Data.
+    Loads initial data into the shared store, once per server process (a
+    failed Foundry load is retried by a later session).
+    Switches between Foundry API (if configured), the local database and Mock Data.
     """
-    # Check if already loaded
-    if 'data_loaded' in st.session_state and st.session_state['data_loaded']:
+    local_db = get_local_db()
+    if local_db is not None:
+        # First run creates the database from the demo tables; after that it persists
+        if local_db.missing_tables(DATASET_SCHEMAS):
+            local_db.seed(populate_mock_data())
+        st.session_state['data_source'] = "Local Database"
         return
 
-    # Try Backend
-    backend = FoundryBackend()
-    use_api = backend.is_configured()
-    
-    if use_api:
-        st.toast("Connecting to Foundry API...")
-        try:
-            # Load Tables
-            st.session_state['db_state']['flights'] = backend.read_dataset("flights")
-            st.session_state['db_state']['equipment'] = backend.read_dataset("equipment")
-            st.session_state['db_state']['deployments'] = backend.read_dataset("deployments")
-            st.session_state['db_state']['inventory'] = backend.read_dataset("inventory")
-            st.session_state['db_state']['service_bulletins'] = backend.read_dataset("service_bulletins")
-            st.session_state['db_state']['kits'] = backend.read_dataset("kits")
-            st.session_state['db_state']['shipping'] = backend.read_dataset("shipping")
-            st.session_state['db_state']['shipment_items'] = backend.read_dataset("shipment_items")
-            st.session_state['db_state']['parts_utilization'] = backend.read_dataset("parts_utilization")
-            st.session_state['db_state']['kit_items'] = backend.read_dataset("kit_items")
-            st.session_state['db_state']['parts_catalog'] = backend.read_dataset("parts_catalog")
-            
-            # Basic validation to fallback if API fails
-            if st.session_state['db_state']['flights'].empty:
-                st.warning("API returned empty data. Switching to Mock for Demo.")
-                use_api = False
-            else:
-                st.session_state['data_source'] = "Foundry API"
-        except Exception as e:
-             st.error(f"API Connection Failed: {e}")
-             use_api = False
-    
-    if not use_api:
-        st.session_state['data_source'] = "Mock Data"
-        populate_mock_data()
-        
-    st.session_state['data_loaded'] = True
+    global db
+    store = db.store
+    # Check if already loaded; concurrent first sessions wait for one load
+    if not store.loaded:
+        with store.load_lock:
+            if not store.loaded:
+                _load_shared_tables(store)
+
+    if not store.loaded:
+        # Foundry is unreachable: this session runs on demo data and a later session tries again
+        user = db.user
+        db = st.session_state['mock_db'] = MockDB(get_demo_store())
+        db.user = user
+        store = db.store
+
+    st.session_state['data_source'] = store.source
+    if store.source == "Foundry API":
+        # Saved edits are queued for batched APPEND transactions
+        db.writer = get_backend()
+
+
+def _load_shared_tables(store: SharedStore):
+    """
+    Loads the shared tables from Foundry, or the demo tables when Foundry is
+    not configured. A failed Foundry load leaves the store unloaded (the
+    calling session falls back to demo data) so that a later session,
+    after FOUNDRY_RETRY_SECONDS, tries again.
+    """
+    backend = get_backend()
+    if not backend.is_configured():
+        store.publish(populate_mock_data(), source="Mock Data")
+        return
+
+    retry_seconds = float(backend.config.get("FOUNDRY_RETRY_SECONDS", 30))
+    if store.load_failed_at is not None and time.time() - store.load_failed_at < retry_seconds:
+        st.warning("Foundry was unreachable moments ago. Using Mock Data for this session.")
+        return
+
+    st.toast("Connecting to Foundry API...")
+    try:
+        # Load Tables: everything, or (LAZY_LOAD) just what the first page needs
+        if backend.config.get("LAZY_LOAD", True):
+            first_page = st.session_state.get('page', "Dashboard")
+            names = list(dict.fromkeys(["flights"] + PAGE_TABLES.get(first_page, [])))
+        else:
+            names = list(DATASETS.keys())
+
+        # Fetch every dataset at once on a bounded pool (or one at a time)
+        workers = None if backend.config.get("CONCURRENT_LOAD", True) else 1
+        progress = st.progress(0.0, text="Loading datasets from Foundry...")
+
+        def on_progress(name, done, total, error):
+            icon = "⚠️" if error else "✅"
+            progress.progress(done / total, text=f"{icon} {name} ({done}/{total})")
+
+        tables, errors = backend.read_datasets(names, max_workers=workers, on_progress=on_progress)
+        progress.empty()
+
+        # Report per-dataset failures without aborting the whole load
+        for name, err in errors.items():
+            st.warning(f"Failed to load '{name}': {err}")
+
+        # Basic validation to fallback if API fails
+        if 'flights' in errors or tables.get('flights', pd.DataFrame()).empty:
+            st.warning("API returned empty data. Switching to Mock for Demo.")
+            store.load_failed_at = time.time()
+            return
+
+        # Failed datasets are not published: they stay pending and load on next use
+        store.publish({name: df for name, df in tables.items() if name not in errors}, source="Foundry API")
+        store.load_failed_at = None
+        store.retry_seconds = retry_seconds
+        # Remaining tables materialize when a view first asks for them
+        remaining = [name for name in DATASETS.keys() if name not in tables or name in errors]
+        store.set_loader(backend.fetch_dataset, remaining)
+        if backend.config.get("PREFETCH_TABLES", True):
+            by_page = [name for page_names in PAGE_TABLES.values() for name in page_names]
+            store.prefetch(list(dict.fromkeys(n for n in by_page + remaining if n in remaining)))
+    except Exception as e:
+        st.error(f"API Connection Failed: {e}")
+        store.load_failed_at = time.time()
+
+
+def refresh_data():
+    """
+    Incrementally syncs every loaded table with Foundry.
+    Tables with only new APPEND transactions fetch just the new rows and merge
+    them by id; anything else falls back to a full re-read of that table.
+    Updated tables are published to the shared store for every session.
+    """
+    if st.session_state.get('data_source') != "Foundry API":
+        st.toast("Refresh is only available when connected to Foundry.")
+        return
+    backend = get_backend()
+
+    # Only tables that have been materialized; lazy ones load fresh anyway
+    tables = {name: db.store.get(name) for name in db.store.names() if name in DATASETS}
+    results, errors = backend.sync_datasets(tables)
+
+    changed = 0
+    for name, (df, mode) in results.items():
+        if mode != "unchanged":
+            db.store.replace(name, df)
+            changed += 1
+    for name, err in errors.items():
+        st.warning(f"Failed to refresh '{name}': {err}")
 
+    st.toast(f"Refreshed: {changed} table(s) updated." if changed else "Already up to date.")
+
+
+def populate_mock_data() -> dict:
+    """Builds the demo tables."""
+    tables = {}
 
-def populate_mock_data():
     # 1. Flights
     flights_data = pd.DataFrame({
         "id": range(1, 15),
@@ -222,7 +375,7 @@ def populate_mock_data():
         "responsible_part": ["N/A", "N/A", "Shield AI", "N/A", "Weather", "N/A", "N/A", "Weather", "N/A", "N/A", "N/A", "N/A", "Crew", "N/A"],
         "updated_by": ["System", "System", "Admin", "System", "MetOc", "System", "System", "MetOc", "System", "System", "System", "System", "Admin", "System"]
     })
-    st.session_state['db_state']['flights'] = flights_data
+    tables['flights'] = flights_data
 
     # 2. Equipment
     equip_data = pd.DataFrame({
@@ -234,7 +387,7 @@ def populate_mock_data():
         "location": ["Hangar", "Deck", "Hangar", "Store", "Control Room", "Site B", "Lost at Sea"],
         "deployment_id": ["DEP-001", "DEP-001", "DEP-001", "DEP-001", "DEP-001", "DEP-002", "DEP-002"]
     })
-    st.session_state['db_state']['equipment'] = equip_data
+    tables['equipment'] = equip_data
     
     # 3. Deployments
     dep_data = pd.DataFrame({
@@ -244,7 +397,7 @@ def populate_mock_data():
         "status": ["Active", "Active", "Planning"],
         "start_date": [datetime.now(), datetime.now(), datetime.now() + timedelta(days=30)]
     })
-    st.session_state['db_state']['deployments'] = dep_data
+    tables['deployments'] = dep_data
     
     # 4. Inventory
     inv_data = pd.DataFrame({
@@ -256,7 +409,7 @@ def populate_mock_data():
         "category": ["Consumable", "Rotable"] * 19 + ["Consumable"],
         "deployment_id": ["DEP-001"] * 20 + ["DEP-002"] * 19
     })
-    st.session_state['db_state']['inventory'] = inv_data
+    tables['inventory'] = inv_data
     
     # 5. Service Bulletins
     sb_data = pd.DataFrame({
@@ -268,10 +421,10 @@ def populate_mock_data():
         "status_DEP-001": ["Complete", "Partial"], 
         "status_DEP-002": ["N/A", "Not Complete"]
     })
-    st.session_state['db_state']['service_bulletins'] = sb_data
+    tables['service_bulletins'] = sb_data
 
     # 6. Shipping
-    st.session_state['db_state']['shipping'] = pd.DataFrame({
+    tables['shipping'] = pd.DataFrame({
         "id": [1001, 1002, 1003],
         "tracking_number": ["TRK-987654321", "TRK-123456789", "TRK-456123789"],
         "carrier": ["FedEx", "DHL", "UPS"],
@@ -282,7 +435,7 @@ def populate_mock_data():
     })
     
     # 7. Shipment Items (Mock)
-    st.session_state['db_state']['shipment_items'] = pd.DataFrame({
+    tables['shipment_items'] = pd.DataFrame({
         "id": range(1, 4),
         "shipment_id": [1002, 1001, 1002],
         "part_number": ["PN-001", "PN-005", "PN-010"],
@@ -291,7 +444,7 @@ def populate_mock_data():
     })
 
     # 8. Kits (Mock)
-    st.session_state['db_state']['kits'] = pd.DataFrame({
+    tables['kits'] = pd.DataFrame({
         "id": [1, 2],
         "kit_number": ["KIT-001", "KIT-002"],
         "kit_name": ["Maintenance Kit A", "Sensor cleaning kit"],
@@ -300,7 +453,7 @@ def populate_mock_data():
     })
     
     # 9. Parts Utilization (Mock)
-    st.session_state['db_state']['parts_utilization'] = pd.DataFrame({
+    tables['parts_utilization'] = pd.DataFrame({
         "id": [1, 2, 3],
         "part_number": ["PN-005", "PN-020", "PN-100"],
         "description": ["Screw", "Bolt", "Lens Wipe"],
@@ -311,7 +464,7 @@ def populate_mock_data():
     })
 
     # 10. Kit Items (Mock)
-    st.session_state['db_state']['kit_items'] = pd.DataFrame({
+    tables['kit_items'] = pd.DataFrame({
         "id": range(1, 5),
         "kit_id": [1, 1, 2, 2],
         "part_number": ["PN-005", "PN-010", "PN-100", "PN-200"],
@@ -323,7 +476,7 @@ def populate_mock_data():
     })
 
     # 11. Parts Catalog (Mock)
-    st.session_state['db_state']['parts_catalog'] = pd.DataFrame({
+    tables['parts_catalog'] = pd.DataFrame({
         "id": range(1, 6),
         "part_number": ["PN-001", "PN-002", "PN-003", "PN-005", "PN-010"],
         "description": ["Gasket", "Seal", "Filter", "Screw", "Propeller"],
@@ -331,6 +484,7 @@ def populate_mock_data():
         "created_at": [date.today()] * 5
     })
 
+    return tables
 
 
 # Run Init
@@ -340,11 +494,120 @@ load_data_initial()
 # VIEW FUNCTIONS
 # ==========================================
 
+def build_performance_figure(daily_df: pd.DataFrame, dep_df: pd.DataFrame, freq: str = "day") -> go.Figure:
+    """Hours per `freq` bucket stacked by deployment with MRR/OFTR lines, from daily rollup rows."""
+    label = FREQUENCY_LABELS[freq]
+    # Join Dep Name
+    if 'name' in dep_df.columns:
+        merged_df = daily_df.merge(dep_df[['deployment_id', 'name']], on='deployment_id', how='left')
+    else:
+        merged_df = daily_df.copy()
+        merged_df['name'] = merged_df['deployment_id']
+
+    # Aggregate for Stacked Bar (Group by Bucket + Deployment)
+    # We want to stack by Deployment Name.
+    daily_stack = metrics_from_counts(merged_df, freq, by='name')[['date', 'name', 'flight_hours']]
+
+    # Aggregate for Lines (Group by Bucket only, calculating weighted rate)
+    metrics_df = metrics_from_counts(merged_df, freq)
+
+    # Build Chart
+    fig = go.Figure()
+
+    # 1. Stacked Bars (Iterate deployments)
+    # Get list of deployments present in this filtered view
+    present_deps = daily_stack['name'].unique()
+    # Color map? Plotly handles auto colors but custom is nice.
+
+    for dep in present_deps:
+        dep_data = daily_stack[daily_stack['name'] == dep]
+        fig.add_trace(go.Bar(
+            x=dep_data['date'],
+            y=dep_data['flight_hours'],
+            name=str(dep),
+            # marker_color... let auto-assign or map
+        ))
+
+    fig.update_layout(barmode='stack')
+
+    # 2. Line - MRR (Right Y)
+    fig.add_trace(go.Scatter(
+        x=metrics_df['date'],
+        y=metrics_df['MRR'],
+        name=f'{label} MRR',
+        mode='lines+markers',
+        line=dict(color='#4CAF50', width=3),
+        yaxis='y2',
+        connectgaps=True # If some days have no flights
+    ))
+
+    # 3. Line - OFTR (Right Y)
+    fig.add_trace(go.Scatter(
+        x=metrics_df['date'],
+        y=metrics_df['OFTR'],
+        name=f'{label} OFTR',
+        mode='lines+markers',
+        line=dict(color='#FFC107', width=3, dash='dot'),
+        yaxis='y2',
+        connectgaps=True
+    ))
+
+    # Layout
+    fig.update_layout(
+        title=f"{label} Flight Hours & Reliability (Stacked by Deployment)",
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(title="Date"),
+        yaxis=dict(
+            title="Flight Hours",
+            gridcolor='#333'
+        ),
+        yaxis2=dict(
+            title="Rate",
+            overlaying='y',
+            side='right',
+            tickformat='.0%',
+            range=[0, 1.1],
+            gridcolor='#333'
+        ),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def build_activity_figure(daily_df: pd.DataFrame, freq: str = "day"):
+    daily = metrics_from_counts(daily_df, freq)[['date', 'flight_hours']]
+    fig_bar = px.bar(daily, x="date", y="flight_hours", title=f"{FREQUENCY_LABELS[freq]} Flight Hours", template="plotly_dark")
+    fig_bar.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    return fig_bar
+
+
+def build_equipment_pie(equip_df: pd.DataFrame):
+    status_counts = equip_df['status'].value_counts()
+    fig_pie = px.pie(names=status_counts.index, values=status_counts.values, hole=0.4, template="plotly_dark",
+                     color=status_counts.index, 
+                     color_discrete_map={'FMC':'#4CAF50', 'NMC':'#F44336', 'PMC':'#FFC107', 'CAT5':'#9E9E9E'})
+    fig_pie.update_layout(paper_bgcolor="rgba(0,0,0,0)")
+    return fig_pie
+
+
+def build_readiness_figure(trend: pd.DataFrame, freq: str = "day"):
+    fig = px.line(trend, x="date", y="readiness", markers=True, template="plotly_dark",
+                  title=f"{FREQUENCY_LABELS[freq]} Fleet Readiness (FMC share)")
+    fig.update_traces(line=dict(color='#4CAF50', width=3))
+    fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                      yaxis=dict(tickformat='.0%', range=[0, 1.05]))
+    return fig
+
+
 def view_dashboard():
     st.title("Command Dashboard")
     st.markdown("Overview of operations, equipment status, and deployments.")
 
-    flights_df = db.get_table('flights')
+    # Flight stats come from the daily rollup: (date, deployment) rows, not one row per flight
+    rollup = db.daily_rollup()
+    figures = get_figure_cache()
     equip_df = db.get_table('equipment')
     dep_df = db.get_table('deployments')
     
@@ -359,7 +622,7 @@ def view_dashboard():
         # Simpler: Get valid IDs for name.
         if 'name' in dep_df.columns:
             valid_ids = dep_df[dep_df['name'] == sel_dep]['deployment_id'].tolist()
-            flights_df = flights_df[flights_df['deployment_id'].isin(valid_ids)]
+            daily_df = rollup.to_frame(valid_ids)
             equip_df = equip_df[equip_df['deployment_id'].isin(valid_ids)]
             # We don't filter dep_df itself usually so we can still show context, 
             # but for active count logic, we might want to? 
@@ -367,8 +630,10 @@ def view_dashboard():
             # "Active Deployments" metric might just become 1 or 0 if filtered?
             # Let's keep dep_df as lookups, but maybe filter 'active' count logic.
         else:
-            flights_df = flights_df[flights_df['deployment_id'] == sel_dep]
+            daily_df = rollup.to_frame([sel_dep])
             equip_df = equip_df[equip_df['deployment_id'] == sel_dep]
+    else:
+        daily_df = rollup.to_frame()
     
     # --- Top Stats ---
     c1, c2, c3, c4 = st.columns(4)
@@ -376,12 +641,12 @@ def view_dashboard():
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-label">Total Flights</div>
-            <div class="metric-value">{len(flights_df)}</div>
+            <div class="metric-value">{int(daily_df['flights'].sum())}</div>
             <div class="metric-sub">Recorded missions</div>
         </div>
         """, unsafe_allow_html=True)
     with c2:
-        hours = flights_df['flight_hours'].sum() if not flights_df.empty else 0
+        hours = daily_df['flight_hours'].sum() if not daily_df.empty else 0
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-label">Flight Hours</div>
@@ -424,9 +689,9 @@ def view_dashboard():
     st.subheader("Operational Findings")
     o1, o2, o3 = st.columns(3)
     
-    tois = flights_df['tois'].sum() if 'tois' in flights_df else 0
-    contraband = flights_df['contraband_lbs'].sum() if 'contraband_lbs' in flights_df else 0
-    detainees = flights_df['detainees'].sum() if 'detainees' in flights_df else 0
+    tois = daily_df['tois'].sum()
+    contraband = daily_df['contraband_lbs'].sum()
+    detainees = daily_df['detainees'].sum()
     
     with o1:
         st.metric("TOIs Identified", int(tois))
@@ -439,107 +704,21 @@ def view_dashboard():
     st.divider()
     st.subheader("Mission Performance")
     
-    if not flights_df.empty:
-        # Prepare Data
-        # We need Date, Name, Hours, Valid MRR/OFTR flags
-        
-        # Join Dep Name
-        if 'name' in dep_df.columns:
-             merged_df = flights_df.merge(dep_df[['deployment_id', 'name']], on='deployment_id', how='left')
-        else:
-             merged_df = flights_df.copy()
-             merged_df['name'] = merged_df['deployment_id']
-             
-        # Aggregate for Stacked Bar (Group by Date + Deployment)
-        # We want to stack by Deployment Name.
-        daily_stack = merged_df.groupby(['date', 'name'])['flight_hours'].sum().reset_index()
-        
-        # Aggregate for Lines (Group by Date only, calculating weighted rate)
-        # Group by Date
-        daily_metrics = []
-        for d in merged_df['date'].unique():
-            day_df = merged_df[merged_df['date'] == d]
-            
-            n_complete = len(day_df[day_df['status'] == 'COMPLETE'])
-            n_delayed = len(day_df[day_df['status'] == 'DELAY'])
-            n_cnx_shield = len(day_df[(day_df['status'] == 'CNX') & (day_df['responsible_part'] == 'Shield AI')])
-            
-            denom_mrr = n_complete + n_delayed + n_cnx_shield
-            mrr = ((n_complete + n_delayed) / denom_mrr) if denom_mrr > 0 else None # None to skip plotting point? Or 0?
-            
-            denom_oftr = n_complete + n_delayed
-            oftr = (n_complete / denom_oftr) if denom_oftr > 0 else None
-            
-            daily_metrics.append({
-                "date": d,
-                "MRR": mrr,
-                "OFTR": oftr
-            })
-        metrics_df = pd.DataFrame(daily_metrics).sort_values('date')
-        
-        # Build Chart
-        fig = go.Figure()
-        
-        # 1. Stacked Bars (Iterate deployments)
-        # Get list of deployments present in this filtered view
-        present_deps = daily_stack['name'].unique()
-        # Color map? Plotly handles auto colors but custom is nice.
-        
-        for dep in present_deps:
-            dep_data = daily_stack[daily_stack['name'] == dep]
-            fig.add_trace(go.Bar(
-                x=dep_data['date'],
-                y=dep_data['flight_hours'],
-                name=str(dep),
-                # marker_color... let auto-assign or map
-            ))
-            
-        fig.update_layout(barmode='stack')
-        
-        # 2. Line - MRR (Right Y)
-        fig.add_trace(go.Scatter(
-            x=metrics_df['date'],
-            y=metrics_df['MRR'],
-            name='Daily MRR',
-            mode='lines+markers',
-            line=dict(color='#4CAF50', width=3),
-            yaxis='y2',
-            connectgaps=True # If some days have no flights
-        ))
-        
-        # 3. Line - OFTR (Right Y)
-        fig.add_trace(go.Scatter(
-            x=metrics_df['date'],
-            y=metrics_df['OFTR'],
-            name='Daily OFTR',
-            mode='lines+markers',
-            line=dict(color='#FFC107', width=3, dash='dot'),
-            yaxis='y2',
-            connectgaps=True
-        ))
-        
-        # Layout
-        fig.update_layout(
-            title="Daily Flight Hours & Reliability (Stacked by Deployment)",
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            xaxis=dict(title="Date"),
-            yaxis=dict(
-                title="Flight Hours",
-                gridcolor='#333'
-            ),
-            yaxis2=dict(
-                title="Rate",
-                overlaying='y',
-                side='right',
-                tickformat='.0%',
-                range=[0, 1.1],
-                gridcolor='#333'
-            ),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    # Chart granularity: Auto picks day/week/month so long ranges stay within the point budget
+    g_ctrl, _ = st.columns([1, 4])
+    granularity = g_ctrl.selectbox("Chart Granularity", ["Auto", "Day", "Week", "Month"], key="dash_granularity")
+    if granularity == "Auto":
+        dates = daily_df['date'].dropna()
+        freq = choose_frequency(dates.min(), dates.max()) if not dates.empty else "day"
+    else:
+        freq = granularity.lower()
+    
+    if not daily_df.empty:
+        # Built once per (data versions, filter); unrelated reruns reuse the cached figure
+        fig = figures.get_or_build(
+            ("performance", db.version('flights'), db.version('deployments'), sel_dep, freq),
+            lambda: build_performance_figure(daily_df, dep_df, freq),
         )
-        
         st.plotly_chart(fig, width="stretch", use_container_width=True)
     else:
         st.info("No flight data available to calculate performance metrics.")
@@ -552,10 +731,11 @@ def view_dashboard():
     
     with g1:
         st.markdown("### Flight Activity")
-        if not flights_df.empty:
-            daily = flights_df.groupby("date")["flight_hours"].sum().reset_index()
-            fig_bar = px.bar(daily, x="date", y="flight_hours", title="Daily Flight Hours", template="plotly_dark")
-            fig_bar.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+        if not daily_df.empty:
+            fig_bar = figures.get_or_build(
+                ("activity", db.version('flights'), db.version('deployments'), sel_dep, freq),
+                lambda: build_activity_figure(daily_df, freq),
+            )
             st.plotly_chart(fig_bar, width="stretch")
         else:
             st.info("No flight data available.")
@@ -563,19 +743,93 @@ def view_dashboard():
     with g2:
         st.markdown("### Equipment Status")
         if not equip_df.empty:
-            status_counts = equip_df['status'].value_counts()
-            fig_pie = px.pie(names=status_counts.index, values=status_counts.values, hole=0.4, template="plotly_dark",
-                             color=status_counts.index, 
-                             color_discrete_map={'FMC':'#4CAF50', 'NMC':'#F44336', 'PMC':'#FFC107', 'CAT5':'#9E9E9E'})
-            fig_pie.update_layout(paper_bgcolor="rgba(0,0,0,0)")
+            fig_pie = figures.get_or_build(
+                ("equipment_status", db.version('equipment'), db.version('deployments'), sel_dep),
+                lambda: build_equipment_pie(equip_df),
+            )
             st.plotly_chart(fig_pie, width="stretch")
         else:
             st.info("No equipment data available.")
 
+    # --- Readiness Trend (from recorded status intervals, not daily snapshots) ---
+    st.markdown("### Readiness Trend")
+    history = db.status_history()
+    if len(history):
+        end_d = date.today()
+        start_d = end_d - timedelta(days=READINESS_TREND_DAYS)
+        trend_freq = choose_frequency(start_d, end_d) if granularity == "Auto" else freq
+        # Filtered view: only assets currently in the selected deployment
+        serials = [asset_key(r) for r in equip_df.to_dict('records')] if sel_dep != "All" else None
+        fig_ready = figures.get_or_build(
+            ("readiness", db.version('equipment'), sel_dep, trend_freq, end_d),
+            lambda: build_readiness_figure(history.trend(start_d, end_d, trend_freq, serials), trend_freq),
+        )
+        st.plotly_chart(fig_ready, width="stretch")
+    else:
+        st.info("No equipment status history available.")
+
+
+def conflict_messages(results, label: str) -> list:
+    """One line per rejected cell of a version-checked save, for st.warning."""
+    messages = []
+    for r in results:
+        if r.status == "missing":
+            messages.append(f"{label} {r.record_id} was deleted by another user; your edit was not saved.")
+            continue
+        for col, (theirs, ours) in r.conflicts.items():
+            messages.append(f"{label} {r.record_id}: '{col}' was changed to {theirs!r} by another user; "
+                            f"your value {ours!r} was not saved.")
+    return messages
+
+def export_controls(df: pd.DataFrame, file_stem: str, key: str):
+    """Format picker and download button; the file is only written (in chunks) when clicked."""
+    c_fmt, c_btn, _ = st.columns([1, 1, 3])
+    fmt = c_fmt.selectbox("Export Format", available_formats(), key=f"{key}_fmt", label_visibility="collapsed")
+    chunk_rows = int(get_backend().config.get("EXPORT_CHUNK_ROWS", DEFAULT_CHUNK_ROWS))
+    c_btn.download_button(
+        f"⬇️ Export {len(df):,} rows",
+        data=lambda: export_file(df, fmt, chunk_rows),
+        file_name=export_name(file_stem, fmt),
+        mime=export_mime(fmt),
+        key=f"{key}_download",
+        disabled=df.empty,
+    )
+
+def table_page(df: pd.DataFrame, key: str, sort_columns: list, filter_sig) -> pd.DataFrame:
+    """
+    Above TABLE_PAGINATE_ROWS rows, renders sort and page controls and returns
+    only the current page, sorted server-side, so just that page is sent to the
+    browser. Smaller tables are returned whole. Page size and position live in
+    session state under `{key}_page_size` / `{key}_page`.
+    """
+    config = get_backend().config
+    if len(df) <= int(config.get("TABLE_PAGINATE_ROWS", 1000)):
+        return df
+    default_size = int(config.get("TABLE_PAGE_SIZE", 100))
+    st.session_state.setdefault(f"{key}_page_size", default_size)
+    st.session_state.setdefault(f"{key}_page", 1)
+
+    c_sort, c_dir, c_size, c_page, c_info = st.columns([2, 1, 1, 1, 2])
+    sort_by = c_sort.selectbox("Sort By", [c for c in sort_columns if c in df.columns], key=f"{key}_sort",
+                               format_func=lambda c: c.replace("_", " ").title())
+    descending = c_dir.toggle("Descending", key=f"{key}_desc")
+    page_size = c_size.selectbox("Rows / Page", sorted(set(PAGE_SIZES + [default_size])), key=f"{key}_page_size")
+
+    # Back to the first page whenever the filters or the order change
+    sig = (filter_sig, sort_by, descending, page_size)
+    if st.session_state.get(f"{key}_page_sig") != sig:
+        st.session_state[f"{key}_page_sig"] = sig
+        st.session_state[f"{key}_page"] = 1
+    st.session_state[f"{key}_page"] = clamp_page(st.session_state[f"{key}_page"], len(df), page_size)
+    n_pages = page_count(len(df), page_size)
+    page = c_page.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    c_info.caption(f"Rows {start + 1:,}–{min(start + page_size, len(df)):,} of {len(df):,}")
+    return page_slice(df, page, page_size, sort_by, descending)
 
 def view_flights():
     st.title("Flight Operations")
-    df = db.get_table('flights')
     deps_df = db.get_table('deployments')
     
     # Map: ID -> "ID: Name"
@@ -626,33 +880,6 @@ def view_flights():
                     diff = (t2 - t1).total_seconds() / 3600
                     st.session_state["new_f_hours"] = round(max(0.0, diff), 1)
             
-            # Helper for Auto-Mission Number
-            def get_next_mission_id(date_obj, ac_num, status):
-                # Format: M-YYYYMMDD-AC-SEQ
-                # If Alert: M-YYYYMMDD-ALERT-SEQ
-                
-                date_str = date_obj.strftime("%Y%m%d")
-                
-                # 1. Determine Middle Segment
-                if status == "ALERT - NO LAUNCH":
-                    mid_seg = "ALERT"
-                else:
-                    # Extract Suffix (e.g. VBAT-001 -> 001)
-                    mid_seg = ac_num.split("-")[-1] if ac_num and "-" in ac_num else "XXX"
-                
-                # 2. Count existing for this day to determine SEQ
-                # We filter by Date AND 'M-{date_str}' prefix to be safe
-                existing_df = db.get_table('flights')
-                
-                # Robust Date Compare
-                mask = pd.to_datetime(existing_df['date']).dt.date == date_obj
-                daily_count = len(existing_df[mask])
-                
-                # Seq is count + 1 (Simple logic, race conditions ignored for mock)
-                seq = daily_count + 1
-                
-                return f"M-{date_str}-{mid_seg}-{seq:02d}"
-
             # Initialize manual override key if not present
             if "new_f_hours" not in st.session_state:
                 st.session_state["new_f_hours"] = 0.0
@@ -705,7 +932,7 @@ def view_flights():
             f_aircraft = r2c1.selectbox(lbl_ac, ["VBAT-001", "VBAT-002", "VBAT-003"], disabled=op_disabled, key="new_f_ac")
             
             # Now we can calc mission num
-            auto_mission_num = get_next_mission_id(f_date, f_aircraft, f_status)
+            auto_mission_num = next_mission_id(db, f_date, f_aircraft, f_status)
             
             # Display Read-Only Mission Num
             r1c3.text_input("Mission # (Auto)", value=auto_mission_num, disabled=True, key="new_f_mission_disp")
@@ -850,13 +1077,12 @@ def view_flights():
                 if valid_records:
                     st.success(f"Validated {len(valid_records)} records.")
                     if st.button("Confirm Import"):
-                        count = 0
                         for r in valid_records:
                             # Auto-assign first selected deployment if missing
                             if 'deployment_id' not in r or not r['deployment_id']:
                                 r['deployment_id'] = sel_deps[0] if sel_deps else "Unknown"
-                            db.add_record('flights', r)
-                            count += 1
+                        # One bulk append instead of a table copy per row
+                        count = db.add_records('flights', valid_records)
                         st.toast(f"Imported {count} flights successfully!")
                         st.rerun()
             except Exception as e:
@@ -887,16 +1113,13 @@ def view_flights():
         start_d = d_c1.date_input("Start", value=date(2025, 1, 1))
         end_d = d_c2.date_input("End", value=date(2025, 12, 31))
         
-    # Apply Logic
-    filtered = df.copy()
-    if sel_deps:
-        filtered = filtered[filtered['deployment_id'].isin(sel_deps)]
-    if sel_stat:
-        filtered = filtered[filtered['status'].str.upper().isin(sel_stat)]
-    if start_d:
-        filtered = filtered[filtered['date'] >= start_d]
-    if end_d:
-        filtered = filtered[filtered['date'] <= end_d]
+    # Version clock before reading: any row written after this is newer than what is shown
+    read_clock = db.version_clock()
+
+    filtered = filter_flights(db, sel_deps, sel_stat, start_d, end_d)
+    
+    # Export exactly what the filters select
+    export_controls(filtered, f"flights_{start_d:%Y%m%d}_{end_d:%Y%m%d}", key="flights_export")
         
     st.divider()
     # ----------------
@@ -905,9 +1128,18 @@ def view_flights():
     c_lock, c_title = st.columns([1, 5])
     is_unlocked = c_lock.checkbox("🔓 Unlock Table", key="flights_unlock", help="Enable inline editing")
     
+    # Large results: only the current page is rendered (both modes)
+    filtered = table_page(
+        filtered, "flights",
+        ['date', 'deployment_id', 'status', 'aircraft_number', 'responsible_part', 'flight_hours', 'contraband_lbs', 'updated_by'],
+        filter_sig=(tuple(sel_deps), tuple(sel_stat), start_d, end_d),
+    )
+    
     if is_unlocked:
         # EDITABLE VIEW
         st.info("📝 Editing Mode Active. Changes are saved automatically.")
+        for msg in st.session_state.pop('flights_save_conflicts', []):
+            st.warning(msg)
         
         # Prepare Data for Editor: Swap ID for Description
         editor_df = filtered.copy()
@@ -917,13 +1149,17 @@ def view_flights():
         
         # Reorder columns: Deployment first, remove Mission Number
         cols = ['deployment_select', 'date', 'aircraft_number', 'status', 'responsible_part', 'reason_for_delay', 'contraband_lbs', 'flight_hours', 'id', 'deployment_id', 'updated_by']
-        editor_df = editor_df[cols]
+        # Tables without some optional columns (e.g. reason_for_delay) show them empty
+        editor_df = editor_df.assign(**{c: None for c in cols if c not in editor_df.columns})[cols]
+        # One editor state per set of rows: its edits are positional, so a
+        # different page or filter must not inherit them
+        editor_key = f"flights_editor_{pd.util.hash_pandas_object(editor_df['id'], index=False).sum()}"
 
         edited_df = st.data_editor(
             editor_df,
             width="stretch",
             height=600,
-            key="flights_editor",
+            key=editor_key,
             column_config={
                 "id": None, # Hide ID
                 "deployment_id": None, # Hide Raw ID (we use Select)
@@ -945,46 +1181,23 @@ def view_flights():
         
         # Update Logic
         if not edited_df.equals(editor_df):
-            current_full_df = db.get_table('flights')
-            updates_count = 0
-            
-            # We assume ID matches
-            for index, row in edited_df.iterrows():
-                row_id = row.get('id')
-                if row_id is not None:
-                    mask = current_full_df['id'] == row_id
-                    if mask.any():
-                        old_row = current_full_df.loc[mask].iloc[0]
-                        has_change = False
-                        
-                        # 1. Reverse Map Deployment if Changed
-                        new_dep_str = row.get('deployment_select')
-                        new_dep_id = None
-                        if new_dep_str:
-                             # Extract ID from "ID: Name"
-                             # Assuming format "ID: Name"
-                             new_dep_id = new_dep_str.split(":")[0]
-                        
-                        # Check Standard Cols
-                        for col in ['date', 'mission_number', 'aircraft_number', 'status', 'responsible_part', 'reason_for_delay', 'contraband_lbs', 'flight_hours', 'notes']:
-                             if row.get(col) != old_row.get(col):
-                                 has_change = True
-                                 current_full_df.loc[mask, col] = row.get(col)
-                        
-                        # Check Deployment Change
-                        if new_dep_id and new_dep_id != old_row.get('deployment_id'):
-                            has_change = True
-                            current_full_df.loc[mask, 'deployment_id'] = new_dep_id
-                            
-                        if has_change:
-                            current_full_df.loc[mask, 'updated_by'] = "Admin" # Mock
-                            updates_count += 1
-            
-            if updates_count > 0:
-                st.session_state['db_state']['flights'] = current_full_df
-                st.toast(f"Saved {updates_count} changes.")
+            # Diff against what the editor was given, not the stored table, so cells
+            # this user did not touch never overwrite someone else's newer edit
+            seen_df, seen_clock = st.session_state.get('flights_editor_seen', (editor_df, None))
+            changes = save_flight_edits(db, editor_df, edited_df, seen_df, seen_clock)
+
+            saved, rejected = changes.saved, changes.rejected
+            if rejected:
+                st.session_state['flights_save_conflicts'] = conflict_messages(rejected, "Flight")
+                # Drop the rejected edits from the grid so they are not re-sent on the next run
+                st.session_state.pop(editor_key, None)
+            if saved or rejected:
+                merged = sum(r.status == "merged" for r in saved)
+                st.toast(f"Saved {len(saved)} changes" + (f" ({merged} merged with newer edits)." if merged else "."))
                 st.rerun()
 
+        st.session_state['flights_editor_seen'] = (editor_df, read_clock)
+
     else:
         # READ-ONLY STYLED VIEW
         # Insert Mapped Column for Display
@@ -1005,7 +1218,11 @@ def view_flights():
                 return 'color: #455A64; font-weight: bold; background-color: #ECEFF1;'
             return ''
 
-        styled_df = display_df.style.map(style_responsible, subset=['responsible_part'])
+        # Styler refuses tables above styler.render.max_elements cells
+        if 'responsible_part' in display_df.columns and display_df.size <= pd.get_option("styler.render.max_elements"):
+            styled_df = display_df.style.map(style_responsible, subset=['responsible_part'])
+        else:
+            styled_df = display_df
 
         st.dataframe(
             styled_df,
@@ -1053,13 +1270,19 @@ def view_equipment():
     # We should iterate through ALL Active Deployments instead.
     active_deps = dep_df['deployment_id'].unique() if not dep_df.empty else unique_deps
     
+    # Export the equipment listed below
+    export_controls(eq_df[eq_df['deployment_id'].isin(active_deps)], f"equipment_{date.today():%Y%m%d}",
+                    key="equip_export")
+    
     for dep_id in active_deps:
         dep_name = dep_map.get(dep_id, "Unknown Deployment")
         header_text = f"{dep_id} - {dep_name}"
         
         with st.expander(header_text, expanded=True):
-            # Filter Data
-            subset = eq_df[eq_df['deployment_id'] == dep_id].copy()
+            # Filter Data (clock first: rows written after it are newer than shown)
+            read_clock = db.version_clock()
+            subset = db.get_partition('equipment', 'deployment_id', dep_id).copy()
+            seen_key = f"equip_editor_seen_{dep_id}"
             
             if is_edit_mode:
                 # --- EDIT MODE ---
@@ -1069,7 +1292,9 @@ def view_equipment():
                 # Better: Use a dedicated "Add" block or just trust user to fill?
                 # Actually, if we hide deployment_id col, user can't fill it.
                 # Strategy: We show all cols (except ID). User adds row. We inject dep_id on save.
-                
+                for msg in st.session_state.pop(f"equip_save_conflicts_{dep_id}", []):
+                    st.warning(msg)
+
                 edited_subset = st.data_editor(
                     subset,
                     key=f"editor_{dep_id}",
@@ -1101,32 +1326,20 @@ def view_equipment():
                     # Note: subset came from filtered eq_df. New rows won't have the fixed value unless we set default?
                     # We can't set hidden default easily. We just fillna.
                     
-                    edited_subset['deployment_id'] = dep_id
-                    
                     # 3. Merge Back
-                    full_df = db.get_table('equipment')
-                    # Drop old for this dep
-                    remaining = full_df[full_df['deployment_id'] != dep_id]
-                    
-                    # Assign new IDs to new rows if needed? 
-                    # If 'id' is empty/NaN, generate one.
-                    if 'id' in edited_subset.columns:
-                        # Simple valid max ID logic
-                        max_id = full_df['id'].max() if not full_df.empty else 0
-                        # Identify new rows (NaN id)
-                        # This depends on how st.data_editor handles numerical ID cols on new rows. Usually None.
-                        # We iterate and fix.
-                         # Vectorized fix difficult with increment. Loop ok for small data.
-                        for i, row in edited_subset.iterrows():
-                             if pd.isna(row['id']) or row['id'] == 0:
-                                 max_id += 1
-                                 edited_subset.at[i, 'id'] = max_id
-                    
-                    new_full = pd.concat([remaining, edited_subset], ignore_index=True)
-                    st.session_state['db_state']['equipment'] = new_full
-                    st.toast(f"Saved changes for {dep_id}")
+                    # Record only new/changed/removed rows as this session's edits
+                    # (each add/update is also queued for writeback)
+                    seen_df, seen_clock = st.session_state.get(seen_key, (subset, None))
+                    changes = save_equipment_edits(db, dep_id, subset, edited_subset, seen_df, seen_clock)
+                    if changes.rejected:
+                        st.session_state[f"equip_save_conflicts_{dep_id}"] = conflict_messages(changes.rejected, "Equipment")
+                        st.session_state.pop(f"editor_{dep_id}", None)
+                        st.rerun()
+                    if not changes.is_empty():
+                        st.toast(f"Saved changes for {dep_id}")
                     # Rerun to refresh view
                     # st.rerun() # Be careful of loops. Toast is enough feedback usually, but rerun ensures IDs stick.
+                st.session_state[seen_key] = (subset, read_clock)
             
             else:
                 # --- READ ONLY (Styled) ---
@@ -1198,23 +1411,22 @@ def view_inventory():
     
     selected_dep = st.selectbox("Select Deployment", deps_df['deployment_id'].unique(), format_func=lambda x: f"{x} - {dep_names.get(x, '')}")
     
-    inv_df = db.get_table('inventory')
-    shipping_df = db.get_table('shipping') # Fixed access
-    
     # Shipment Queue
-    incoming = shipping_df[(shipping_df['deployment_id'] == selected_dep) & (shipping_df['status'] != 'Received (Site)')]
+    dep_shipments = db.get_partition('shipping', 'deployment_id', selected_dep)
+    incoming = dep_shipments[dep_shipments['status'] != 'Received (Site)']
     if not incoming.empty:
         st.warning(f"🚚 {len(incoming)} Shipments In-Transit/Ordered")
         with st.expander("Incoming Shipments Queue"):
             st.dataframe(incoming, width="stretch")
             if st.button("Simulate Receiving All"):
                 # Mock Logic
-                shipping_df.loc[shipping_df['deployment_id'] == selected_dep, 'status'] = 'Received (Site)'
+                for ship_id in dep_shipments['id']:
+                    db.update_record('shipping', ship_id, {'status': 'Received (Site)'})
                 st.toast("Shipments Marked Received - Inventory Counts Updated (Simulation)")
                 st.rerun()
 
     # Main Inventory
-    dep_inv = inv_df[inv_df['deployment_id'] == selected_dep]
+    dep_inv = db.get_partition('inventory', 'deployment_id', selected_dep)
     
     st.markdown("### Stock Level Control")
     
@@ -1233,12 +1445,11 @@ def view_inventory():
     
     # Save Logic (similar to Equipment)
     if not edited_inv.equals(dep_inv):
-         current_full = db.get_table('inventory')
-         other_rows = current_full[current_full['deployment_id'] != selected_dep]
-         updated_full = pd.concat([other_rows, edited_inv], ignore_index=True)
-         st.session_state['db_state']['inventory'] = updated_full
-         st.toast("Inventory Updated")
-         st.rerun()
+         # Record (and queue for writeback) only the rows that changed
+         changes = save_inventory_edits(db, dep_inv, edited_inv)
+         if not changes.is_empty():
+             st.toast(f"Inventory Updated ({changes.cell_count} changes)")
+             st.rerun()
 
 def view_kits():
     st.title("Kits Management")
@@ -1254,13 +1465,13 @@ def view_kits():
             "deployment_id": ["DEP-001", "DEP-001"],
             "item_count": [45, 120]
         })
-        st.session_state['db_state']['kits'] = kits_df
+        db.replace_table('kits', kits_df)
 
     deployments = kits_df['deployment_id'].unique()
     
     for dep in deployments:
         st.markdown(f"### {dep}")
-        dep_kits = kits_df[kits_df['deployment_id'] == dep]
+        dep_kits = db.get_partition('kits', 'deployment_id', dep)
         
         for _, kit in dep_kits.iterrows():
             with st.expander(f"📦 {kit['kit_name']} (SN: {kit.get('kit_number', 'N/A')})"):
@@ -1307,7 +1518,6 @@ def view_kits():
                     # In real app: df = pd.read_excel(uploaded_file)
                     
                     new_kit = {
-                        "id": len(kits_df) + 1,
                         "kit_name": uploaded_file.name.split('.')[0],
                         "kit_number": f"KIT-{len(kits_df) + 1:03d}",
                         "version": "1.0",
@@ -1315,7 +1525,7 @@ def view_kits():
                         "item_count": 0 # Would be len(df)
                     }
                     
-                    st.session_state['db_state']['kits'] = pd.concat([kits_df, pd.DataFrame([new_kit])], ignore_index=True)
+                    db.add_record('kits', new_kit)
                     st.toast(f"Imported {new_kit['kit_name']} to {target_dep}")
                     st.rerun()
                     
@@ -1350,12 +1560,10 @@ def view_shipping():
         }
         
         # Mock Insert/Update
-        existing_idx = df.index[df['id'] == uid].tolist()
-        if existing_idx:
-            for col, val in new_row.items():
-                st.session_state['db_state']['shipping'].at[existing_idx[0], col] = val
+        if db.get_by_id('shipping', uid) is not None:
+            db.update_record('shipping', uid, new_row)
         else:
-             st.session_state['db_state']['shipping'] = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+             db.add_record('shipping', new_row)
              
         # 2. Update Items (MockDB doesn't have a separate shipment_items table yet, so we just track count)
         # In V4 we'd save the items_df to a 'shipment_items' table.
@@ -1495,15 +1703,13 @@ def view_shipping():
                 if not is_catalog_item:
                         existing_part = catalog_df[catalog_df['part_number'] == final_pn]
                         if existing_part.empty:
-                            new_part_id = len(catalog_df) + 1
                             new_part_entry = {
-                                "id": new_part_id,
                                 "part_number": final_pn,
                                 "description": final_desc,
                                 "category": "Uncategorized",
                                 "created_at": date.today()
                             }
-                            st.session_state['db_state']['parts_catalog'] = pd.concat([catalog_df, pd.DataFrame([new_part_entry])], ignore_index=True)
+                            db.add_record('parts_catalog', new_part_entry)
                             st.toast(f"New Part Created: {final_pn}")
                 
                 # Reset manual inputs
@@ -1536,8 +1742,8 @@ def view_service_bulletins():
     st.title("Service Bulletins")
     
     sbs = db.get_table('service_bulletins')
-    deps = db.get_table('deployments')
-    active_deps = deps[deps['status'] != 'Archived']
+    active_deps = active_deployments(db.get_table('deployments'))
+    matrix = compliance_matrix(sbs, active_deps)
     
     st.markdown("### Compliance Matrix")
     
@@ -1546,25 +1752,19 @@ def view_service_bulletins():
     cols[0].markdown("**Date**")
     cols[1].markdown("**SB #**")
     cols[2].markdown("**Description**")
-    for i, row in active_deps.iterrows():
-        cols[3+i].markdown(f"**{row['name']}**") # Use Name or ID
+    for i, name in enumerate(active_deps['name']):
+        cols[3+i].markdown(f"**{name}**") # Use Name or ID
         
     st.divider()
     
-    for _, sb in sbs.iterrows():
+    for sb in matrix.itertuples(index=False, name=None):
         r_cols = st.columns([1, 1, 3] + [1] * len(active_deps))
-        r_cols[0].write(sb['date_issued'])
-        r_cols[1].write(sb['sb_number'])
-        r_cols[2].write(sb['description'])
+        r_cols[0].write(sb[0])
+        r_cols[1].write(sb[1])
+        r_cols[2].write(sb[2])
         
         # Deployment Columns
-        for i, dep_row in active_deps.iterrows():
-            dep_id = dep_row['deployment_id']
-            # Lookup status (mock logic: expects 'status_DEP-XXX' column)
-            # In real app, this would be a lookup in 'effected_equipment' JSON or joined table
-            status_col = f"status_{dep_id}"
-            status = sb.get(status_col, "N/A")
-            
+        for i, status in enumerate(sb[3:]):
             badge_class = "badge-nmc" # Default/Partial
             if status == "Complete": badge_class = "badge-fmc"
             if status == "N/A": badge_class = "badge-pmc"
@@ -1576,6 +1776,104 @@ def view_service_bulletins():
     if st.checkbox("Toggle Admin Mode"):
         st.info("Admin mode allows creating new Service Bulletins. (Feature Placeholder)")
 
+def view_reports():
+    st.title("Reports")
+    st.markdown("SITREP and end-of-deployment reports as Excel and PDF, generated in the background.")
+    
+    dep_df = db.get_table('deployments')
+    dep_names = dict(zip(dep_df['deployment_id'], dep_df['name'])) if 'name' in dep_df.columns else {}
+    
+    # 1. Report Scope
+    c1, c2, c3 = st.columns([2, 1, 2])
+    dep_choice = c1.selectbox("Deployment", ["All"] + list(dep_df['deployment_id'].unique()),
+                              format_func=lambda x: x if x == "All" else f"{x} - {dep_names.get(x, '')}")
+    period = c2.selectbox("Period", PERIODS)
+    dep_ids = None if dep_choice == "All" else [dep_choice]
+    
+    with c3:
+        if period == "Custom":
+            d_c1, d_c2 = st.columns(2)
+            start_d = d_c1.date_input("Start", value=date.today() - timedelta(days=6))
+            end_d = d_c2.date_input("End", value=date.today())
+        else:
+            end_d = st.date_input("Report Date", value=date.today())
+            if period == "Daily":
+                start_d = end_d
+            elif period == "Weekly":
+                start_d = end_d - timedelta(days=6)
+            else:
+                # Deployment to Date: from the deployment start (or first flight)
+                starts = dep_df.loc[dep_df['deployment_id'].isin(dep_ids), 'start_date'].dropna() \
+                    if dep_ids and 'start_date' in dep_df.columns else pd.Series(dtype=object)
+                first_flight = db.daily_rollup().to_frame(dep_ids)['date'].dropna()
+                # Stored start dates and rollup days can be Timestamps; compare and key on plain dates
+                start_d = pd.to_datetime(starts.min()).date() if not starts.empty else \
+                    (pd.to_datetime(first_flight.min()).date() if not first_flight.empty else end_d)
+    
+    if start_d > end_d:
+        st.error("Start date is after the end date.")
+        return
+    st.caption(f"Period: {start_d} to {end_d}")
+    
+    # 2. Job Key: same scope and unchanged data -> the cached report is reused
+    key = ("sitrep", dep_choice, period, start_d, end_d,
+           db.version('flights'), db.version('equipment'), db.version('inventory'), db.version('service_bulletins'))
+    engine = get_report_engine()
+    
+    if st.button("Generate Report", type="primary"):
+        # Snapshots are taken here; the worker only builds and renders
+        flights = db.get_partition('flights', 'date', between=(start_d, end_d))
+        equipment = db.get_table('equipment')
+        inventory = db.get_table('inventory')
+        if dep_ids:
+            flights = flights[flights['deployment_id'].isin(dep_ids)]
+            equipment = equipment[equipment['deployment_id'].isin(dep_ids)]
+            inventory = inventory[inventory['deployment_id'].isin(dep_ids)]
+        serials = [asset_key(r) for r in equipment.to_dict('records')] if dep_ids else None
+        inputs = SitrepInputs(
+            deployment_id=dep_choice if dep_ids else None,
+            deployment_name=dep_names.get(dep_choice, dep_choice) if dep_ids else "All Deployments",
+            period=period,
+            start=start_d,
+            end=end_d,
+            daily=db.daily_rollup().to_frame(dep_ids),
+            flights=flights,
+            equipment=equipment,
+            readiness=db.status_history().trend(start_d, end_d, report_frequency(start_d, end_d), serials),
+            inventory=inventory,
+            service_bulletins=db.get_table('service_bulletins'),
+        )
+        engine.submit(key, lambda: render_sitrep(inputs))
+    
+    # 3. Status / Downloads (polls only while the worker runs)
+    job = engine.get(key)
+    if job is None:
+        return
+    if not job.done():
+        report_progress(key)
+        return
+    report_downloads(job, f"SITREP_{dep_choice}_{start_d:%Y%m%d}_{end_d:%Y%m%d}")
+
+@st.fragment(run_every=2)
+def report_progress(key):
+    """Polls the running job; once it finishes, one full rerun swaps this for the downloads and stops the timer."""
+    job = get_report_engine().get(key)
+    if job is not None and job.done():
+        st.rerun()
+    st.info("⏳ Generating report in the background. You can keep working.")
+
+def report_downloads(job, file_stem: str):
+    if job.exception() is not None:
+        st.error(f"Report failed: {job.exception()}")
+        return
+    output = job.result()
+    st.success("Report ready.")
+    d1, d2, _ = st.columns([1, 1, 3])
+    d1.download_button("⬇️ Excel", data=output['xlsx'], file_name=f"{file_stem}.xlsx",
+                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="report_xlsx")
+    d2.download_button("⬇️ PDF", data=output['pdf'], file_name=f"{file_stem}.pdf",
+                       mime="application/pdf", key="report_pdf")
+
 # ==========================================
 # ROUTER
 # ==========================================
@@ -1614,9 +1912,40 @@ for page_key, page_label in pages.items():
 current_page = st.session_state['page']
 
 st.sidebar.markdown("---")
+if st.session_state.get('data_source') == "Foundry API":
+    if st.sidebar.button("🔄 Refresh", key="refresh_data", width="stretch"):
+        refresh_data()
+    
+    # Writeback Indicator (Pending vs Committed)
+    wb_status = get_backend().writeback_status()
+    wb_pending = sum(s['pending'] for s in wb_status.values())
+    wb_errors = [f"{name}: {s['last_error']}" for name, s in wb_status.items() if s['last_error']]
+    if wb_pending:
+        st.sidebar.caption(f"⏳ {wb_pending} change(s) pending commit")
+        if st.sidebar.button("Commit Now", key="flush_writes", width="stretch"):
+            get_backend().flush_writes()
+            st.rerun()
+    elif any(s['last_commit'] for s in wb_status.values()):
+        last = max(s['last_commit'] or 0 for s in wb_status.values())
+        st.sidebar.caption(f"✅ All changes committed ({datetime.fromtimestamp(last).strftime('%H:%M:%S')})")
+    for err in wb_errors:
+        st.sidebar.caption(f"⚠️ Writeback failed - {err}")
+# Change Journal: this session's edits as a delta file (instead of full snapshots), built on click
+if len(db.journal):
+    st.sidebar.download_button(
+        f"⬇️ Export Changes ({len(db.journal)})",
+        data=db.journal.export_delta,
+        file_name=f"spark_delta_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz",
+        mime="application/gzip",
+        key="export_delta",
+        width="stretch",
+    )
 st.sidebar.caption(f"User: Matt Davis (Admin)")
 st.sidebar.caption(f"Env: Foundry / Streamlit V3")
 
+# Filled once the page has run: tables it needed that failed to load
+load_notice = st.container()
+
 if current_page == "Dashboard":
     view_dashboard()
 elif current_page == "Flights":
@@ -1631,6 +1960,8 @@ elif current_page == "Shipping":
     view_shipping()
 elif current_page == "Service Bulletins":
     view_service_bulletins()
+elif current_page == "Reports":
+    view_reports()
 elif current_page == "Deployments":
     st.title("Deployments Management")
     st.info("📝 Manage deployments below. Use the '+' toolbar to add new deployments.")
@@ -1654,9 +1985,13 @@ elif current_page == "Deployments":
     
     # Save Logic
     if not edited_dep_df.equals(dep_df):
-        st.session_state['db_state']['deployments'] = edited_dep_df
+        db.replace_table('deployments', edited_dep_df)
         st.toast("✅ Deployments updated successfully!")
 else:
     st.title(current_page)
     st.warning("Module under active development.")
 
+# Only the Foundry/mock store loads tables lazily; the SQLite database has none pending
+load_errors = db.store.load_errors() if hasattr(db, 'store') else {}
+for name, err in load_errors.items():
+    load_notice.warning(f"⚠️ Could not load '{name}' ({err}). It is shown empty and will be retried.")
@@ -0,0 +1,106 @@
+import gzip
+import io
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List, NamedTuple, Union, IO
+
+import numpy as np
+import pandas as pd
+
+from concurrency import same_value
+
+
+class JournalEntry(NamedTuple):
+    seq: int
+    table: str
+    id: Any
+    column: Optional[str]  # None marks a deleted row
+    old: Any
+    new: Any
+    user: Optional[str]
+    ts: float
+
+
+def _json_value(value):
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class ChangeJournal:
+    """
+    Append-only log of cell-level changes: (table, id, column, old, new, user, ts).
+    Inserts log one entry per non-empty column with old=None; deletes log a
+    single entry with column=None. Entries carry a sequence number so a delta
+    can be exported incrementally with `since=`.
+    """
+
+    def __init__(self):
+        self._entries: List[JournalEntry] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def last_seq(self) -> int:
+        return self._entries[-1].seq if self._entries else 0
+
+    def _append(self, table: str, record_id, column, old, new, user):
+        with self._lock:
+            seq = self.last_seq + 1
+            self._entries.append(JournalEntry(seq, table, record_id, column, old, new, user, time.time()))
+
+    # --- Recording ---
+    def record_insert(self, table: str, record: Dict[str, Any], user: Optional[str] = None):
+        record_id = record.get('id')
+        for column, value in record.items():
+            if column != 'id' and not same_value(value, None):
+                self._append(table, record_id, column, None, value, user)
+
+    def record_update(self, table: str, record_id, old_row: Dict[str, Any], updates: Dict[str, Any],
+                      user: Optional[str] = None):
+        """Logs only the columns whose value actually changes."""
+        for column, value in updates.items():
+            old = old_row.get(column)
+            if not same_value(old, value):
+                self._append(table, record_id, column, old, value, user)
+
+    def record_delete(self, table: str, record_id, user: Optional[str] = None):
+        self._append(table, record_id, None, None, None, user)
+
+    # --- Reading ---
+    def entries(self, since: int = 0, table: Optional[str] = None) -> List[JournalEntry]:
+        with self._lock:
+            return [e for e in self._entries if e.seq > since and (table is None or e.table == table)]
+
+    def history(self, table: str, record_id) -> List[JournalEntry]:
+        """Every logged change to one row, oldest first."""
+        return [e for e in self.entries(table=table) if e.id == record_id]
+
+    def to_frame(self, since: int = 0) -> pd.DataFrame:
+        return pd.DataFrame(self.entries(since), columns=JournalEntry._fields)
+
+    def export_delta(self, dest: Union[str, IO[bytes], None] = None, since: int = 0) -> bytes:
+        """
+        Writes entries after `since` as gzipped JSON lines, one entry per line,
+        to `dest` (a path or binary file) and returns the bytes.
+        """
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as gz:
+            for entry in self.entries(since):
+                row = {field: _json_value(value) for field, value in entry._asdict().items()}
+                gz.write((json.dumps(row, separators=(",", ":")) + "\n").encode("utf-8"))
+        data = buffer.getvalue()
+        if isinstance(dest, str):
+            with open(dest, "wb") as f:
+                f.write(data)
+        elif dest is not None:
+            dest.write(data)
+        return data
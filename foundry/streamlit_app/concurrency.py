@@ -0,0 +1,72 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Tuple
+
+import pandas as pd
+
+# Bookkeeping columns every save rewrites; they never count as a conflict
+META_COLUMNS = {"updated_by"}
+
+
+def same_value(a, b) -> bool:
+    """Equality that treats None/NaN/NA as equal to each other."""
+    a_na = a is None or (not isinstance(a, (list, dict)) and pd.isna(a))
+    b_na = b is None or (not isinstance(b, (list, dict)) and pd.isna(b))
+    if a_na or b_na:
+        return a_na and b_na
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+@dataclass
+class UpdateResult:
+    """Outcome of a version-checked update, for reporting back to the UI."""
+    record_id: Any
+    status: str  # "applied", "merged", "conflict", "unchanged" or "missing"
+    applied: Dict[str, Any] = field(default_factory=dict)
+    # column -> (their current value, the value this save tried to write)
+    conflicts: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    version: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "conflict" and self.status != "missing"
+
+
+def resolve_update(
+    current: Dict[str, Any],
+    updates: Dict[str, Any],
+    current_version: int,
+    seen_version: Optional[int] = None,
+    base_row: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Tuple[Any, Any]], str]:
+    """
+    Decides which cells of `updates` to write to a row whose stored values are `current`.
+    `seen_version` is the version clock when the caller read the row: if the
+    row has not been written since (or no version was given) every changed
+    cell is written. Otherwise the row was changed by someone else
+    since `base_row` was read: cells they did not touch are merged, cells
+    they changed to a different value are rejected as conflicts.
+    Returns (cells to write, conflicts, status).
+    """
+    if seen_version is None or current_version <= seen_version:
+        to_apply = {c: v for c, v in updates.items() if not same_value(current.get(c), v)}
+        return to_apply, {}, "applied" if to_apply else "unchanged"
+
+    to_apply, conflicts = {}, {}
+    for col, value in updates.items():
+        theirs = current.get(col)
+        if col in META_COLUMNS or same_value(theirs, value):
+            continue
+        if base_row is not None and col in base_row and same_value(theirs, base_row[col]):
+            to_apply[col] = value
+        else:
+            conflicts[col] = (theirs, value)
+
+    if to_apply:
+        # Keep bookkeeping columns (e.g. updated_by) with the cells that do land
+        to_apply.update({c: v for c, v in updates.items() if c in META_COLUMNS})
+    if conflicts:
+        return to_apply, conflicts, "conflict"
+    return to_apply, conflicts, "merged" if to_apply else "unchanged"
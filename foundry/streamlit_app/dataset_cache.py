@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pa_parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class DatasetCache:
+    """
+    On-disk Parquet cache for Foundry datasets.
+    Entries are keyed by dataset RID + the transaction RID they were read at,
+    so a cached copy is only served while the dataset has not changed.
+    Least recently used entries are evicted once the directory exceeds max_bytes.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = self._load_index()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], base_dir: str = ".") -> Optional["DatasetCache"]:
+        """
+        Builds a cache from CACHE_DIR / CACHE_MAX_MB, or returns None when
+        caching is disabled or pyarrow is not installed.
+        """
+        directory = config.get("CACHE_DIR")
+        if not directory or not HAS_PYARROW:
+            return None
+        if not os.path.isabs(directory):
+            directory = os.path.join(base_dir, directory)
+        max_mb = float(config.get("CACHE_MAX_MB", 512))
+        try:
+            return cls(directory, int(max_mb * 1024 * 1024))
+        except OSError as e:
+            print(f"Dataset cache disabled ({directory}): {e}")
+            return None
+
+    # --- Index ---
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        path = self._index_path()
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Dataset cache index unreadable, starting empty: {e}")
+            return {}
+
+    def _save_index(self):
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp, self._index_path())
+
+    @staticmethod
+    def _file_name(rid: str, transaction_rid: str) -> str:
+        safe = f"{rid}__{transaction_rid}"
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in safe) + ".parquet"
+
+    # --- Public API ---
+    def get_transaction(self, rid: str) -> Optional[str]:
+        """Returns the transaction RID the cached copy of `rid` was read at."""
+        with self._lock:
+            entry = self._index.get(rid)
+            return entry["transaction"] if entry else None
+
+    def get(self, rid: str, transaction_rid: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Returns the cached table if it was stored for this exact transaction."""
+        with self._lock:
+            entry = self._index.get(rid)
+            if not entry or entry["transaction"] != transaction_rid:
+                return None
+            path = os.path.join(self.directory, entry["file"])
+            if not os.path.exists(path):
+                del self._index[rid]
+                self._save_index()
+                return None
+            entry["last_access"] = time.time()
+            self._save_index()
+
+        try:
+            if columns:
+                # Only prune to columns the cached copy actually has
+                names = pa_parquet.read_schema(path).names
+                columns = [c for c in columns if c in names]
+            return pd.read_parquet(path, columns=columns)
+        except Exception as e:
+            print(f"Dataset cache read failed for {rid}: {e}")
+            self.invalidate(rid)
+            return None
+
+    def put(self, rid: str, transaction_rid: str, df: pd.DataFrame) -> bool:
+        """Stores `df` for (rid, transaction_rid), replacing any older copy."""
+        file_name = self._file_name(rid, transaction_rid)
+        path = os.path.join(self.directory, file_name)
+        tmp = path + ".tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            # Mixed-type object columns cannot always be mapped to Arrow
+            print(f"Dataset cache write skipped for {rid}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+
+        with self._lock:
+            old = self._index.get(rid)
+            if old and old["file"] != file_name:
+                self._remove_file(old["file"])
+            self._index[rid] = {
+                "transaction": transaction_rid,
+                "file": file_name,
+                "size": os.path.getsize(path),
+                "last_access": time.time(),
+            }
+            self._evict()
+            self._save_index()
+        return True
+
+    def invalidate(self, rid: str):
+        with self._lock:
+            entry = self._index.pop(rid, None)
+            if entry:
+                self._remove_file(entry["file"])
+                self._save_index()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(e["size"] for e in self._index.values())
+
+    # --- Eviction ---
+    def _remove_file(self, file_name: str):
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        total = sum(e["size"] for e in self._index.values())
+        by_age = sorted(self._index.items(), key=lambda kv: kv[1]["last_access"])
+        for rid, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            self._remove_file(entry["file"])
+            del self._index[rid]
+            total -= entry["size"]
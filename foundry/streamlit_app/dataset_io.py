@@ -0,0 +1,125 @@
+from io import BytesIO
+from typing import Optional, Dict, Any, List, IO
+
+import pandas as pd
+
+from dataset_schemas import DATASET_SCHEMAS
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pa_parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# CSV is parsed in blocks of this size so only one block of raw text is
+# held at a time.
+CSV_BLOCK_SIZE = 1 << 20
+
+# Date formats accepted when a schema column is declared as "date"
+DATE_PARSERS = ["%Y-%m-%d", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+
+PANDAS_DTYPES = {"string": "string", "int": "Int64", "double": "float64"}
+
+# Content types the binary read path understands
+ARROW_CONTENT_TYPES = ("application/vnd.apache.arrow.stream", "application/x-arrow-stream")
+PARQUET_CONTENT_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+
+
+def _arrow_types(schema: Dict[str, str]) -> Dict[str, Any]:
+    # Dates are parsed as timestamps (which accept several formats) and cast
+    # to date32 once the table is assembled.
+    arrow_types = {"string": pa.string(), "int": pa.int64(), "double": pa.float64(), "date": pa.timestamp("s")}
+    return {col: arrow_types[t] for col, t in schema.items()}
+
+
+def arrow_to_pandas(table: "pa.Table", schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Converts an Arrow table to pandas with the app's conventions:
+    nullable ints stay integers (Int64) and date columns become `datetime.date`
+    values, matching how the views and mock data compare dates.
+    """
+    for col in (schema or {}):
+        if schema[col] == "date" and col in table.column_names:
+            idx = table.column_names.index(col)
+            if not pa.types.is_date32(table.schema.field(idx).type):
+                table = table.set_column(idx, col, table.column(idx).cast(pa.date32()))
+
+    mapper = {pa.int8(): pd.Int64Dtype(), pa.int16(): pd.Int64Dtype(),
+              pa.int32(): pd.Int64Dtype(), pa.int64(): pd.Int64Dtype()}
+    return table.to_pandas(types_mapper=mapper.get, date_as_object=True,
+                           split_blocks=True, self_destruct=True)
+
+
+def read_csv_stream(stream: IO[bytes], dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Parses CSV incrementally from a file-like byte stream (e.g. `response.raw`)
+    applying the declared column types of `dataset_name`. Columns not in the
+    schema are type-inferred. `columns` keeps only those columns.
+    """
+    schema = DATASET_SCHEMAS.get(dataset_name, {})
+
+    if not HAS_PYARROW:
+        # Pandas still reads the stream in chunks, but dates need a post-pass
+        dtypes = {c: PANDAS_DTYPES[t] for c, t in schema.items() if t in PANDAS_DTYPES}
+        usecols = (lambda c: c in columns) if columns else None
+        df = pd.read_csv(stream, dtype=dtypes, usecols=usecols)
+        for col, t in schema.items():
+            if t == "date" and col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.date
+        return df
+
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=_arrow_types(schema),
+            timestamp_parsers=DATE_PARSERS,
+            include_columns=columns,
+            include_missing_columns=bool(columns),
+            strings_can_be_null=True,
+        ),
+    )
+    table = reader.read_all()
+    return arrow_to_pandas(table, schema)
+
+
+def read_arrow_stream(stream: IO[bytes], dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads an Arrow IPC stream batch by batch, keeping only `columns` of each
+    batch as it arrives, so unrequested columns are never held for the whole table.
+    """
+    reader = pa_ipc.open_stream(stream)
+    # Servers that ignore the `columns` parameter still return every column
+    keep = [c for c in columns if c in reader.schema.names] if columns else None
+    batches = []
+    while True:
+        try:
+            batch = reader.read_next_batch()
+        except StopIteration:
+            break
+        batches.append(batch.select(keep) if keep is not None else batch)
+    schema = pa.schema([reader.schema.field(c) for c in keep]) if keep is not None else reader.schema
+    table = pa.Table.from_batches(batches, schema=schema)
+    return arrow_to_pandas(table, DATASET_SCHEMAS.get(dataset_name))
+
+
+def read_parquet_stream(stream: IO[bytes], dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Reads a Parquet body. Parquet needs random access, so the body is buffered once."""
+    parquet_file = pa_parquet.ParquetFile(BytesIO(stream.read()))
+    names = parquet_file.schema_arrow.names
+    table = parquet_file.read(columns=[c for c in columns if c in names] if columns else None)
+    return arrow_to_pandas(table, DATASET_SCHEMAS.get(dataset_name))
+
+
+def read_response_stream(stream: IO[bytes], content_type: str, dataset_name: str,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Dispatches on the response Content-Type: Arrow, Parquet or CSV."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if HAS_PYARROW and content_type in ARROW_CONTENT_TYPES:
+        return read_arrow_stream(stream, dataset_name, columns)
+    if HAS_PYARROW and content_type in PARQUET_CONTENT_TYPES:
+        return read_parquet_stream(stream, dataset_name, columns)
+    return read_csv_stream(stream, dataset_name, columns)
@@ -0,0 +1,176 @@
+# ==========================================
+# DATASET SCHEMAS
+# ==========================================
+# Column types for the clean Foundry datasets, mirroring the *_SCHEMA
+# StructTypes in pipeline/release_v3/transforms/src/sparkproject/datasets/spark_transforms.py.
+# Types use Spark's simple names ("string", "int", "double", "date") so the
+# app can type incoming data without depending on pyspark.
+
+FLIGHT_SCHEMA = {
+    "id": "int",
+    "date": "date",
+    "mission_number": "string",
+    "aircraft_number": "string",
+    "status": "string",
+    "scheduled_launch": "string",
+    "launch_time": "string",
+    "recovery_time": "string",
+    "flight_hours": "double",
+    "payload_1": "string",
+    "payload_2": "string",
+    "payload_3": "string",
+    "winds": "string",
+    "reason_for_delay": "string",
+    "reason_for_cancel": "string",
+    "tois": "int",
+    "notes": "string",
+    "created_at": "string",
+    "launcher": "string",
+    "number_of_launches": "int",
+    "contraband_lbs": "double",
+    "detainees": "int",
+    "responsible_part": "string",
+    "deployment_id": "string",
+    "updated_by": "string",
+}
+
+EQUIPMENT_SCHEMA = {
+    "id": "int",
+    "log_date": "date",
+    "serial_number": "string",
+    "equipment_type": "string",
+    "category": "string",
+    "status": "string",
+    "location": "string",
+    "software_version": "string",
+    "comments": "string",
+    "last_updated": "date",
+    "deployment_id": "string",
+}
+
+DEPLOYMENT_SCHEMA = {
+    "deployment_id": "string",
+    "name": "string",
+    "location": "string",
+    "start_date": "date",
+    "end_date": "date",
+    "status": "string",
+    "type": "string",
+    "notes": "string",
+    "user_emails": "string",
+}
+
+SHIPPING_SCHEMA = {
+    "id": "int",
+    "tracking_number": "string",
+    "carrier": "string",
+    "order_date": "date",
+    "ship_date": "date",
+    "host_received_date": "date",
+    "site_received_date": "date",
+    "status": "string",
+    "items": "string",
+    "shipped_date": "date",
+    "created_at": "date",
+    "notes": "string",
+    "deployment_id": "string",
+}
+
+PARTS_UTILIZATION_SCHEMA = {
+    "id": "int",
+    "part_number": "string",
+    "serial_number": "string",
+    "description": "string",
+    "quantity_used": "int",
+    "aircraft_id": "string",
+    "date_used": "date",
+    "reason_for_replacement": "string",
+    "notes": "string",
+    "deployment_id": "string",
+}
+
+INVENTORY_SCHEMA = {
+    "id": "int",
+    "part_number": "string",
+    "serial_number": "string",
+    "description": "string",
+    "category": "string",
+    "quantity_on_hand": "int",
+    "min_quantity": "int",
+    "expiration_date": "date",
+    "last_counted": "date",
+    "measured_unit": "string",
+    "notes": "string",
+    "deployment_id": "string",
+}
+
+KITS_SCHEMA = {
+    "id": "int",
+    "kit_name": "string",
+    "kit_number": "string",
+    "components": "string",
+    "status": "string",
+    "location": "string",
+    "assigned_to": "string",
+    "last_inspected": "date",
+    "notes": "string",
+    "deployment_id": "string",
+}
+
+SERVICE_BULLETIN_SCHEMA = {
+    "id": "int",
+    "sb_number": "string",
+    "date_issued": "date",
+    "description": "string",
+    "link": "string",
+    "notes": "string",
+    "applicable_deployment_ids": "string",
+    "effected_equipment": "string",
+    "created_at": "string",
+    "last_updated_by": "string",
+}
+
+SHIPMENT_ITEMS_SCHEMA = {
+    "id": "int",
+    "shipment_id": "int",
+    "part_number": "string",
+    "description": "string",
+    "quantity": "int",
+    "received_date": "date",
+    "notes": "string",
+}
+
+KIT_ITEMS_SCHEMA = {
+    "id": "int",
+    "kit_id": "int",
+    "part_number": "string",
+    "description": "string",
+    "quantity": "int",
+    "actual_quantity": "int",
+    "serial_number": "string",
+    "category": "string",
+    "last_updated_by": "string",
+}
+
+PARTS_CATALOG_SCHEMA = {
+    "id": "int",
+    "part_number": "string",
+    "description": "string",
+    "category": "string",
+    "created_at": "date",
+}
+
+# Map: App Table Name -> Schema
+DATASET_SCHEMAS = {
+    "flights": FLIGHT_SCHEMA,
+    "equipment": EQUIPMENT_SCHEMA,
+    "deployments": DEPLOYMENT_SCHEMA,
+    "shipping": SHIPPING_SCHEMA,
+    "parts_utilization": PARTS_UTILIZATION_SCHEMA,
+    "inventory": INVENTORY_SCHEMA,
+    "kits": KITS_SCHEMA,
+    "service_bulletins": SERVICE_BULLETIN_SCHEMA,
+    "shipment_items": SHIPMENT_ITEMS_SCHEMA,
+    "kit_items": KIT_ITEMS_SCHEMA,
+    "parts_catalog": PARTS_CATALOG_SCHEMA,
+}
@@ -0,0 +1,120 @@
+import tempfile
+from typing import Iterator, IO
+
+import numpy as np
+import pandas as pd
+
+try:
+    from openpyxl import Workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+DEFAULT_CHUNK_ROWS = 5000
+# Exports larger than this spill from memory to a temporary file
+SPOOL_BYTES = 16 * 1024 * 1024
+
+
+def available_formats() -> list:
+    """Export formats whose writer dependency is installed."""
+    formats = ["CSV"]
+    if HAS_OPENPYXL:
+        formats.append("Excel")
+    if HAS_PYARROW:
+        formats.append("Parquet")
+    return formats
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Row slices of `df` (views, not copies) of at most `chunk_rows` rows."""
+    for start in range(0, len(df), max(1, chunk_rows)):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def excel_cell(value):
+    """Plain Python value for openpyxl (NaN/NA -> empty). Shared by the exports and the reports."""
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_csv(df: pd.DataFrame, out: IO[bytes], chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    out.write(df.head(0).to_csv(index=False).encode("utf-8"))
+    for chunk in iter_chunks(df, chunk_rows):
+        out.write(chunk.to_csv(index=False, header=False).encode("utf-8"))
+
+
+def write_xlsx(df: pd.DataFrame, out: IO[bytes], chunk_rows: int = DEFAULT_CHUNK_ROWS, sheet_name: str = "Export"):
+    """Write-only workbook: rows stream to the sheet instead of building every cell in memory."""
+    if not HAS_OPENPYXL:
+        raise RuntimeError("openpyxl is required for Excel export")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name[:31])
+    ws.append([str(c) for c in df.columns])
+    for chunk in iter_chunks(df, chunk_rows):
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append([excel_cell(v) for v in row])
+    wb.save(out)
+
+
+def write_parquet(df: pd.DataFrame, out: IO[bytes], chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """One row group per chunk, all under the schema of the whole frame."""
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    schema = _parquet_schema(df, chunk_rows)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _parquet_schema(df: pd.DataFrame, chunk_rows: int) -> "pa.Schema":
+    """Schema of the first chunk; columns empty there take the type of their first value."""
+    schema = pa.Schema.from_pandas(df.iloc[:chunk_rows], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type) and field.name in df.columns:
+            first = df[field.name].first_valid_index()
+            if first is not None:
+                value_type = pa.Schema.from_pandas(df.loc[[first], [field.name]], preserve_index=False)[0].type
+                schema = schema.set(i, field.with_type(value_type))
+    return schema
+
+
+WRITERS = {"CSV": write_csv, "Excel": write_xlsx, "Parquet": write_parquet}
+
+
+def export_file(df: pd.DataFrame, fmt: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> IO[bytes]:
+    """
+    Writes `df` in `fmt` ("CSV", "Excel" or "Parquet") chunk by chunk to a
+    spooled temporary file and returns it rewound. Small exports stay in
+    memory; large ones spill to disk instead of being held as one bytes object.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of {list(WRITERS)}.")
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    WRITERS[fmt](df, out, chunk_rows)
+    out.seek(0)
+    return out
+
+
+def export_name(stem: str, fmt: str) -> str:
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def export_mime(fmt: str) -> str:
+    return EXPORT_FORMATS[fmt][1]
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Hashable
+
+
+class FigureCache:
+    """
+    In-memory LRU cache of built chart figures.
+    Keys combine the data versions a figure was built from with the filter
+    selection, so a rerun caused by an unrelated widget reuses the figure and
+    any edit to the underlying tables produces a new key.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FigureCache":
+        """Sized by FIGURE_CACHE_SIZE (0 disables caching)."""
+        return cls(int(config.get("FIGURE_CACHE_SIZE", 64)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, figure: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Returns the cached figure for `key`, building and storing it on a miss.
+        Cached figures are shared: callers must not modify them.
+        """
+        figure = self.get(key)
+        if figure is None:
+            figure = build()
+            self.put(key, figure)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,9 +1,91 @@
-import requests
 import pandas as pd
+import atexit
 import json
 import os
-from io import StringIO
-from typing import Optional, Dict, Any
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+from dataset_cache import DatasetCache
+from dataset_io import read_response_stream
+from dataset_schemas import DATASET_SCHEMAS
+from foundry_transport import FoundryTransport
+from foundry_writeback import WritebackQueue
+
+
+class FoundryReadError(Exception):
+    """Raised when a dataset cannot be fetched from Foundry."""
+
+
+class FoundryWriteError(Exception):
+    """Raised when a writeback transaction cannot be completed."""
+
+
+# Accept headers per read format; the response Content-Type decides how it is parsed
+READ_ACCEPT_HEADERS = {
+    "arrow": "application/vnd.apache.arrow.stream, text/csv;q=0.5",
+    "parquet": "application/vnd.apache.parquet, text/csv;q=0.5",
+    "csv": "text/csv",
+}
+
+# Row key per dataset, where it is not "id"
+DATASET_KEYS = {"deployments": "deployment_id"}
+
+
+# Set on an appended row to mark its key as deleted (APPEND transactions cannot
+# remove rows). Tombstones carry the whole row, so a dataset without this
+# column reads them back as the unchanged row rather than losing data.
+DELETED_COLUMN = "_deleted"
+
+
+def dataset_key(dataset_name: str) -> str:
+    return DATASET_KEYS.get(dataset_name, "id")
+
+
+def is_deleted(flags: pd.Series) -> pd.Series:
+    """True where a DELETED_COLUMN value marks a tombstone (bool, or "true"/"1" as read from CSV)."""
+    return flags.astype(str).str.strip().str.lower().isin(["true", "1", "1.0"])
+
+
+def drop_tombstones(df: pd.DataFrame) -> pd.DataFrame:
+    """Removes tombstone rows and the DELETED_COLUMN itself."""
+    if df is None or DELETED_COLUMN not in df.columns:
+        return df
+    return df[~is_deleted(df[DELETED_COLUMN])].drop(columns=[DELETED_COLUMN]).reset_index(drop=True)
+
+
+def latest_by_key(df: pd.DataFrame, key: str = "id") -> pd.DataFrame:
+    """
+    Keeps one row per `key`: the last one read. Edits are written back as
+    APPEND transactions carrying the whole row under its existing key, and
+    a dataset reads back in transaction order, so the last row is current.
+    Keys whose last row is a tombstone are dropped.
+    """
+    if df is None or df.empty or key not in df.columns:
+        return df
+    if df[key].duplicated().any():
+        df = df.drop_duplicates(subset=[key], keep="last").reset_index(drop=True)
+    return drop_tombstones(df)
+
+
+def merge_by_key(current: pd.DataFrame, new_rows: pd.DataFrame, key: str = "id") -> pd.DataFrame:
+    """
+    Upserts `new_rows` into `current`: rows sharing a `key` are replaced,
+    the rest are appended, and tombstones remove their key. Without a key
+    column the rows are just appended.
+    """
+    if new_rows.empty:
+        return current
+    if key in new_rows.columns:
+        # Later transactions win when a row was appended more than once
+        new_rows = new_rows.drop_duplicates(subset=[key], keep="last")
+    if current is None or current.empty:
+        return drop_tombstones(new_rows.reset_index(drop=True))
+    if key in current.columns and key in new_rows.columns:
+        current = current[~current[key].isin(new_rows[key])]
+    return drop_tombstones(pd.concat([current, new_rows], ignore_index=True))
+
 
 class FoundryBackend:
     def __init__(self, config_path: str = "foundry_config.json"):
@@ -11,11 +93,32 @@ class FoundryBackend:
         self.base_url = self.config.get("FOUNDRY_URL", "").rstrip("/")
         self.token = self.config.get("FOUNDRY_TOKEN", "")
         self.datasets = self.config.get("DATASETS", {})
+        self.branch = self.config.get("FOUNDRY_BRANCH", "master")
+        
+        # Preferred read format: "auto" (binary, falling back to CSV), "arrow", "parquet" or "csv"
+        self.read_format = self.config.get("READ_FORMAT", "auto").lower()
+        self._binary_unsupported = set()  # RIDs whose endpoint rejected a binary format
+        
+        # Last transaction read per dataset RID, used by sync_dataset()
+        self.sync_state: Dict[str, str] = {}
+        
+        # Pooled, retrying HTTP session shared by every call from this backend
+        self.transport = FoundryTransport.from_config(self.config)
+        
+        # Local Parquet cache, revalidated against the latest transaction
+        # Relative paths in the config (CACHE_DIR, SQLITE_PATH) are resolved against its directory
+        self.config_dir = os.path.dirname(os.path.abspath(config_path))
+        self.cache = DatasetCache.from_config(self.config, base_dir=self.config_dir) if self.is_configured() else None
         
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        
+        # Batched writeback, created on first write
+        self._writeback: Optional[WritebackQueue] = None
+        # Called as on_commit(dataset_name, records) after each committed batch
+        self.on_commit: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None
     
     def _load_config(self, path: str) -> Dict[str, Any]:
         if not os.path.exists(path):
@@ -36,14 +139,183 @@ class FoundryBackend:
     def get_dataset_rid(self, name: str) -> Optional[str]:
         return self.datasets.get(name)
 
-    def read_dataset(self, dataset_name: str) -> pd.DataFrame:
+    def get_latest_transaction(self, rid: str) -> Optional[str]:
+        """
+        Returns the RID of the latest committed transaction on the configured branch.
+        This is a small metadata call used to revalidate cached datasets.
+        """
+        url = f"{self.base_url}/api/v1/datasets/{rid}/branches/{self.branch}"
+        try:
+            response = self.transport.get(url, headers=self.headers)
+            if response.status_code == 200:
+                return response.json().get("transactionRid")
+            print(f"Failed to fetch branch for {rid}: {response.status_code}")
+        except Exception as e:
+            print(f"Error fetching branch for {rid}: {e}")
+        return None
+
+    def read_dataset(self, dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Reads a dataset from Foundry using the Dataset API, typed according to
+        dataset_schemas. Arrow/Parquet is used when the endpoint supports it,
+        CSV otherwise. `columns` limits the download to those columns.
+        Failures are logged and returned as an empty DataFrame.
+        """
+        try:
+            return self._fetch_dataset(dataset_name, columns)
+        except FoundryReadError as e:
+            print(e)
+            return pd.DataFrame()
+
+    def fetch_dataset(self, dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Like read_dataset, but raises FoundryReadError instead of returning an empty DataFrame."""
+        return self._fetch_dataset(dataset_name, columns)
+
+    def read_datasets(
+        self,
+        dataset_names: List[str],
+        columns: Optional[Dict[str, List[str]]] = None,
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[str, int, int, Optional[str]], None]] = None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Reads several datasets concurrently on a bounded thread pool.
+        `columns` optionally maps a dataset name to the columns to fetch.
+        Returns (tables, errors). Failed datasets map to an empty DataFrame in
+        `tables` and to their error message in `errors`.
+        `on_progress(name, done, total, error)` is called from the calling
+        thread as each dataset finishes, so it is safe to update Streamlit
+        elements from it.
+        """
+        tables, errors = self._run_concurrently(
+            dataset_names,
+            lambda name: self._fetch_dataset(name, (columns or {}).get(name)),
+            max_workers,
+            on_progress,
+        )
+        for name in errors:
+            tables[name] = pd.DataFrame()
+        return tables, errors
+
+    def _run_concurrently(
+        self,
+        dataset_names: List[str],
+        fn: Callable[[str], Any],
+        max_workers: Optional[int] = None,
+        on_progress: Optional[Callable[[str, int, int, Optional[str]], None]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Runs `fn(name)` for each dataset on a bounded pool.
+        Returns ({name: result}, {name: error}) with failed names only in the latter.
+        """
+        if max_workers is None:
+            max_workers = int(self.config.get("LOAD_MAX_WORKERS", 6))
+        max_workers = max(1, min(max_workers, len(dataset_names) or 1))
+
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        total = len(dataset_names)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="foundry-load") as pool:
+            futures = {pool.submit(fn, name): name for name in dataset_names}
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                error = None
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    error = str(e)
+                    errors[name] = error
+                if on_progress:
+                    on_progress(name, done, total, error)
+
+        return results, errors
+
+    # --- Incremental Sync ---
+    def list_transactions(self, rid: str) -> Optional[List[Dict[str, Any]]]:
         """
-        Reads a dataset from Foundry using the Dataset API (export to CSV).
+        Returns the committed transactions of a dataset, oldest first,
+        or None if they cannot be listed.
+        """
+        url = f"{self.base_url}/api/v2/datasets/{rid}/transactions"
+        transactions = []
+        params = {"preview": "true", "pageSize": 500}
+        try:
+            while True:
+                response = self.transport.get(url, headers=self.headers, params=params)
+                if response.status_code != 200:
+                    print(f"Failed to list transactions for {rid}: {response.status_code}")
+                    return None
+                body = response.json()
+                transactions.extend(body.get("data", []))
+                if not body.get("nextPageToken"):
+                    break
+                params["pageToken"] = body["nextPageToken"]
+        except Exception as e:
+            print(f"Error listing transactions for {rid}: {e}")
+            return None
+
+        committed = [t for t in transactions if t.get("status", "COMMITTED") == "COMMITTED"]
+        return sorted(committed, key=lambda t: t.get("createdTime", ""))
+
+    def sync_dataset(self, dataset_name: str, current: pd.DataFrame, key: str = "id") -> Tuple[pd.DataFrame, str]:
+        """
+        Brings `current` up to date with the dataset's latest transaction.
+        Returns (table, mode) where mode is:
+          - "unchanged": nothing new since the last read
+          - "append": only APPEND transactions were committed; their rows are
+            fetched alone and merged into `current` by `key`
+          - "full": anything else (SNAPSHOT/UPDATE/DELETE, unknown history), so
+            the dataset is read again in full
         """
         rid = self.get_dataset_rid(dataset_name)
         if not rid:
-            print(f"Dataset {dataset_name} not configured.")
-            return pd.DataFrame()
+            raise FoundryReadError(f"Dataset {dataset_name} not configured.")
+
+        last_seen = self.sync_state.get(rid)
+        latest = self.get_latest_transaction(rid)
+        if last_seen and latest == last_seen:
+            return current, "unchanged"
+
+        new_transactions = None
+        if last_seen and latest:
+            history = self.list_transactions(rid) or []
+            rids = [t.get("rid") for t in history]
+            if last_seen in rids:
+                new_transactions = history[rids.index(last_seen) + 1:]
+
+        if not new_transactions or any(t.get("transactionType") != "APPEND" for t in new_transactions):
+            return self._fetch_dataset(dataset_name), "full"
+
+        new_rows = self._read_table(dataset_name, rid, params=[
+            ("startTransactionRid", new_transactions[0]["rid"]),
+            ("endTransactionRid", new_transactions[-1]["rid"]),
+        ])
+        merged = merge_by_key(current, new_rows, key)
+        self.sync_state[rid] = new_transactions[-1]["rid"]
+        if self.cache:
+            self.cache.put(rid, new_transactions[-1]["rid"], merged)
+        return merged, "append"
+
+    def sync_datasets(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        on_progress: Optional[Callable[[str, int, int, Optional[str]], None]] = None,
+    ) -> Tuple[Dict[str, Tuple[pd.DataFrame, str]], Dict[str, str]]:
+        """Runs sync_dataset() for every table concurrently."""
+        return self._run_concurrently(
+            list(tables.keys()),
+            lambda name: self.sync_dataset(name, tables[name], dataset_key(name)),
+            on_progress=on_progress,
+        )
+
+    def _fetch_dataset(self, dataset_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Fetches a single dataset, raising FoundryReadError on any failure.
+        """
+        rid = self.get_dataset_rid(dataset_name)
+        if not rid:
+            raise FoundryReadError(f"Dataset {dataset_name} not configured.")
             
         mode = self.config.get("MODE", "local").lower()
         if mode == "foundry_internal":
@@ -58,28 +330,172 @@ class FoundryBackend:
         # Assuming Data Proxy or similar convenient endpoint exists. 
         # For strict API: POST /api/v1/datasets/{rid}/read (JSON/CSV)
         
-        url = f"{self.base_url}/api/v1/datasets/{rid}/read?format=csv"
-        
+        # Projections still fetch the key and tombstone flag, so rewritten and deleted rows can be collapsed
+        key = dataset_key(dataset_name)
+        fetch_columns = columns + [c for c in (key, DELETED_COLUMN) if c not in columns] if columns else columns
+
+        # Serve from the local cache when the dataset has not changed
+        transaction_rid = self.get_latest_transaction(rid)
+        if transaction_rid and self.cache:
+            cached = self.cache.get(rid, transaction_rid, fetch_columns)
+            if cached is not None:
+                self.sync_state[rid] = transaction_rid
+                return self._project(latest_by_key(cached, key), columns)
+
+        df = latest_by_key(self._read_table(dataset_name, rid, fetch_columns), key)
+        if transaction_rid:
+            self.sync_state[rid] = transaction_rid
+
+        # Only full reads are cached; projections are served from them
+        if transaction_rid and self.cache and not columns:
+            self.cache.put(rid, transaction_rid, df)
+        return self._project(df, columns)
+
+    @staticmethod
+    def _project(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+        """Drops the key column when it was only fetched for de-duplication."""
+        if not columns:
+            return df
+        return df[[c for c in columns if c in df.columns]]
+
+    def _read_table(self, dataset_name: str, rid: str, columns: Optional[List[str]] = None,
+                    params: Optional[List[Tuple[str, str]]] = None) -> pd.DataFrame:
+        """Downloads and parses a table, negotiating the format. Raises FoundryReadError."""
+        read_format = self._negotiate_format(rid)
+        response = self._request_table(dataset_name, rid, read_format, columns, params)
+        if read_format != "csv" and response.status_code in (400, 404, 406, 415):
+            # Endpoint does not serve binary formats: remember and fall back to CSV
+            response.close()
+            self._binary_unsupported.add(rid)
+            response = self._request_table(dataset_name, rid, "csv", columns, params)
+
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 200:
-                return pd.read_csv(StringIO(response.text))
-            else:
-                print(f"Failed to fetch {dataset_name}: {response.status_code} - {response.text}")
-                return pd.DataFrame()
+            if response.status_code != 200:
+                raise FoundryReadError(f"Failed to fetch {dataset_name}: {response.status_code} - {response.text}")
+            # Parse the body as it arrives instead of buffering the full text
+            response.raw.decode_content = True
+            return read_response_stream(response.raw, response.headers.get("Content-Type"), dataset_name, columns)
+        except FoundryReadError:
+            raise
         except Exception as e:
-            print(f"Error fetching {dataset_name}: {e}")
-            return pd.DataFrame()
+            raise FoundryReadError(f"Error parsing {dataset_name}: {e}") from e
+        finally:
+            response.close()
+
+    def _negotiate_format(self, rid: str) -> str:
+        if self.read_format == "csv" or rid in self._binary_unsupported:
+            return "csv"
+        return "arrow" if self.read_format == "auto" else self.read_format
+
+    def _request_table(self, dataset_name: str, rid: str, read_format: str, columns: Optional[List[str]],
+                       extra_params: Optional[List[Tuple[str, str]]] = None):
+        url = f"{self.base_url}/api/v1/datasets/{rid}/read"
+        params = [("format", read_format)] + [("columns", c) for c in (columns or [])] + (extra_params or [])
+        headers = dict(self.headers)
+        headers["Accept"] = READ_ACCEPT_HEADERS[read_format]
+        try:
+            return self.transport.get(url, headers=headers, params=params, stream=True)
+        except Exception as e:
+            raise FoundryReadError(f"Error fetching {dataset_name}: {e}") from e
+
+    # --- Writeback ---
+    @property
+    def writeback(self) -> WritebackQueue:
+        if self._writeback is None:
+            self._writeback = WritebackQueue(
+                self._append_records,
+                batch_size=int(self.config.get("WRITEBACK_BATCH_SIZE", 50)),
+                flush_seconds=float(self.config.get("WRITEBACK_FLUSH_SECONDS", 30)),
+            )
+            # Best effort: commit whatever is still queued when the app stops
+            atexit.register(self._writeback.flush)
+        return self._writeback
 
     def write_record(self, dataset_name: str, record: Dict[str, Any]) -> bool:
         """
-        Writes a single record to Foundry. 
-        WARNING: Direct API write usually implies appending a transaction.
+        Queues a record for writeback. Records are coalesced per dataset and
+        committed as one APPEND transaction when WRITEBACK_BATCH_SIZE records
+        are queued or the oldest is WRITEBACK_FLUSH_SECONDS old.
+        Returns False if the dataset cannot be written to.
+        """
+        if not self.is_configured() or self.config.get("MODE", "local").lower() != "foundry":
+            return False
+        if not self.get_dataset_rid(dataset_name):
+            print(f"Dataset {dataset_name} not configured.")
+            return False
+        self.writeback.enqueue(dataset_name, record)
+        return True
+
+    def flush_writes(self, dataset_name: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Commits queued records now. Returns {dataset: error or None}."""
+        if self._writeback is None:
+            return {}
+        return self._writeback.flush(dataset_name)
+
+    def writeback_status(self) -> Dict[str, Dict[str, Any]]:
+        if self._writeback is None:
+            return {}
+        return self._writeback.status()
+
+    def pending_ids(self, dataset_name: str) -> set:
+        """IDs of records for `dataset_name` that are not committed yet."""
+        if self._writeback is None:
+            return set()
+        return self._writeback.pending_ids(dataset_name)
+
+    def _append_records(self, dataset_name: str, records: List[Dict[str, Any]]):
+        """
+        Commits records as a single APPEND transaction:
+        1. Create Transaction (POST /api/v1/datasets/{rid}/transactions)
+        2. Upload File (POST /api/v1/datasets/{rid}/transactions/{txId}/files/{filename})
+        3. Commit Transaction (POST /api/v1/datasets/{rid}/transactions/{txId}/commit)
+        Raises FoundryWriteError on failure.
         """
-        # This is complex in raw API. 
-        # 1. Create Transaction (POST /api/v1/datasets/{rid}/transactions)
-        # 2. Upload File (PUT /api/v1/datasets/{rid}/transactions/{txId}/files/{filename})
-        # 3. Commit Transaction (POST /api/v1/datasets/{rid}/transactions/{txId}/commit)
-        # Implementing simplified Mock for 'write' part unless user demands full Tx logic.
-        print("Writeback via raw API requires Transaction orchestration. Implement fully if needed.")
-        return False
+        rid = self.get_dataset_rid(dataset_name)
+
+        # Match the dataset's column layout (as robust_select does in the pipeline)
+        df = pd.DataFrame(records)
+        schema = DATASET_SCHEMAS.get(dataset_name)
+        if schema:
+            # Deletes add the tombstone flag as a trailing column
+            extra = [DELETED_COLUMN] if DELETED_COLUMN in df.columns else []
+            df = df.reindex(columns=list(schema.keys()) + extra)
+        data = df.to_csv(index=False).encode("utf-8")
+
+        # 1. Start Transaction
+        tx_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions"
+        tx_resp = self.transport.post(tx_url, headers=self.headers, json={"branchName": self.branch, "transactionType": "APPEND"})
+        if tx_resp.status_code != 200:
+            raise FoundryWriteError(f"Failed to start tx for {dataset_name}: {tx_resp.status_code} - {tx_resp.text}")
+        tx_id = tx_resp.json().get("rid")
+
+        # 2. Upload File
+        filename = f"writeback_{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}.csv"
+        upload_headers = self.headers.copy()
+        upload_headers["Content-Type"] = "application/octet-stream"
+        put_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions/{tx_id}/files/{filename}"
+        put_resp = self.transport.post(put_url, headers=upload_headers, data=data)
+        if put_resp.status_code != 200:
+            self._abort_transaction(rid, tx_id)
+            raise FoundryWriteError(f"Failed to upload {filename} for {dataset_name}: {put_resp.status_code} - {put_resp.text}")
+
+        # 3. Commit
+        commit_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions/{tx_id}/commit"
+        commit_resp = self.transport.post(commit_url, headers=self.headers)
+        if commit_resp.status_code != 200:
+            self._abort_transaction(rid, tx_id)
+            raise FoundryWriteError(f"Failed to commit tx for {dataset_name}: {commit_resp.status_code} - {commit_resp.text}")
+
+        if self.on_commit:
+            # The transaction is committed; a failing callback must not re-queue it
+            try:
+                self.on_commit(dataset_name, records)
+            except Exception as e:
+                print(f"Post-commit hook failed for {dataset_name}: {e}")
+
+    def _abort_transaction(self, rid: str, tx_id: str):
+        abort_url = f"{self.base_url}/api/v1/datasets/{rid}/transactions/{tx_id}/abort"
+        try:
+            self.transport.post(abort_url, headers=self.headers, retries=0)
+        except Exception as e:
+            print(f"Error aborting tx {tx_id} for {rid}: {e}")
@@ -0,0 +1,163 @@
+import random
+import re
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+
+class FoundryTransport:
+    """
+    Shared HTTP transport for Foundry API calls.
+    Wraps one pooled keep-alive `requests.Session` with connect/read timeouts,
+    jittered exponential retry on 429/5xx and per-endpoint latency counters.
+    Non-idempotent requests (POST: creating datasets, opening, uploading to
+    and committing transactions) are only retried when the server cannot
+    have acted on them.
+    Used by both the Streamlit backend and the sample uploader.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Rejected before being processed, so safe to send again whatever the method
+    UNPROCESSED_STATUSES = {429, 503}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_size: int = 10,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        # Retries are handled in request() so they can be jittered and counted
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FoundryTransport":
+        """Builds a transport from the HTTP_* keys of foundry_config.json."""
+        return cls(
+            connect_timeout=float(config.get("HTTP_CONNECT_TIMEOUT", 5.0)),
+            read_timeout=float(config.get("HTTP_READ_TIMEOUT", 60.0)),
+            max_retries=int(config.get("HTTP_MAX_RETRIES", 4)),
+            backoff_base=float(config.get("HTTP_BACKOFF_BASE", 0.5)),
+            backoff_max=float(config.get("HTTP_BACKOFF_MAX", 30.0)),
+            pool_size=int(config.get("HTTP_POOL_SIZE", 10)),
+        )
+
+    # --- Requests ---
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request, retrying connection errors, timeouts and 429/5xx responses.
+        Non-idempotent methods are retried only if the connection was never
+        made or the server answered 429/503; a read timeout or a 500/502/504
+        may come after the server applied the request, and replaying it would
+        apply it twice.
+        The last response is returned once retries are exhausted; the last
+        connection error is re-raised.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.max_retries if retries is None else retries
+        endpoint = self._endpoint_key(method, url)
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        retry_statuses = self.RETRY_STATUSES if idempotent else self.UNPROCESSED_STATUSES
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, time.perf_counter() - start, error=True)
+                if attempt >= retries or not (idempotent or self._not_sent(e)):
+                    raise
+                print(f"{endpoint} failed ({e.__class__.__name__}), retrying...")
+                self._sleep(attempt)
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            if response.status_code in retry_statuses and attempt < retries:
+                self._record(endpoint, elapsed, error=True)
+                print(f"{endpoint} returned {response.status_code}, retrying...")
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+                self._sleep(attempt, retry_after)
+                attempt += 1
+                continue
+
+            self._record(endpoint, elapsed, error=response.status_code >= 400)
+            return response
+
+    @staticmethod
+    def _not_sent(error: Exception) -> bool:
+        """True if the request failed while connecting, before any of it reached the server."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+
+    def _sleep(self, attempt: int, retry_after: Optional[str] = None):
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    # --- Latency Counters ---
+    @staticmethod
+    def _endpoint_key(method: str, url: str) -> str:
+        # Collapse RIDs and query strings so counters group by endpoint
+        path = re.sub(r"^https?://[^/]+", "", url).split("?")[0]
+        path = re.sub(r"ri\.[\w.\-]+", "{rid}", path)
+        return f"{method} {path}"
+
+    def _record(self, endpoint: str, elapsed: float, error: bool = False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], elapsed)
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns a copy of the per-endpoint counters with the mean latency added."""
+        with self._stats_lock:
+            summary = {}
+            for endpoint, stats in self._stats.items():
+                row = dict(stats)
+                row["avg_s"] = stats["total_s"] / stats["count"] if stats["count"] else 0.0
+                summary[endpoint] = row
+            return summary
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+
+class WritebackQueue:
+    """
+    Coalesces record writes into per-dataset batches.
+    A dataset's batch is handed to `commit_fn(dataset_name, records)` once it
+    holds `batch_size` records or its oldest record is `flush_seconds` old,
+    so many edits become one APPEND transaction instead of one each.
+    Batches whose commit fails are put back at the front of the queue and
+    retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        commit_fn: Callable[[str, List[Dict[str, Any]]], None],
+        batch_size: int = 50,
+        flush_seconds: float = 30.0,
+    ):
+        self.commit_fn = commit_fn
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        # Batches handed to commit_fn that have not returned yet
+        self._inflight: Dict[str, List[Dict[str, Any]]] = {}
+        self._oldest: Dict[str, float] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+
+        self._worker = threading.Thread(target=self._run, name="foundry-writeback", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, dataset_name: str, record: Dict[str, Any]):
+        with self._lock:
+            queue = self._pending.setdefault(dataset_name, [])
+            if not queue:
+                self._oldest[dataset_name] = time.time()
+            queue.append(dict(record))
+            if len(queue) >= self.batch_size:
+                self._wake.set()
+
+    def flush(self, dataset_name: Optional[str] = None, force: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Commits pending batches (all datasets, or just `dataset_name`).
+        With force=False only batches over the size/age threshold are committed.
+        Returns {dataset: error or None} for each batch attempted.
+        """
+        results: Dict[str, Optional[str]] = {}
+        with self._flush_lock:
+            for name in self._due(dataset_name, force):
+                with self._lock:
+                    batch = self._pending.pop(name, [])
+                    oldest = self._oldest.pop(name, None)
+                    if batch:
+                        self._inflight[name] = batch
+                if not batch:
+                    continue
+                try:
+                    self.commit_fn(name, batch)
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                    with self._lock:
+                        # Keep order: failed batch goes ahead of newer edits
+                        self._pending[name] = batch + self._pending.get(name, [])
+                        self._oldest[name] = oldest or time.time()
+                with self._lock:
+                    self._inflight.pop(name, None)
+                    status = self._status.setdefault(name, {"committed": 0, "last_commit": None, "last_error": None})
+                    if error:
+                        status["last_error"] = error
+                    else:
+                        status["committed"] += len(batch)
+                        status["last_commit"] = time.time()
+                        status["last_error"] = None
+                results[name] = error
+        return results
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per dataset: pending count, committed count, last commit time and last error."""
+        with self._lock:
+            names = set(self._pending) | set(self._status)
+            summary = {}
+            for name in names:
+                row = dict(self._status.get(name, {"committed": 0, "last_commit": None, "last_error": None}))
+                row["pending"] = len(self._pending.get(name, []))
+                summary[name] = row
+            return summary
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._pending.values())
+
+    def pending_ids(self, dataset_name: str, key: str = "id") -> set:
+        """Keys of records queued or being committed for `dataset_name`."""
+        with self._lock:
+            records = self._pending.get(dataset_name, []) + self._inflight.get(dataset_name, [])
+            return {r.get(key) for r in records}
+
+    def _due(self, dataset_name: Optional[str], force: bool) -> List[str]:
+        now = time.time()
+        with self._lock:
+            names = [dataset_name] if dataset_name else list(self._pending)
+            if force:
+                return [n for n in names if self._pending.get(n)]
+            return [
+                n for n in names
+                if self._pending.get(n) and (
+                    len(self._pending[n]) >= self.batch_size
+                    or now - self._oldest.get(n, now) >= self.flush_seconds
+                )
+            ]
+
+    def _run(self):
+        # Wake on a full batch, otherwise poll often enough to honour flush_seconds
+        interval = max(0.5, min(5.0, self.flush_seconds / 4))
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush(force=False)
+            except Exception as e:
+                print(f"Writeback flush failed: {e}")
@@ -0,0 +1,129 @@
+from typing import Optional
+
+import pandas as pd
+
+# Supported buckets -> pandas frequency of the bucket start dates
+FREQUENCIES = {"day": "D", "week": "W-MON", "month": "MS"}
+
+FREQUENCY_LABELS = {"day": "Daily", "week": "Weekly", "month": "Monthly"}
+
+# Most buckets a chart should plot before switching to a coarser frequency
+DEFAULT_POINT_BUDGET = 120
+
+COUNT_COLUMNS = ["flights", "complete", "delayed", "cnx_shield", "flight_hours"]
+
+
+def period_start(dates: pd.Series, freq: str = "day") -> pd.Series:
+    """Maps each date to the first day of its bucket (weeks start on Monday), as datetime.date."""
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency '{freq}'. Use one of {list(FREQUENCIES)}.")
+    ts = pd.to_datetime(dates, errors='coerce')
+    if freq == "week":
+        ts = ts - pd.to_timedelta(ts.dt.weekday, unit='D')
+    elif freq == "month":
+        ts = ts.dt.to_period('M').dt.start_time
+    return ts.dt.date
+
+
+def bucket_count(start, end, freq: str) -> int:
+    """Number of `freq` buckets covering start..end (inclusive)."""
+    first = period_start(pd.Series([start]), freq).iloc[0]
+    return len(pd.date_range(first, end, freq=FREQUENCIES[freq]))
+
+
+def choose_frequency(start, end, max_points: int = DEFAULT_POINT_BUDGET) -> str:
+    """Finest of day/week/month whose bucket count over start..end fits in `max_points`."""
+    if start is None or end is None or pd.isna(start) or pd.isna(end):
+        return "day"
+    for freq in FREQUENCIES:
+        if bucket_count(start, end, freq) <= max_points:
+            return freq
+    return "month"
+
+
+def add_rates(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds MRR and OFTR from summed counts (NaN where the denominator is 0):
+    MRR  = (complete + delayed) / (complete + delayed + CNX with responsible_part 'Shield AI')
+    OFTR = complete / (complete + delayed)
+    """
+    flown = counts['complete'] + counts['delayed']
+    denom_mrr = flown + counts['cnx_shield']
+    counts['MRR'] = (flown / denom_mrr).where(denom_mrr > 0)
+    counts['OFTR'] = (counts['complete'] / flown).where(flown > 0)
+    return counts
+
+
+def flight_flags(flights: pd.DataFrame) -> pd.DataFrame:
+    """Per-flight 0/1 counts and hours (COUNT_COLUMNS); summing them gives the rate inputs."""
+    status = flights['status']
+    return pd.DataFrame({
+        'flights': 1,
+        'complete': status.eq('COMPLETE').astype(int),
+        'delayed': status.eq('DELAY').astype(int),
+        'cnx_shield': (status.eq('CNX') & flights['responsible_part'].eq('Shield AI')).astype(int),
+        'flight_hours': pd.to_numeric(flights['flight_hours'], errors='coerce'),
+    }, index=flights.index)
+
+
+def flight_metrics(flights: pd.DataFrame, freq: str = "day", by: Optional[str] = None,
+                   window: Optional[int] = None) -> pd.DataFrame:
+    """
+    MRR, OFTR and flight hours per `freq` bucket ("day", "week" or "month"),
+    optionally per value of `by` (e.g. "deployment_id"), in one grouped pass.
+
+    With `window`, counts are summed over the trailing `window` buckets
+    (calendar buckets, so gaps count as empty) before the rates are taken.
+
+    Returns one row per bucket with data: date, [by], flights, complete,
+    delayed, cnx_shield, flight_hours, MRR, OFTR; sorted by date.
+    """
+    flags = flight_flags(flights)
+    flags['date'] = flights['date']
+    if by:
+        flags[by] = flights[by]
+    return metrics_from_counts(flags, freq, by, window)
+
+
+def metrics_from_counts(counts: pd.DataFrame, freq: str = "day", by: Optional[str] = None,
+                        window: Optional[int] = None) -> pd.DataFrame:
+    """
+    Same as flight_metrics, from rows that already hold COUNT_COLUMNS
+    (per-flight flags or pre-aggregated rows such as the daily rollup).
+    """
+    keys = ['date'] + ([by] if by else [])
+    if counts.empty:
+        return pd.DataFrame(columns=keys + COUNT_COLUMNS + ['MRR', 'OFTR'])
+
+    buckets = counts[keys].copy()
+    buckets['date'] = period_start(counts['date'], freq)
+    summed = counts[COUNT_COLUMNS].groupby([buckets[k] for k in keys], sort=True).sum().reset_index()
+    if window and window > 1:
+        summed = _rolling(summed, freq, by, window)
+    return add_rates(summed)
+
+
+def _rolling(counts: pd.DataFrame, freq: str, by: Optional[str], window: int) -> pd.DataFrame:
+    """Trailing sums over `window` calendar buckets, kept for the buckets that had data."""
+    # 1. Wide frame: one row per calendar bucket (gaps filled with 0), one column block per group
+    dates = pd.to_datetime(counts['date'])
+    full = pd.date_range(dates.min(), dates.max(), freq=FREQUENCIES[freq])
+    index = [dates] + ([counts[by]] if by else [])
+    wide = counts[COUNT_COLUMNS].set_axis(pd.MultiIndex.from_arrays(index) if by else dates)
+    if by:
+        wide = wide.unstack(by)
+    wide = wide.reindex(full, fill_value=0).fillna(0)
+
+    # 2. Rolling sum down the calendar, then read back the original (date, group) cells
+    rolled = wide.rolling(window, min_periods=1).sum()
+    rows = full.get_indexer(dates)
+    out = counts[['date'] + ([by] if by else [])].copy()
+    for col in COUNT_COLUMNS:
+        block = rolled[col]
+        if by:
+            out[col] = block.to_numpy()[rows, block.columns.get_indexer(counts[by])]
+        else:
+            out[col] = block.to_numpy()[rows]
+        if col != 'flight_hours':
+            out[col] = out[col].astype(int)
+    return out
@@ -0,0 +1,159 @@
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import pandas as pd
+
+SEQUENCE_TABLE = "flights"
+ALERT_STATUS = "ALERT - NO LAUNCH"
+# M-YYYYMMDD-<segment>-SEQ
+MISSION_PATTERN = r"^M-(\d{8})-([^-]+)-(\d+)$"
+
+
+def mission_segment(aircraft_number: Optional[str], status: Optional[str]) -> str:
+    """Middle part of a mission number: ALERT, or the aircraft suffix (VBAT-001 -> 001)."""
+    if status == ALERT_STATUS:
+        return "ALERT"
+    if isinstance(aircraft_number, str) and "-" in aircraft_number:
+        return aircraft_number.split("-")[-1]
+    return "XXX"
+
+
+def format_mission_number(day: date, segment: str, seq: int) -> str:
+    return f"M-{day:%Y%m%d}-{segment}-{seq:02d}"
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or (not isinstance(value, (date, datetime)) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return pd.to_datetime(value).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse(mission_number) -> Optional[Tuple[date, str, int]]:
+    if not isinstance(mission_number, str):
+        return None
+    parts = mission_number.split("-")
+    if len(parts) != 4 or parts[0] != "M" or len(parts[1]) != 8 or not parts[3].isdigit():
+        return None
+    try:
+        return datetime.strptime(parts[1], "%Y%m%d").date(), parts[2], int(parts[3])
+    except ValueError:
+        return None
+
+
+class MissionSequence:
+    """
+    Last mission sequence number used per (date, segment), so the next
+    mission number is a dict lookup instead of a scan of the flights table.
+
+    Counters only move forward: deleting a flight, or moving it to another
+    date or aircraft, never frees its number. A flight moved into a
+    (date, segment) takes up a number there too, since its mission number
+    still names where it came from.
+
+    With a `base`, counters are read as the higher of this sequence's and
+    the base's, and writes stay here (a session's own flights on top of the
+    shared ones).
+    """
+
+    def __init__(self, base: Optional["MissionSequence"] = None):
+        self.base = base
+        self._last: Dict[Tuple[date, str], int] = {}
+        # Keys changed since the owner last persisted them
+        self.dirty: set = set()
+
+    @classmethod
+    def from_table(cls, df: Optional[pd.DataFrame]) -> "MissionSequence":
+        sequence = cls()
+        sequence.observe_table(df)
+        return sequence
+
+    @classmethod
+    def from_counters(cls, rows: List[tuple]) -> "MissionSequence":
+        """Rebuilds from persisted (date, segment, last) rows."""
+        sequence = cls()
+        for day, segment, last in rows:
+            sequence._last[(day, segment)] = int(last)
+        return sequence
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def counters(self, keys=None) -> List[tuple]:
+        """(date, segment, last) rows, for all keys or just `keys`."""
+        keys = self._last.keys() if keys is None else keys
+        return [(day, segment, self._last[(day, segment)]) for day, segment in keys if (day, segment) in self._last]
+
+    # --- Reads ---
+    def last(self, day: date, segment: str) -> int:
+        own = self._last.get((day, segment), 0)
+        return max(own, self.base.last(day, segment)) if self.base is not None else own
+
+    def next(self, day: date, segment: str) -> int:
+        """Sequence number the next flight on (day, segment) gets. O(1); does not reserve it."""
+        return self.last(day, segment) + 1
+
+    # --- Writes ---
+    def _bump(self, key: Tuple[date, str], value: int):
+        if value > self.last(*key):
+            self._last[key] = value
+            self.dirty.add(key)
+
+    def observe_table(self, df: Optional[pd.DataFrame]):
+        """
+        Raises every counter to cover a full flights table: the highest
+        sequence in its mission numbers, or the number of flights on that
+        (date, segment) if that is higher.
+        """
+        if df is None or df.empty or 'date' not in df.columns:
+            return
+        # 1. Flights per (date, segment)
+        days = pd.to_datetime(df['date'], errors='coerce').dt.date
+        aircraft = df['aircraft_number'] if 'aircraft_number' in df.columns else pd.Series(None, index=df.index)
+        tails = aircraft.astype(object).where(aircraft.astype(str).str.contains("-", regex=False))
+        segments = tails.str.rsplit("-", n=1).str[-1].fillna("XXX")
+        if 'status' in df.columns:
+            segments = segments.where(df['status'].ne(ALERT_STATUS), "ALERT")
+        counts = pd.Series(1, index=df.index).groupby([days, segments]).sum()
+        for key, value in counts.items():
+            self._bump(key, int(value))
+
+        # 2. Highest number already issued per (date, segment)
+        if 'mission_number' in df.columns:
+            parsed = df['mission_number'].astype(str).str.extract(MISSION_PATTERN).dropna()
+            if not parsed.empty:
+                issued = pd.to_datetime(parsed[0], format="%Y%m%d", errors='coerce').dt.date
+                highest = parsed[2].astype(int).groupby([issued, parsed[1]]).max()
+                for key, value in highest.items():
+                    if key[0] is not None and not pd.isna(key[0]):
+                        self._bump(key, int(value))
+
+    def observe(self, rows: List[Dict[str, Any]], previous: Optional[Dict[Any, Dict[str, Any]]] = None):
+        """
+        Accounts for inserted or edited flights. `previous` maps id -> the row
+        before the edit; a flight that stays on its (date, segment) changes nothing.
+        """
+        previous = previous or {}
+        for row in rows:
+            day = _to_date(row.get('date'))
+            if day is None:
+                continue
+            key = (day, mission_segment(row.get('aircraft_number'), row.get('status')))
+            parsed = _parse(row.get('mission_number'))
+            if parsed is not None and (parsed[0], parsed[1]) == key:
+                # Numbered for where it is: the counter covers its number
+                self._bump(key, parsed[2])
+                continue
+            old = previous.get(row.get('id'))
+            if old is not None:
+                old_day = _to_date(old.get('date'))
+                if (old_day, mission_segment(old.get('aircraft_number'), old.get('status'))) == key:
+                    continue
+            # Moved in (or unnumbered): it takes the next number here
+            self._bump(key, self.last(*key) + 1)
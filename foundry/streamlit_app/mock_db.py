@@ -1,52 +1,448 @@
+import itertools
 from datetime import date
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from shared_store import SharedStore
+from foundry_backend import DELETED_COLUMN
+from table_index import TableIndex
+from change_journal import ChangeJournal
+from concurrency import UpdateResult, resolve_update
+from rollup import DailyRollup, ROLLUP_TABLE
+from readiness import StatusHistory, HISTORY_TABLE
+from mission_sequence import MissionSequence, SEQUENCE_TABLE
+
+
+# Distinguishes sessions in version tokens (id() values can be reused)
+_session_ids = itertools.count(1)
+
+
+class TableOverlay:
+    """A session's uncommitted edits to one table."""
+
+    # Buffered inserts are turned into a DataFrame chunk at this many rows
+    COMPACT_THRESHOLD = 1000
 
-class MockDB:
     def __init__(self):
-        # Initialize session state for DB if not exists
-        import streamlit as st
-        import pandas as pd
-        if 'db_state' not in st.session_state:
-            st.session_state['db_state'] = {
-                'flights': pd.DataFrame(), # Will be populated by initial load
-                'equipment': pd.DataFrame(),
-                'inventory': pd.DataFrame(),
-                'kits': pd.DataFrame(),
-                'service_bulletins': pd.DataFrame(),
-                'parts_utilization': pd.DataFrame(),
-                'deployments': pd.DataFrame(),
-                'shipping': pd.DataFrame(),
-                'shipment_items': pd.DataFrame(),
-                'kit_items': pd.DataFrame()
-            }
-            
+        self.updates: Dict[Any, Dict[str, Any]] = {}  # id -> {column: value}
+        self.deleted: set = set()
+        self.replaced: Optional[pd.DataFrame] = None  # whole-table replacement
+        self.replaced_index: Optional[TableIndex] = None
+        # Inserts: compacted DataFrame chunks plus a columnar append buffer,
+        # so adding a row never copies the table
+        self.chunks: List[pd.DataFrame] = []
+        self.buffer: Dict[str, List[Any]] = {}
+        self.buffered = 0
+        self.insert_pos: Dict[Any, int] = {}  # id -> position among inserted rows
+        self.stamps: Dict[Any, int] = {}  # id -> version stamp of this session's last edit
+        self.floor = 0  # version stamp of the last replace_table
+        self.version = 0
+
+    def is_empty(self) -> bool:
+        return not (self.updates or self.deleted or self.chunks or self.buffered) and self.replaced is None
+
+    def inserted_count(self) -> int:
+        return sum(len(c) for c in self.chunks) + self.buffered
+
+    def append(self, record: Dict[str, Any]):
+        self.insert_pos.setdefault(record.get('id'), self.inserted_count())
+        for col in record:
+            if col not in self.buffer:
+                self.buffer[col] = [None] * self.buffered
+        for col, values in self.buffer.items():
+            values.append(record.get(col))
+        self.buffered += 1
+        if self.buffered >= self.COMPACT_THRESHOLD:
+            self.compact()
+
+    def compact(self):
+        """Moves the append buffer into a DataFrame chunk."""
+        if self.buffered:
+            self.chunks.append(pd.DataFrame(self.buffer))
+            self.buffer = {}
+            self.buffered = 0
+
+    def inserted(self) -> Optional[pd.DataFrame]:
+        """All inserted rows as one DataFrame (None if there are none)."""
+        self.compact()
+        if not self.chunks:
+            return None
+        if len(self.chunks) > 1:
+            self.chunks = [pd.concat(self.chunks, ignore_index=True)]
+        return self.chunks[0]
+
+
+class MockDB:
+    """
+    Per-session view of the data.
+    Reads come from the process-wide SharedStore, merged with this session's
+    overlay of edits that have not been committed yet, so each session only
+    holds its own changes instead of a full copy of every table.
+    """
+
+    def __init__(self, store: Optional[SharedStore] = None):
+        self.store = store if store is not None else SharedStore()
+        self._overlays: Dict[str, TableOverlay] = {}
+        self._merged: Dict[str, tuple] = {}  # table -> ((store version, overlay version), df)
+        self._rollup: Optional[tuple] = None  # ((store version, overlay version), DailyRollup)
+        self._history: Optional[tuple] = None  # ((store version, overlay version), StatusHistory)
+        self._sequence: Optional[MissionSequence] = None  # this session's flights over the shared counters
+        self.session_id = next(_session_ids)
+
+        # Optional writeback target (e.g. FoundryBackend) for saved edits
+        self.writer = None
+        # IDs handed to the writer per table, pruned from the overlay once committed
+        self._queued: Dict[str, set] = {}
+
+        # Cell-level history of this session's edits, exportable as a delta
+        self.journal = ChangeJournal()
+        self.user: Optional[str] = None
+
     def get_table(self, table_name: str):
-        import streamlit as st
-        return st.session_state['db_state'].get(table_name)
-        
+        """Returns the merged table. Treat it as read-only: it may be the shared frame."""
+        self._prune_committed(table_name)
+        base = self.store.get(table_name)
+        overlay = self._overlays.get(table_name)
+        if overlay is None or overlay.is_empty():
+            return base
+
+        key = (self.store.version(table_name), overlay.version)
+        cached = self._merged.get(table_name)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        df = self._apply_overlay(base, overlay)
+        self._merged[table_name] = (key, df)
+        return df
+
+    def version(self, table_name: str):
+        """
+        Cheap change token for a table as this session sees it, for cache keys.
+        The shared version while this session has no edits of its own, so
+        sessions viewing the same data share cache entries.
+        """
+        overlay = self._overlays.get(table_name)
+        if overlay is None or overlay.is_empty():
+            return self.store.version(table_name)
+        return (self.store.version(table_name), self.session_id, overlay.version)
+
+    def daily_rollup(self) -> DailyRollup:
+        """
+        Daily flights rollup as this session sees it: the shared rollup with
+        only the rows this session has added, edited or deleted re-applied.
+        """
+        self._prune_committed(ROLLUP_TABLE)
+        shared = self.store.rollup(ROLLUP_TABLE)
+        overlay = self._overlays.get(ROLLUP_TABLE)
+        if overlay is None or overlay.is_empty():
+            return shared
+
+        key = (self.store.version(ROLLUP_TABLE), overlay.version)
+        if self._rollup and self._rollup[0] == key:
+            return self._rollup[1]
+
+        if overlay.replaced is not None:
+            rollup = DailyRollup(self.get_table(ROLLUP_TABLE))
+        else:
+            # 1. The shared rows this session touched, as stored
+            base = self.store.get(ROLLUP_TABLE)
+            index = self.store.index(ROLLUP_TABLE)
+            touched = set(overlay.updates) | overlay.deleted
+            positions = sorted(p for p in (index.lookup(i) for i in touched) if p is not None)
+            old_rows = base.iloc[positions]
+            # 2. The same rows plus this session's inserts, with its edits applied
+            new_rows = self._apply_overlay(old_rows, overlay)
+            rollup = shared.applied(old_rows, new_rows)
+        self._rollup = (key, rollup)
+        return rollup
+
+    def status_history(self) -> StatusHistory:
+        """
+        Equipment status intervals as this session sees them: the shared
+        history plus the transitions in this session's own pending edits.
+        """
+        self._prune_committed(HISTORY_TABLE)
+        shared = self.store.status_history(HISTORY_TABLE)
+        overlay = self._overlays.get(HISTORY_TABLE)
+        if overlay is None or overlay.is_empty():
+            return shared
+
+        key = (self.store.version(HISTORY_TABLE), overlay.version)
+        if self._history and self._history[0] == key:
+            return self._history[1]
+        history = shared.synced(self.get_table(HISTORY_TABLE), close_missing=True)
+        self._history = (key, history)
+        return history
+
+    def mission_sequence(self) -> MissionSequence:
+        """
+        Mission number counters as this session sees them: the shared
+        counters raised by the flights this session has added or moved.
+        """
+        if self._sequence is None:
+            self._sequence = MissionSequence(base=self.store.mission_sequence(SEQUENCE_TABLE))
+        return self._sequence
+
+    def get_by_id(self, table_name: str, record_id) -> Optional[Dict[str, Any]]:
+        """Current values of one row as a dict, via the id hash index (None if absent)."""
+        overlay = self._overlays.get(table_name)
+        if overlay is not None and record_id in overlay.deleted:
+            return None
+        row = None
+        index = self._base_index(table_name)
+        pos = index.lookup(record_id) if index is not None else None
+        if pos is not None:
+            row = self._base(table_name).iloc[pos].to_dict()
+        elif overlay is not None and record_id in overlay.insert_pos:
+            row = overlay.inserted().iloc[overlay.insert_pos[record_id]].to_dict()
+        if row is not None and overlay is not None:
+            row.update(overlay.updates.get(record_id, {}))
+        return row
+
+    def get_partition(self, table_name: str, column: str, values=None, between: Optional[tuple] = None):
+        """
+        Rows where `column` is one of `values` (a value or list), or within
+        `between` = (start, end) inclusive. Uses the partition index when the
+        column has one (deployment_id; date for flights). Treat as read-only.
+        """
+        self._prune_committed(table_name)
+        base = self._base(table_name)
+        if base is None:
+            return None
+        if values is not None and not isinstance(values, (list, tuple, set)):
+            values = [values]
+
+        index = self._base_index(table_name)
+        if index.has_partition(column):
+            if between is not None:
+                positions = index.partition_between(column, *between)
+            else:
+                positions = index.partition(column, list(values or []))
+        elif column in base.columns:
+            positions = np.flatnonzero(self._matches(base, column, values, between))
+        else:
+            positions = np.array([], dtype=np.intp)
+
+        overlay = self._overlays.get(table_name)
+        if overlay is None or overlay.is_empty():
+            return base.iloc[positions]
+
+        # Pending updates may move rows into (or out of) the partition
+        moved = [index.lookup(i) for i in overlay.updates]
+        positions = np.union1d(positions, [p for p in moved if p is not None]).astype(np.intp)
+        part = self._apply_updates(base.iloc[positions].copy(), overlay.updates)
+        inserted = overlay.inserted()
+        if inserted is not None:
+            inserted = inserted.set_axis(pd.RangeIndex(len(base), len(base) + len(inserted)))
+            part = pd.concat([part, self._apply_updates(inserted.copy(), overlay.updates)])
+        part = part[self._matches(part, column, values, between)]
+        if overlay.deleted and 'id' in part.columns:
+            part = part[~part['id'].isin(overlay.deleted)]
+        return part
+
     def add_record(self, table_name: str, record: Dict[str, Any]):
-        import streamlit as st
-        import pandas as pd
-        
-        df = st.session_state['db_state'].get(table_name)
-        if df is not None:
-            # Add simple ID if not present
-            if 'id' not in record:
-                record['id'] = len(df) + 1000 # Offset to distinguish from initial mock
-                
-            new_row = pd.DataFrame([record])
-            st.session_state['db_state'][table_name] = pd.concat([df, new_row], ignore_index=True)
-            return True
-        return False
-        
+        return self.add_records(table_name, [record]) == 1
+
+    def add_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        """
+        Appends rows in bulk. Rows go to the overlay's columnar buffer, so each
+        append is O(1) and the table is only rebuilt on the next read.
+        Returns the number of rows added (0 if the table does not exist).
+        """
+        base = self._base(table_name)
+        if base is None:
+            return 0
+        overlay = self._overlay(table_name)
+        if overlay.replaced is not None:
+            self.store.claim_id(table_name, self._base_index(table_name).max_id)
+        for record in records:
+            # Monotonic IDs: never reuse one, even after deletes
+            if 'id' not in record or pd.isna(record['id']):
+                record['id'] = self.store.next_id(table_name)
+            else:
+                self.store.claim_id(table_name, record['id'])
+            overlay.append(record)
+            overlay.deleted.discard(record['id'])
+            overlay.stamps[record['id']] = self.store.tick()
+            self.journal.record_insert(table_name, record, user=record.get('updated_by', self.user))
+            self._write_back(table_name, record)
+        if table_name == SEQUENCE_TABLE:
+            self.mission_sequence().observe(records)
+        return len(records)
+
     def update_record(self, table_name: str, record_id: int, updates: Dict[str, Any]):
-        import streamlit as st
-        df = st.session_state['db_state'].get(table_name)
-        if df is not None and 'id' in df.columns:
-            # Find index
-            idx = df[df['id'] == record_id].index
-            if len(idx) > 0:
-                for col, val in updates.items():
-                    st.session_state['db_state'][table_name].at[idx[0], col] = val
-                return True
-        return False
+        row = self.get_by_id(table_name, record_id)
+        if row is None:
+            return False
+        overlay = self._overlay(table_name)
+        overlay.updates.setdefault(record_id, {}).update(updates)
+        overlay.stamps[record_id] = self.store.tick()
+        self.journal.record_update(table_name, record_id, row, updates, user=updates.get('updated_by', self.user))
+        if table_name == SEQUENCE_TABLE:
+            self.mission_sequence().observe([{**row, **updates}], {record_id: row})
+        row.update(updates)
+        self._write_back(table_name, row)
+        return True
+
+    def version_clock(self) -> int:
+        """Current value of the row version clock; rows written later have a higher version."""
+        return self.store.clock
+
+    def row_version(self, table_name: str, record_id) -> int:
+        """Version stamp of a row as this session sees it; changes on every write to it."""
+        overlay = self._overlays.get(table_name)
+        own = max(overlay.stamps.get(record_id, 0), overlay.floor) if overlay is not None else 0
+        return max(self.store.row_version(table_name, record_id), own)
+
+    def row_versions(self, table_name: str, record_ids) -> Dict[Any, int]:
+        return {record_id: self.row_version(table_name, record_id) for record_id in record_ids}
+
+    def update_checked(self, table_name: str, record_id, updates: Dict[str, Any],
+                       seen_version: Optional[int] = None,
+                       base_row: Optional[Dict[str, Any]] = None) -> UpdateResult:
+        """
+        Optimistic update: writes only the changed cells if the row has not been
+        written since `seen_version` (a `version_clock()` taken before reading it);
+        otherwise merges the cells nobody else changed since `base_row` was read
+        and reports the rest as conflicts.
+        """
+        current = self.get_by_id(table_name, record_id)
+        if current is None:
+            return UpdateResult(record_id, "missing")
+        to_apply, conflicts, status = resolve_update(
+            current, updates, self.row_version(table_name, record_id), seen_version, base_row
+        )
+        if to_apply:
+            self.update_record(table_name, record_id, to_apply)
+        return UpdateResult(record_id, status, to_apply, conflicts, self.row_version(table_name, record_id))
+
+    def delete_record(self, table_name: str, record_id: int):
+        """
+        Hides a row for this session. With a writer, the delete is written back
+        as a tombstone: the row appended again with DELETED_COLUMN set, which
+        every read drops along with the row's earlier versions.
+        """
+        row = self.get_by_id(table_name, record_id) if self.writer is not None else None
+        overlay = self._overlay(table_name)
+        overlay.updates.pop(record_id, None)
+        overlay.deleted.add(record_id)
+        overlay.stamps[record_id] = self.store.tick()
+        self.journal.record_delete(table_name, record_id, user=self.user)
+        if row is not None:
+            self._write_back(table_name, {**row, DELETED_COLUMN: True})
+
+    def replace_table(self, table_name: str, df: pd.DataFrame):
+        """Replaces a whole table for this session (small reference tables only)."""
+        overlay = self._overlay(table_name)
+        overlay.replaced = df
+        overlay.replaced_index = None
+        overlay.updates.clear()
+        overlay.deleted.clear()
+        overlay.chunks.clear()
+        overlay.buffer.clear()
+        overlay.buffered = 0
+        overlay.insert_pos.clear()
+        overlay.stamps.clear()
+        overlay.floor = self.store.tick()
+        if table_name == SEQUENCE_TABLE:
+            self.mission_sequence().observe_table(df)
+
+    def _write_back(self, table_name: str, record: Dict[str, Any]):
+        if self.writer is not None and self.writer.write_record(table_name, record):
+            self._queued.setdefault(table_name, set()).add(record.get('id'))
+
+    # --- Overlay ---
+    def _overlay(self, table_name: str) -> TableOverlay:
+        overlay = self._overlays.setdefault(table_name, TableOverlay())
+        overlay.version += 1
+        return overlay
+
+    def _base(self, table_name: str) -> Optional[pd.DataFrame]:
+        overlay = self._overlays.get(table_name)
+        if overlay is not None and overlay.replaced is not None:
+            return overlay.replaced
+        return self.store.get(table_name)
+
+    def _base_index(self, table_name: str) -> Optional[TableIndex]:
+        overlay = self._overlays.get(table_name)
+        if overlay is not None and overlay.replaced is not None:
+            if overlay.replaced_index is None:
+                overlay.replaced_index = TableIndex.for_table(table_name, overlay.replaced)
+            return overlay.replaced_index
+        return self.store.index(table_name)
+
+    @staticmethod
+    def _matches(df: pd.DataFrame, column: str, values, between: Optional[tuple]) -> pd.Series:
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        if between is not None:
+            start, end = between
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= df[column] >= start
+            if end is not None:
+                mask &= df[column] <= end
+            return mask
+        return df[column].isin(list(values or []))
+
+    @staticmethod
+    def _apply_updates(df: pd.DataFrame, updates: Dict[Any, Dict[str, Any]]) -> pd.DataFrame:
+        """Writes pending cell updates into `df` (which must be a private copy)."""
+        if not updates or 'id' not in df.columns:
+            return df
+        ids = pd.Index(df['id'])
+        for record_id, changes in updates.items():
+            if ids.is_unique:
+                pos = ids.get_indexer([record_id])[0]
+                labels = [df.index[pos]] if pos >= 0 else []
+            else:
+                labels = df.index[ids == record_id][:1]
+            for label in labels:
+                for col, val in changes.items():
+                    df.at[label, col] = val
+        return df
+
+    @staticmethod
+    def _apply_overlay(base: Optional[pd.DataFrame], overlay: TableOverlay) -> pd.DataFrame:
+        df = overlay.replaced if overlay.replaced is not None else base
+        if df is None:
+            df = pd.DataFrame()
+
+        inserted = overlay.inserted()
+        if inserted is not None:
+            df = pd.concat([df, inserted], ignore_index=True)
+        elif overlay.updates:
+            # Copy so the shared frame is never modified
+            df = df.copy()
+
+        df = MockDB._apply_updates(df, overlay.updates)
+        if overlay.deleted and 'id' in df.columns:
+            df = df[~df['id'].isin(overlay.deleted)]
+        return df
+
+    def _prune_committed(self, table_name: str):
+        """
+        Drops overlay edits the writer has committed: they have been merged
+        into the shared store, so every session now sees them.
+        """
+        queued = self._queued.get(table_name)
+        if not queued or self.writer is None:
+            return
+        committed = queued - self.writer.pending_ids(table_name)
+        if not committed:
+            return
+        overlay = self._overlay(table_name)
+        for record_id in committed:
+            overlay.updates.pop(record_id, None)
+            overlay.stamps.pop(record_id, None)
+            overlay.deleted.discard(record_id)
+        inserted = overlay.inserted()
+        if inserted is not None and 'id' in inserted.columns:
+            remaining = inserted[~inserted['id'].isin(committed)].reset_index(drop=True)
+            overlay.chunks = [remaining] if len(remaining) else []
+            overlay.insert_pos = {}
+            for pos, record_id in enumerate(remaining['id']):
+                overlay.insert_pos.setdefault(record_id, pos)
+        queued -= committed
@@ -0,0 +1,236 @@
+import copy
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from metrics import FREQUENCIES, period_start
+
+HISTORY_TABLE = "equipment"
+READY_STATUS = "FMC"
+
+# Open intervals end here; assets with no known start date started here
+_FAR_PAST = np.datetime64("0001-01-01", "D")
+_FAR_FUTURE = np.datetime64("9999-12-31", "D")
+
+
+def asset_key(row: Dict[str, Any]):
+    """Equipment rows are tracked by serial number, falling back to id."""
+    serial = row.get('serial_number')
+    if serial is None or (not isinstance(serial, str) and pd.isna(serial)) or serial == "":
+        return row.get('id')
+    return serial
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or (not isinstance(value, (date, datetime)) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return pd.to_datetime(value).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def _is_missing(status) -> bool:
+    return status is None or (not isinstance(status, str) and pd.isna(status))
+
+
+class StatusHistory:
+    """
+    Run-length encoded equipment status history: one interval
+    (serial, status, start, end) per run of an unchanged status, with end
+    None while the run is still open. Day resolution: a second change on
+    the same day replaces that day's status.
+
+    Queries go through arrays sorted by start/end, rebuilt after a write.
+    """
+
+    def __init__(self):
+        self.serials: List[Any] = []
+        self.statuses: List[str] = []
+        self.starts: List[Optional[date]] = []  # None = before any recorded date
+        self.ends: List[Optional[date]] = []    # None = still open
+        self._open: Dict[Any, int] = {}  # serial -> position of its open interval
+        self._sorted: Optional[Dict[str, np.ndarray]] = None
+        # Positions written since the owner last persisted them (positions never move)
+        self.dirty: set = set()
+
+    @classmethod
+    def from_table(cls, df: Optional[pd.DataFrame]) -> "StatusHistory":
+        """Opens one interval per asset, starting at its log_date (or last_updated) when known."""
+        history = cls()
+        if df is None or df.empty or 'status' not in df.columns:
+            return history
+        for row in df.to_dict('records'):
+            if _is_missing(row.get('status')):
+                continue
+            start = _to_date(row.get('log_date')) or _to_date(row.get('last_updated'))
+            history._open_interval(asset_key(row), row['status'], start)
+        return history
+
+    @classmethod
+    def from_intervals(cls, intervals: List[tuple]) -> "StatusHistory":
+        """Rebuilds a history from (serial, status, start, end) tuples in position order."""
+        history = cls()
+        for serial, status, start, end in intervals:
+            if end is None:
+                history._open[serial] = len(history.serials)
+            history.serials.append(serial)
+            history.statuses.append(status)
+            history.starts.append(start)
+            history.ends.append(end)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.serials)
+
+    def interval(self, pos: int) -> tuple:
+        return self.serials[pos], self.statuses[pos], self.starts[pos], self.ends[pos]
+
+    def copy(self) -> "StatusHistory":
+        other = copy.copy(self)
+        other.serials, other.statuses = list(self.serials), list(self.statuses)
+        other.starts, other.ends = list(self.starts), list(self.ends)
+        other._open = dict(self._open)
+        other.dirty = set(self.dirty)
+        return other
+
+    def current(self, serial) -> Optional[str]:
+        pos = self._open.get(serial)
+        return self.statuses[pos] if pos is not None else None
+
+    # --- Writes ---
+    def _open_interval(self, serial, status: str, start: Optional[date]):
+        self._open[serial] = len(self.serials)
+        self.serials.append(serial)
+        self.statuses.append(status)
+        self.starts.append(start)
+        self.ends.append(None)
+        self.dirty.add(len(self.serials) - 1)
+        self._sorted = None
+
+    def record(self, serial, status, when: Optional[date] = None) -> bool:
+        """
+        Records `serial` having `status` from `when` (default today); a missing
+        status closes its interval (asset removed). Returns False if nothing changed.
+        """
+        when = when or date.today()
+        pos = self._open.get(serial)
+        if pos is not None and not _is_missing(status) and self.statuses[pos] == status:
+            return False
+        if pos is None and _is_missing(status):
+            return False
+
+        if pos is not None:
+            if self.starts[pos] is not None and self.starts[pos] >= when and not _is_missing(status):
+                # Changed again the same day: keep the latest status only
+                self.statuses[pos] = status
+                self.dirty.add(pos)
+                self._sorted = None
+                return True
+            self.ends[pos] = when
+            self.dirty.add(pos)
+            del self._open[serial]
+            self._sorted = None
+        if not _is_missing(status):
+            self._open_interval(serial, status, when)
+        return True
+
+    def sync(self, rows: pd.DataFrame, when: Optional[date] = None, close_missing: bool = False) -> int:
+        """
+        Records every status that differs from the open interval of its asset.
+        With close_missing, assets absent from `rows` are closed (a full table).
+        Returns the number of transitions.
+        """
+        changed = 0
+        seen = set()
+        if rows is not None and not rows.empty and 'status' in rows.columns:
+            for row in rows.to_dict('records'):
+                key = asset_key(row)
+                seen.add(key)
+                changed += self.record(key, row['status'], when)
+        if close_missing:
+            for serial in [s for s in self._open if s not in seen]:
+                changed += self.record(serial, None, when)
+        return changed
+
+    def synced(self, rows: pd.DataFrame, when: Optional[date] = None, close_missing: bool = False) -> "StatusHistory":
+        """A copy with `rows` synced; this history is left as is."""
+        other = self.copy()
+        other.sync(rows, when, close_missing)
+        return other
+
+    # --- Queries ---
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'serial': self.serials, 'status': self.statuses,
+                             'start': self.starts, 'end': self.ends})
+
+    def _index(self) -> Dict[str, np.ndarray]:
+        """Interval arrays ordered by start."""
+        if self._sorted is None:
+            starts = np.array([np.datetime64(s, 'D') if s is not None else _FAR_PAST for s in self.starts],
+                              dtype='datetime64[D]')
+            ends = np.array([np.datetime64(e, 'D') if e is not None else _FAR_FUTURE for e in self.ends],
+                            dtype='datetime64[D]')
+            order = np.argsort(starts, kind='stable')
+            self._sorted = {
+                'starts': starts[order],
+                'ends': ends[order],
+                'statuses': np.array(self.statuses, dtype=object)[order],
+                'serials': np.array(self.serials, dtype=object)[order],
+            }
+        return self._sorted
+
+    def as_of(self, when, serials: Optional[List[Any]] = None) -> pd.Series:
+        """Asset count per status on `when` (optionally for some serials only)."""
+        idx = self._index()
+        day = np.datetime64(_to_date(when), 'D')
+        k = np.searchsorted(idx['starts'], day, side='right')  # intervals started by `when`
+        live = idx['ends'][:k] > day
+        if serials is not None:
+            live &= np.isin(idx['serials'][:k], list(serials))
+        return pd.Series(idx['statuses'][:k][live]).value_counts()
+
+    def readiness(self, when, serials: Optional[List[Any]] = None) -> Optional[float]:
+        """FMC share of tracked assets on `when` (None if there were none)."""
+        counts = self.as_of(when, serials)
+        total = counts.sum()
+        return float(counts.get(READY_STATUS, 0) / total) if total > 0 else None
+
+    def trend(self, start, end, freq: str = "day", serials: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Status counts and readiness at the last day of each `freq` bucket in
+        start..end: one row per bucket with date (bucket start), a column per
+        status, total and readiness.
+        """
+        start, end = _to_date(start), _to_date(end)
+        if start is None or end is None or start > end:
+            return pd.DataFrame(columns=['date', 'total', 'readiness'])
+        buckets = pd.date_range(period_start(pd.Series([start]), freq).iloc[0], end, freq=FREQUENCIES[freq])
+        # Sample each bucket on its last day (today for the current one)
+        sample = np.minimum((buckets[1:] - pd.Timedelta(days=1)).append(pd.DatetimeIndex([end])),
+                            pd.Timestamp(end)).values.astype('datetime64[D]')
+
+        idx = self._index()
+        keep = np.ones(len(idx['starts']), dtype=bool)
+        if serials is not None:
+            keep = np.isin(idx['serials'], list(serials))
+
+        out = pd.DataFrame({'date': buckets.date})
+        for status in sorted(set(idx['statuses'][keep])):
+            mask = keep & (idx['statuses'] == status)
+            starts = idx['starts'][mask]
+            ends = np.sort(idx['ends'][mask])
+            # Live on day t: started on or before t and not yet ended
+            out[status] = (np.searchsorted(starts, sample, side='right')
+                           - np.searchsorted(ends, sample, side='right'))
+        statuses = [c for c in out.columns if c != 'date']
+        out['total'] = out[statuses].sum(axis=1) if statuses else 0
+        ready = out[READY_STATUS] if READY_STATUS in out.columns else 0
+        out['readiness'] = (ready / out['total']).where(out['total'] > 0)
+        return out
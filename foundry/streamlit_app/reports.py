@@ -0,0 +1,274 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List, Callable, Hashable
+
+import pandas as pd
+
+from exports import excel_cell
+from metrics import metrics_from_counts, add_rates, choose_frequency, FREQUENCY_LABELS, COUNT_COLUMNS
+from services.service_bulletins import open_service_bulletins
+
+try:
+    from openpyxl import Workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+PERIODS = ["Daily", "Weekly", "Deployment to Date", "Custom"]
+
+# Inventory rows below their minimum are reported as low stock
+LOW_STOCK_COLUMNS = ["part_number", "description", "category", "quantity_on_hand", "min_quantity"]
+
+
+@dataclass
+class SitrepInputs:
+    """Snapshots the report is built from; collected on the UI thread, rendered in the worker."""
+    deployment_id: Optional[str]  # None = all deployments
+    deployment_name: str
+    period: str
+    start: date
+    end: date
+    daily: pd.DataFrame             # daily rollup rows (date, deployment_id, counts...)
+    flights: pd.DataFrame           # flight log for the period
+    equipment: pd.DataFrame
+    readiness: pd.DataFrame         # StatusHistory.trend over the period, at report_frequency()
+    inventory: pd.DataFrame
+    service_bulletins: pd.DataFrame
+
+
+@dataclass
+class SitrepReport:
+    title: str
+    meta: List[tuple]                                  # (label, value) header lines
+    sections: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    # Sections too large for the PDF; they are only in the workbook
+    excel_only: List[str] = field(default_factory=list)
+
+
+def report_frequency(start: date, end: date) -> str:
+    """Bucket size of the period tables: daily for a SITREP, coarser for long periods."""
+    return choose_frequency(start, end)
+
+
+def build_sitrep(inputs: SitrepInputs) -> SitrepReport:
+    """Flight summary, MRR/OFTR, readiness, low stock and open SB compliance for one period."""
+    daily = inputs.daily
+    if not daily.empty:
+        daily = daily[daily['date'].notna()]
+        daily = daily[(daily['date'] >= inputs.start) & (daily['date'] <= inputs.end)]
+
+    # 1. Totals and the per-bucket flight summary
+    freq = report_frequency(inputs.start, inputs.end)
+    summary = metrics_from_counts(daily, freq)
+    totals = {col: daily[col].sum() if col in daily.columns else 0
+              for col in COUNT_COLUMNS + ['tois', 'contraband_lbs', 'detainees']}
+    overall = add_rates(pd.DataFrame([totals])).iloc[0]
+    totals_df = pd.DataFrame([
+        ("Flights", int(totals['flights'])),
+        ("Completed", int(totals['complete'])),
+        ("Delayed", int(totals['delayed'])),
+        ("CNX (Shield AI)", int(totals['cnx_shield'])),
+        ("Flight Hours", round(float(totals['flight_hours']), 1)),
+        ("MRR", _pct(overall['MRR'])),
+        ("OFTR", _pct(overall['OFTR'])),
+        ("TOIs", int(totals['tois'])),
+        ("Contraband (lbs)", round(float(totals['contraband_lbs']), 0)),
+        ("Detainees", int(totals['detainees'])),
+    ], columns=["Metric", "Value"])
+
+    summary = summary.rename(columns={
+        'date': 'Period Start', 'flights': 'Flights', 'complete': 'Complete', 'delayed': 'Delayed',
+        'cnx_shield': 'CNX (Shield AI)', 'flight_hours': 'Hours',
+    })
+    summary['Hours'] = summary['Hours'].round(1)
+    for col in ('MRR', 'OFTR'):
+        summary[col] = summary[col].map(_pct)
+
+    # 2. Readiness: status counts now and the trend over the period
+    equipment = inputs.equipment
+    status_now = (equipment['status'].value_counts().rename_axis('Status').reset_index(name='Assets')
+                  if not equipment.empty and 'status' in equipment.columns
+                  else pd.DataFrame(columns=['Status', 'Assets']))
+    readiness = inputs.readiness.copy()
+    if 'readiness' in readiness.columns:
+        readiness['readiness'] = readiness['readiness'].map(_pct)
+    readiness = readiness.rename(columns={'date': 'Period Start', 'total': 'Assets', 'readiness': 'Readiness'})
+
+    # 3. Low stock and open service bulletins
+    inventory = inputs.inventory
+    if not inventory.empty and {'quantity_on_hand', 'min_quantity'} <= set(inventory.columns):
+        low = inventory[pd.to_numeric(inventory['quantity_on_hand'], errors='coerce')
+                        < pd.to_numeric(inventory['min_quantity'], errors='coerce')]
+        low_stock = low[[c for c in LOW_STOCK_COLUMNS + ['deployment_id'] if c in low.columns]]
+    else:
+        low_stock = pd.DataFrame(columns=LOW_STOCK_COLUMNS)
+
+    open_sbs = open_service_bulletins(inputs.service_bulletins, inputs.deployment_id)
+
+    flights = inputs.flights.drop(columns=['deployment_select'], errors='ignore')
+
+    label = FREQUENCY_LABELS[freq]
+    return SitrepReport(
+        title=f"SITREP - {inputs.deployment_name}",
+        meta=[
+            ("Deployment", inputs.deployment_name),
+            ("Period", f"{inputs.period}: {inputs.start} to {inputs.end}"),
+            ("Generated", datetime.now().strftime("%Y-%m-%d %H:%M")),
+        ],
+        sections={
+            "Totals": totals_df,
+            f"Flight Summary ({label})": summary,
+            "Equipment Status": status_now,
+            f"Readiness ({label})": readiness,
+            "Low Stock": low_stock,
+            "Open SB Compliance": open_sbs,
+            "Flight Log": flights,
+        },
+        excel_only=["Flight Log"],
+    )
+
+
+def _pct(value) -> str:
+    return f"{value:.1%}" if value is not None and not pd.isna(value) else "-"
+
+
+# --- Writers ---
+def write_excel(report: SitrepReport) -> bytes:
+    """
+    Workbook with a Summary sheet and one sheet per section. Uses openpyxl's
+    write-only mode so rows stream out instead of building every cell in memory.
+    """
+    if not HAS_OPENPYXL:
+        raise RuntimeError("openpyxl is required for Excel reports")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Summary")
+    ws.append([report.title])
+    for label, value in report.meta:
+        ws.append([label, value])
+
+    for name, df in report.sections.items():
+        ws = wb.create_sheet(_sheet_name(name))
+        ws.append([str(c) for c in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            ws.append([excel_cell(v) for v in row])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _sheet_name(name: str) -> str:
+    for ch in '[]:*?/\\':
+        name = name.replace(ch, '-')
+    return name[:31]
+
+
+def write_pdf(report: SitrepReport, max_rows: int = 200) -> bytes:
+    """Text PDF of the report (landscape, monospaced tables); Excel-only sections are summarized."""
+    lines = [report.title, ""]
+    lines += [f"{label}: {value}" for label, value in report.meta]
+    for name, df in report.sections.items():
+        lines += ["", name, "-" * len(name)]
+        if name in report.excel_only:
+            lines.append(f"{len(df)} rows - see the Excel workbook.")
+        elif df.empty:
+            lines.append("None.")
+        else:
+            text = df.head(max_rows).to_string(index=False, max_colwidth=40)
+            lines += text.splitlines()
+            if len(df) > max_rows:
+                lines.append(f"... {len(df) - max_rows} more rows in the Excel workbook.")
+    return _pdf_bytes(lines)
+
+
+def _pdf_bytes(lines: List[str], font_size: int = 8, lines_per_page: int = 64) -> bytes:
+    """Minimal PDF writer: Courier text, US Letter landscape, no external dependency."""
+    width, height, margin = 792, 612, 36
+    leading = font_size + 1.5
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects: List[bytes] = []
+    font_id, pages_id = 1, 2
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+    objects.append(b"")  # pages tree, filled in below
+    page_ids = []
+    for page in pages:
+        body = [f"BT /F1 {font_size} Tf {leading} TL {margin} {height - margin} Td".encode()]
+        for line in page:
+            text = line[:160].replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            body.append(b"(" + text.encode("cp1252", "replace") + b") '")
+        body.append(b"ET")
+        stream = b"\n".join(body)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {width} {height}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+    objects[pages_id - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] "
+                             f"/Count {len(page_ids)} >>").encode()
+    objects.append(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    catalog_id = len(objects)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref))
+    return out.getvalue()
+
+
+def render_sitrep(inputs: SitrepInputs) -> Dict[str, bytes]:
+    """Builds the report and renders both formats (runs in the worker)."""
+    report = build_sitrep(inputs)
+    return {"xlsx": write_excel(report), "pdf": write_pdf(report)}
+
+
+# --- Engine ---
+class ReportEngine:
+    """
+    Renders reports on a background thread pool so the UI stays responsive.
+    Jobs are keyed by (deployment, period, data versions): a key that is
+    running or already rendered is never rendered twice, and finished outputs
+    are kept for the most recent `max_entries` keys.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._jobs: "OrderedDict[Hashable, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ReportEngine":
+        return cls(int(config.get("REPORT_WORKERS", 2)), int(config.get("REPORT_CACHE_SIZE", 16)))
+
+    def submit(self, key: Hashable, render: Callable[[], Any]) -> Future:
+        """Starts `render` for `key` unless it is already running or cached."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and job.exception() is not None):
+                self._jobs.move_to_end(key)
+                return job
+            job = self._pool.submit(render)
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_entries:
+                if not next(iter(self._jobs.values())).done():
+                    break  # never drop a running job
+                self._jobs.popitem(last=False)
+            return job
+
+    def get(self, key: Hashable) -> Optional[Future]:
+        with self._lock:
+            return self._jobs.get(key)
@@ -0,0 +1,87 @@
+from typing import Optional, List
+
+import pandas as pd
+
+from metrics import COUNT_COLUMNS, flight_flags
+
+ROLLUP_TABLE = "flights"
+ROLLUP_KEYS = ["date", "deployment_id"]
+
+# Summed as-is; missing columns count as 0
+FINDING_COLUMNS = ["tois", "contraband_lbs", "detainees"]
+
+STATUS_PREFIX = "status_"
+
+
+def aggregate(flights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sums flights per (date, deployment_id): COUNT_COLUMNS (flights, complete,
+    delayed, cnx_shield, flight_hours), FINDING_COLUMNS and one
+    `status_<STATUS>` count per status value. Indexed by ROLLUP_KEYS.
+    """
+    if flights is None or flights.empty or not set(ROLLUP_KEYS) <= set(flights.columns):
+        return pd.DataFrame(columns=COUNT_COLUMNS + FINDING_COLUMNS,
+                            index=pd.MultiIndex.from_arrays([[], []], names=ROLLUP_KEYS))
+
+    missing = [c for c in ('status', 'responsible_part', 'flight_hours') if c not in flights.columns]
+    if missing:
+        flights = flights.assign(**{c: None for c in missing})
+    parts = flight_flags(flights)
+    for col in FINDING_COLUMNS:
+        parts[col] = pd.to_numeric(flights[col], errors='coerce') if col in flights.columns else 0
+    statuses = pd.get_dummies(flights['status'], prefix=STATUS_PREFIX.rstrip('_'), dtype=int)
+    parts = pd.concat([parts, statuses], axis=1)
+
+    # Keep rows with a missing date/deployment so totals match len(flights)
+    keys = [flights[k] for k in ROLLUP_KEYS]
+    return parts.groupby(keys, sort=False, dropna=False).sum()
+
+
+class DailyRollup:
+    """
+    Flight counts, hours and findings per (date, deployment_id), kept up to date
+    by applying the rows an edit removes and adds instead of re-aggregating the
+    flights table. Readers should treat `frame` as read-only.
+    """
+
+    def __init__(self, flights: Optional[pd.DataFrame] = None):
+        self.frame = aggregate(flights)
+
+    def apply(self, old_rows: Optional[pd.DataFrame] = None, new_rows: Optional[pd.DataFrame] = None):
+        """Subtracts `old_rows` (the rows as they were) and adds `new_rows` (as they are now)."""
+        self.frame = self._combined(old_rows, new_rows)
+
+    def applied(self, old_rows: Optional[pd.DataFrame] = None,
+                new_rows: Optional[pd.DataFrame] = None) -> "DailyRollup":
+        """A copy with the change applied; this rollup is left as is."""
+        other = DailyRollup.__new__(DailyRollup)
+        other.frame = self._combined(old_rows, new_rows)
+        return other
+
+    def _combined(self, old_rows, new_rows) -> pd.DataFrame:
+        frame = self.frame
+        if new_rows is not None and not new_rows.empty:
+            frame = frame.add(aggregate(new_rows), fill_value=0)
+        if old_rows is not None and not old_rows.empty:
+            frame = frame.sub(aggregate(old_rows), fill_value=0)
+        if frame is not self.frame:
+            # Buckets whose last flight moved away or was deleted
+            frame = frame.fillna(0)
+            frame = frame[frame['flights'] > 0]
+            counts = [c for c in frame.columns if c not in ('flight_hours', *FINDING_COLUMNS)]
+            frame = frame.astype({c: int for c in counts})
+        return frame
+
+    def to_frame(self, deployment_ids: Optional[List] = None) -> pd.DataFrame:
+        """Rollup rows with date and deployment_id as columns, optionally for some deployments only."""
+        df = self.frame.reset_index()
+        if deployment_ids is not None:
+            df = df[df['deployment_id'].isin(deployment_ids)]
+        return df
+
+    def status_counts(self, deployment_ids: Optional[List] = None) -> pd.Series:
+        df = self.to_frame(deployment_ids)
+        cols = [c for c in df.columns if c.startswith(STATUS_PREFIX)]
+        counts = df[cols].sum()
+        counts.index = [c[len(STATUS_PREFIX):] for c in cols]
+        return counts
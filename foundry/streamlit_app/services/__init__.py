@@ -0,0 +1,24 @@
+"""
+Data operations behind the Streamlit views, as plain functions over the data
+layer (MockDB or SQLiteDB). Nothing here imports Streamlit, so these can be
+profiled, reused from a worker or called from a script.
+"""
+from services.editor import ChangeSet, apply_editor_changes, diff_frames
+from services.flights import (
+    FLIGHT_EDIT_COLUMNS, filter_flights, mission_segment, next_mission_id, save_flight_edits,
+)
+from services.equipment import save_equipment_edits
+from services.inventory import save_inventory_edits
+from services.paging import PAGE_SIZES, page_count, clamp_page, page_slice
+from services.service_bulletins import (
+    SB_CLOSED, active_deployments, compliance_matrix, open_service_bulletins,
+)
+
+__all__ = [
+    "ChangeSet", "apply_editor_changes", "diff_frames",
+    "FLIGHT_EDIT_COLUMNS", "filter_flights", "mission_segment", "next_mission_id", "save_flight_edits",
+    "save_equipment_edits",
+    "save_inventory_edits",
+    "PAGE_SIZES", "page_count", "clamp_page", "page_slice",
+    "SB_CLOSED", "active_deployments", "compliance_matrix", "open_service_bulletins",
+]
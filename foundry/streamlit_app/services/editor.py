@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+import numpy as np
+import pandas as pd
+
+from concurrency import UpdateResult
+
+
+@dataclass
+class ChangeSet:
+    """What one save of a data_editor grid changed."""
+    table: str
+    # id -> {column: (value shown in the grid, value returned by it)}
+    cells: Dict[Any, Dict[str, Tuple[Any, Any]]] = field(default_factory=dict)
+    added: List[Dict[str, Any]] = field(default_factory=list)  # inserted records, with their new ids
+    deleted: List[Any] = field(default_factory=list)
+    results: List[UpdateResult] = field(default_factory=list)  # one version-checked update per changed row
+
+    @property
+    def saved(self) -> List[UpdateResult]:
+        return [r for r in self.results if r.status in ("applied", "merged")]
+
+    @property
+    def rejected(self) -> List[UpdateResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def cell_count(self) -> int:
+        return sum(len(cols) for cols in self.cells.values())
+
+    def is_empty(self) -> bool:
+        return not (self.cells or self.added or self.deleted)
+
+
+def _is_new_id(ids: pd.Series, known: pd.Index) -> pd.Series:
+    """Rows the editor added: no id (or 0) yet, or an id the grid was not given."""
+    return ids.isna() | ids.eq(0) | ~ids.isin(known)
+
+
+def diff_frames(original: pd.DataFrame, edited: pd.DataFrame, columns: Optional[List[str]] = None,
+                key: str = "id") -> Tuple[Dict[Any, Dict[str, Tuple[Any, Any]]], pd.DataFrame, List[Any]]:
+    """
+    Aligns `edited` with `original` on `key` and compares every shared column
+    (or just `columns`) in one vectorized pass.
+    Returns (changed cells per id as (old, new), added rows, ids of removed rows).
+    """
+    before = original.drop_duplicates(key).set_index(key)
+    new_mask = _is_new_id(edited[key], before.index)
+    after = edited[~new_mask].drop_duplicates(key, keep="last").set_index(key)
+    # Ids as the grid was given them (an added row turns an int id column into floats)
+    after.index = before.index[before.index.get_indexer(after.index)]
+
+    cols = [c for c in (columns if columns is not None else after.columns)
+            if c != key and c in before.columns and c in after.columns]
+    # Copies: a single object column would otherwise come back as a read-only view
+    old = before.loc[after.index, cols].to_numpy(dtype=object, copy=True)
+    new = after[cols].to_numpy(dtype=object, copy=True)
+    # None/NaN/NA all compare as one missing value
+    old[pd.isna(old)] = None
+    new[pd.isna(new)] = None
+    changed = (old != new).astype(bool)
+
+    cells = {}
+    for pos in np.flatnonzero(changed.any(axis=1)):
+        row_id = after.index[pos]
+        cells[row_id] = {cols[c]: (old[pos, c], new[pos, c]) for c in np.flatnonzero(changed[pos])}
+    deleted = list(before.index.difference(after.index))
+    return cells, edited[new_mask], deleted
+
+
+def apply_editor_changes(db, table: str, original: pd.DataFrame, edited: pd.DataFrame,
+                         columns: Optional[List[str]] = None,
+                         seen_df: Optional[pd.DataFrame] = None, seen_clock: Optional[int] = None,
+                         prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                         defaults: Optional[Dict[str, Any]] = None,
+                         allow_add: bool = False, allow_delete: bool = False,
+                         key: str = "id") -> ChangeSet:
+    """
+    Writes a data_editor save back through the data layer: only the changed
+    cells of each row (version-checked against `seen_df`/`seen_clock`, the
+    rows and clock the user was looking at), plus added and removed rows
+    when the grid allows them.
+
+    `prepare` turns a row's {column: new value} into the update to write
+    (e.g. mapping a display column back to its id column); `defaults` are
+    set on every added row.
+    """
+    cells, new_rows, deleted = diff_frames(original, edited, columns, key)
+    changes = ChangeSet(table, cells=cells)
+
+    # 1. Changed cells: one version-checked update per row
+    seen_rows = (seen_df if seen_df is not None else original).drop_duplicates(key).set_index(key)
+    for row_id, row_cells in cells.items():
+        updates = {col: new for col, (_, new) in row_cells.items()}
+        if prepare is not None:
+            updates = prepare(updates)
+        if not updates:
+            continue
+        base_row = seen_rows.loc[row_id].to_dict() if row_id in seen_rows.index else None
+        changes.results.append(db.update_checked(table, row_id, updates, seen_clock, base_row))
+
+    # 2. Rows added in the grid (the table's ID counter assigns missing ids)
+    if allow_add and not new_rows.empty:
+        for record in new_rows.to_dict('records'):
+            if pd.isna(record.get(key)) or record.get(key) == 0:
+                record.pop(key, None)
+            record.update(defaults or {})
+            db.add_record(table, record)
+            changes.added.append(record)
+
+    # 3. Rows removed from the grid
+    if allow_delete:
+        for row_id in deleted:
+            db.delete_record(table, row_id)
+        changes.deleted = deleted
+    return changes
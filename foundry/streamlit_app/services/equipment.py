@@ -0,0 +1,17 @@
+from typing import Optional, Any
+
+import pandas as pd
+
+from services.editor import ChangeSet, apply_editor_changes
+
+
+def save_equipment_edits(db, deployment_id: Any, subset: pd.DataFrame, edited: pd.DataFrame,
+                         seen_df: Optional[pd.DataFrame] = None,
+                         seen_clock: Optional[int] = None) -> ChangeSet:
+    """
+    Applies one deployment's equipment grid: rows without an id are added to
+    the deployment, rows missing from `edited` are deleted and changed cells
+    of the rest go through version-checked updates.
+    """
+    return apply_editor_changes(db, 'equipment', subset, edited, seen_df=seen_df, seen_clock=seen_clock,
+                                defaults={'deployment_id': deployment_id}, allow_add=True, allow_delete=True)
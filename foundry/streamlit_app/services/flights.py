@@ -0,0 +1,65 @@
+from datetime import date
+from typing import Optional, Dict, List, Any
+
+import pandas as pd
+
+from mission_sequence import mission_segment, format_mission_number
+from services.editor import ChangeSet, apply_editor_changes
+
+# Columns the unlocked flights grid lets users change
+FLIGHT_EDIT_COLUMNS = ['deployment_select', 'date', 'aircraft_number', 'status', 'responsible_part',
+                       'reason_for_delay', 'contraband_lbs', 'flight_hours']
+
+
+def filter_flights(db, deployments: Optional[List[str]] = None, statuses: Optional[List[str]] = None,
+                   start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    """
+    Flights matching every given filter (None/empty = no filter). Narrows with
+    the deployment or date partition index first, then filters the rest.
+    """
+    if deployments:
+        filtered = db.get_partition('flights', 'deployment_id', deployments)
+    elif start or end:
+        filtered = db.get_partition('flights', 'date', between=(start, end))
+    else:
+        filtered = db.get_table('flights')
+    if statuses:
+        filtered = filtered[filtered['status'].str.upper().isin(statuses)]
+    if start:
+        filtered = filtered[filtered['date'] >= start]
+    if end:
+        filtered = filtered[filtered['date'] <= end]
+    return filtered.copy()
+
+
+def next_mission_id(db, date_obj: date, aircraft_number: Optional[str], status: str) -> str:
+    """
+    Next mission number for a new flight: M-YYYYMMDD-<segment>-SEQ, with SEQ
+    from the data layer's per (date, segment) counter (numbers are never reused).
+    """
+    segment = mission_segment(aircraft_number, status)
+    return format_mission_number(date_obj, segment, db.mission_sequence().next(date_obj, segment))
+
+
+def save_flight_edits(db, editor_df: pd.DataFrame, edited_df: pd.DataFrame,
+                      seen_df: Optional[pd.DataFrame] = None, seen_clock: Optional[int] = None,
+                      updated_by: str = "Admin") -> ChangeSet:
+    """
+    Writes the cells that differ between the grid as rendered (`editor_df`)
+    and as returned (`edited_df`), one version-checked update per changed row.
+    `deployment_select` ("ID: Name") is written back as deployment_id.
+
+    `seen_df`/`seen_clock` are the rows and version clock the user was looking
+    at, so cells they did not touch never overwrite someone else's newer edit.
+    """
+    def prepare(updates: Dict[str, Any]) -> Dict[str, Any]:
+        # Reverse Map Deployment ("ID: Name") if Changed
+        new_dep_str = updates.pop('deployment_select', None)
+        if new_dep_str:
+            updates['deployment_id'] = new_dep_str.split(":")[0]
+        if updates:
+            updates['updated_by'] = updated_by
+        return updates
+
+    return apply_editor_changes(db, 'flights', editor_df, edited_df, FLIGHT_EDIT_COLUMNS,
+                                seen_df, seen_clock, prepare=prepare)
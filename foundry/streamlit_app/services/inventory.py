@@ -0,0 +1,8 @@
+import pandas as pd
+
+from services.editor import ChangeSet, apply_editor_changes
+
+
+def save_inventory_edits(db, original: pd.DataFrame, edited: pd.DataFrame) -> ChangeSet:
+    """Records (and queues for writeback) only the cells that changed."""
+    return apply_editor_changes(db, 'inventory', original, edited)
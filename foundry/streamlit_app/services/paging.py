@@ -0,0 +1,38 @@
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, math.ceil(total / max(1, page_size)))
+
+
+def clamp_page(page: int, total: int, page_size: int) -> int:
+    """`page` (1-based) kept within the pages `total` rows fill."""
+    return min(max(1, int(page)), page_count(total, page_size))
+
+
+def page_slice(df: pd.DataFrame, page: int, page_size: int,
+               sort_by: Optional[str] = None, descending: bool = False) -> pd.DataFrame:
+    """
+    Rows of `page` (1-based) of `df` in `sort_by` order (stable, missing
+    values last). Only the sort key is sorted; just the page's rows are taken
+    from the frame.
+    """
+    start = (clamp_page(page, len(df), page_size) - 1) * page_size
+    if sort_by and sort_by in df.columns:
+        keys = df[sort_by].reset_index(drop=True)
+        try:
+            order = keys.sort_values(ascending=not descending, kind='stable', na_position='last').index
+        except TypeError:
+            # Mixed types in the column: order by their text
+            order = keys.astype(str).where(keys.notna()).sort_values(
+                ascending=not descending, kind='stable', na_position='last').index
+        positions = order[start:start + page_size]
+    else:
+        positions = np.arange(start, min(start + page_size, len(df)))
+    return df.iloc[positions]
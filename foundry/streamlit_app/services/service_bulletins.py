@@ -0,0 +1,40 @@
+from typing import Optional
+
+import pandas as pd
+
+STATUS_PREFIX = "status_"
+# Compliance states that count as closed
+SB_CLOSED = {"Complete", "N/A"}
+SB_COLUMNS = ['date_issued', 'sb_number', 'description']
+
+
+def active_deployments(deployments: pd.DataFrame) -> pd.DataFrame:
+    return deployments[deployments['status'] != 'Archived'].reset_index(drop=True)
+
+
+def compliance_matrix(sbs: pd.DataFrame, deployments: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per SB (date_issued, sb_number, description) and one column per
+    deployment in `deployments`, holding its compliance status ("N/A" when the
+    SB has no status for that deployment).
+    """
+    base = sbs.reindex(columns=SB_COLUMNS)
+    statuses = {
+        dep_id: (sbs[f"{STATUS_PREFIX}{dep_id}"].fillna("N/A") if f"{STATUS_PREFIX}{dep_id}" in sbs.columns
+                 else pd.Series("N/A", index=sbs.index))
+        for dep_id in deployments['deployment_id']
+    }
+    return pd.concat([base, pd.DataFrame(statuses, index=sbs.index)], axis=1).reset_index(drop=True)
+
+
+def open_service_bulletins(sbs: pd.DataFrame, deployment_id: Optional[str] = None) -> pd.DataFrame:
+    """SBs not Complete/N/A for the deployment (any deployment when None), one row per SB and deployment."""
+    if sbs.empty:
+        return pd.DataFrame(columns=['sb_number', 'description', 'date_issued', 'deployment_id', 'status'])
+    status_cols = [c for c in sbs.columns if c.startswith(STATUS_PREFIX)]
+    if deployment_id is not None:
+        status_cols = [c for c in status_cols if c == f"{STATUS_PREFIX}{deployment_id}"]
+    base = [c for c in ('sb_number', 'description', 'date_issued') if c in sbs.columns]
+    long = sbs.melt(id_vars=base, value_vars=status_cols, var_name='deployment_id', value_name='status')
+    long['deployment_id'] = long['deployment_id'].str[len(STATUS_PREFIX):]
+    return long[~long['status'].isin(SB_CLOSED) & long['status'].notna()].reset_index(drop=True)
@@ -0,0 +1,298 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+
+import pandas as pd
+
+from dataset_schemas import DATASET_SCHEMAS
+from foundry_backend import DELETED_COLUMN, dataset_key, drop_tombstones, is_deleted, merge_by_key
+from table_index import TableIndex
+from rollup import DailyRollup
+from readiness import StatusHistory
+from mission_sequence import MissionSequence
+
+
+class SharedStore:
+    """
+    Process-wide snapshot of the loaded datasets, shared by every session.
+    Tables are never modified in place: every change publishes a new
+    DataFrame (copy-on-write) and bumps that table's version, so readers
+    holding an older frame are unaffected. Callers must treat returned
+    frames as read-only.
+    Tables registered with a loader are materialized on first access (or by
+    a background prefetch) instead of all at start-up. A table whose load
+    fails stays pending and is tried again after `retry_seconds`.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Held while the initial load runs so concurrent sessions wait for it
+        self.load_lock = threading.Lock()
+        self.loaded = False
+        self.source: Optional[str] = None
+
+        # Demand-driven loading
+        self._loader: Optional[Callable[[str], pd.DataFrame]] = None
+        self._pending: set = set()  # registered names not materialized yet
+        self._table_locks: Dict[str, threading.Lock] = {}
+        self._prefetch_pool: Optional[ThreadPoolExecutor] = None
+        self._load_errors: Dict[str, tuple] = {}  # name -> (time of the failed load, error)
+        self.retry_seconds = 30.0
+        # Time of the last failed initial load, so sessions back off before retrying it
+        self.load_failed_at: Optional[float] = None
+
+        # Indexes per table, built once per table version
+        self._indexes: Dict[str, tuple] = {}  # name -> (version, TableIndex)
+        self._rollups: Dict[str, tuple] = {}  # name -> (version, DailyRollup)
+        # Status-change intervals per table, started on first use and then kept
+        # across versions (copy-on-write like the tables)
+        self._histories: Dict[str, StatusHistory] = {}
+        # Mission number counters per table, started on first use; they only
+        # move forward, so they are updated in place
+        self._sequences: Dict[str, MissionSequence] = {}
+        # Next record ID per table; only ever moves forward
+        self._next_ids: Dict[str, int] = {}
+
+        # Row version stamps from one process-wide clock: a row's version is
+        # the stamp of its last committed change, or of the table's last
+        # wholesale replacement (its floor) if that is newer
+        self._clock = 0
+        self._row_stamps: Dict[str, Dict[Any, int]] = {}
+        self._floors: Dict[str, int] = {}
+
+    def get(self, name: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._tables.get(name)
+            lazy = df is None and name in self._pending
+        if lazy:
+            df = self._materialize(name)
+        return df
+
+    def is_materialized(self, name: str) -> bool:
+        with self._lock:
+            return name in self._tables
+
+    def version(self, name: str) -> int:
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def names(self) -> List[str]:
+        """Names of the tables materialized so far."""
+        with self._lock:
+            return list(self._tables.keys())
+
+    def index(self, name: str) -> Optional[TableIndex]:
+        """Index over the current version of `name`, shared by every session."""
+        df = self.get(name)
+        if df is None:
+            return None
+        with self._lock:
+            version = self._versions.get(name, 0)
+            cached = self._indexes.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+        index = TableIndex.for_table(name, df)
+        with self._lock:
+            if self._versions.get(name, 0) == version:
+                self._indexes[name] = (version, index)
+        return index
+
+    def rollup(self, name: str) -> DailyRollup:
+        """
+        Daily rollup of the current version of `name`. Built once per load or
+        replace; merge_records keeps it current from the merged rows alone.
+        """
+        if self.get(name) is None:
+            return DailyRollup()
+        with self._lock:
+            df = self._tables.get(name)
+            version = self._versions.get(name, 0)
+            cached = self._rollups.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+        rollup = DailyRollup(df)
+        with self._lock:
+            if self._versions.get(name, 0) == version:
+                self._rollups[name] = (version, rollup)
+        return rollup
+
+    def status_history(self, name: str) -> StatusHistory:
+        """
+        Status transitions of `name` (equipment), seeded from the table on first
+        use; committed merges and replacements then record transitions.
+        """
+        df = self.get(name)
+        with self._lock:
+            if name not in self._tables:
+                # Not loaded (yet): nothing to keep current
+                return StatusHistory.from_table(df)
+            if name not in self._histories:
+                self._histories[name] = StatusHistory.from_table(self._tables[name])
+            return self._histories[name]
+
+    def mission_sequence(self, name: str) -> MissionSequence:
+        """
+        Mission number counters of `name` (flights), seeded from the table on
+        first use; committed merges and replacements then advance them.
+        """
+        df = self.get(name)
+        with self._lock:
+            if name not in self._tables:
+                return MissionSequence.from_table(df)
+            if name not in self._sequences:
+                self._sequences[name] = MissionSequence.from_table(self._tables[name])
+            return self._sequences[name]
+
+    def next_id(self, name: str) -> int:
+        """Allocates a new record ID, above every ID seen so far (never reused)."""
+        index = self.index(name)
+        with self._lock:
+            floor = (index.max_id if index else 0) + 1
+            value = max(self._next_ids.get(name, 1), floor)
+            self._next_ids[name] = value + 1
+            return value
+
+    def claim_id(self, name: str, value):
+        """Records an explicitly chosen ID so next_id() will not hand it out."""
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._next_ids[name] = max(self._next_ids.get(name, 1), value + 1)
+
+    def tick(self) -> int:
+        """Next value of the version clock."""
+        with self._lock:
+            self._clock += 1
+            return self._clock
+
+    @property
+    def clock(self) -> int:
+        return self._clock
+
+    def row_version(self, name: str, record_id) -> int:
+        with self._lock:
+            return max(self._floors.get(name, 0), self._row_stamps.get(name, {}).get(record_id, 0))
+
+    def set_loader(self, loader: Callable[[str], pd.DataFrame], names: List[str]):
+        """Registers `loader(name)` for tables that are loaded on first access."""
+        with self._lock:
+            self._loader = loader
+            self._pending.update(n for n in names if n not in self._tables)
+
+    def prefetch(self, names: List[str], max_workers: int = 2):
+        """Materializes `names` on background threads, in order."""
+        with self._lock:
+            todo = [n for n in names if n in self._pending]
+            if not todo:
+                return
+            if self._prefetch_pool is None:
+                self._prefetch_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="table-prefetch")
+        for name in todo:
+            self._prefetch_pool.submit(self._materialize, name)
+
+    def _materialize(self, name: str) -> Optional[pd.DataFrame]:
+        # One load per table: concurrent readers of the same table wait for it
+        with self._lock:
+            table_lock = self._table_locks.setdefault(name, threading.Lock())
+        with table_lock:
+            with self._lock:
+                if name in self._tables or name not in self._pending:
+                    return self._tables.get(name)
+                failed = self._load_errors.get(name)
+                if failed and time.time() - failed[0] < self.retry_seconds:
+                    return self._placeholder(name)
+                loader = self._loader
+            try:
+                df = loader(name)
+            except Exception as e:
+                # Stays pending: the next access after retry_seconds loads it again
+                print(f"Error loading {name}: {e}")
+                with self._lock:
+                    self._load_errors[name] = (time.time(), str(e))
+                return self._placeholder(name)
+            with self._lock:
+                self._pending.discard(name)
+                self._load_errors.pop(name, None)
+                self._set(name, df)
+            return df
+
+    @staticmethod
+    def _placeholder(name: str) -> pd.DataFrame:
+        """Empty stand-in (not stored) for a table that failed to load."""
+        return pd.DataFrame(columns=list(DATASET_SCHEMAS.get(name, {})))
+
+    def load_errors(self) -> Dict[str, str]:
+        """Tables whose last load failed and are still pending: {name: error}."""
+        with self._lock:
+            return {name: error for name, (_, error) in self._load_errors.items() if name in self._pending}
+
+    def publish(self, tables: Dict[str, pd.DataFrame], source: Optional[str] = None):
+        """Installs a full set of tables (initial load)."""
+        with self._lock:
+            for name, df in tables.items():
+                self._pending.discard(name)
+                self._load_errors.pop(name, None)
+                self._set(name, df)
+            if source is not None:
+                self.source = source
+            self.loaded = True
+
+    def replace(self, name: str, df: pd.DataFrame):
+        with self._lock:
+            self._pending.discard(name)
+            self._load_errors.pop(name, None)
+            self._set(name, df)
+            if name in self._histories:
+                self._histories[name] = self._histories[name].synced(df, close_missing=True)
+            if name in self._sequences:
+                self._sequences[name].observe_table(df)
+            # Any row may have changed
+            self._floors[name] = self.tick()
+            self._row_stamps.pop(name, None)
+
+    def merge_records(self, name: str, records: List[Dict[str, Any]], key: Optional[str] = None):
+        """
+        Upserts committed records by `key` (the dataset's row key by default)
+        into a new version of the table; tombstones remove their row.
+        """
+        if not records:
+            return
+        key = key or dataset_key(name)
+        with self._lock:
+            if name in self._pending:
+                # Not loaded yet: the first read will include the committed rows
+                return
+            current = self._tables.get(name, pd.DataFrame())
+            new_rows = pd.DataFrame(records)
+            if key in new_rows.columns:
+                new_rows = new_rows.drop_duplicates(subset=[key], keep="last")
+            live = drop_tombstones(new_rows)
+            cached = self._rollups.get(name)
+            self._set(name, merge_by_key(current, new_rows, key))
+            if name in self._histories:
+                synced = live
+                if DELETED_COLUMN in new_rows.columns and 'status' in new_rows.columns:
+                    # A deleted asset's open interval ends
+                    gone = is_deleted(new_rows[DELETED_COLUMN])
+                    synced = new_rows.assign(status=new_rows['status'].astype(object).where(~gone, None)).drop(columns=[DELETED_COLUMN])
+                self._histories[name] = self._histories[name].synced(synced)
+            if name in self._sequences and key in current.columns:
+                previous = current[current[key].isin(new_rows[key])] if key in new_rows.columns else current.iloc[:0]
+                self._sequences[name].observe(records, {row[key]: row for row in previous.to_dict('records')})
+            if cached and cached[0] == self._versions[name] - 1 and key in new_rows.columns and key in current.columns:
+                # Roll the rollup forward: out go the rows being replaced or deleted, in come the new ones
+                old_rows = current[current[key].isin(new_rows[key])]
+                self._rollups[name] = (self._versions[name], cached[1].applied(old_rows, live))
+            stamp = self.tick()
+            stamps = self._row_stamps.setdefault(name, {})
+            for record in records:
+                stamps[record.get(key)] = stamp
+
+    def _set(self, name: str, df: pd.DataFrame):
+        self._tables[name] = df
+        self._versions[name] = self._versions.get(name, 0) + 1
@@ -0,0 +1,617 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from change_journal import ChangeJournal
+from concurrency import UpdateResult, resolve_update
+from rollup import DailyRollup, ROLLUP_TABLE
+from readiness import StatusHistory, HISTORY_TABLE
+from mission_sequence import MissionSequence, SEQUENCE_TABLE
+
+# Columns that get an index whenever a table has them
+INDEXED_COLUMNS = ["id", "deployment_id", "date"]
+
+META_TABLE = "_spark_columns"  # (table_name, column_name, kind) so values round-trip
+IDS_TABLE = "_spark_ids"       # (table_name, next_id): persisted monotonic ID counter
+HISTORY_STORE = "_spark_status_history"  # (pos, serial, status, start, end): equipment status intervals
+SEQUENCE_STORE = "_spark_mission_seq"  # (day, segment, last): mission number counters
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Classifies a column so it can be restored with the same Python types."""
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    sample = series.dropna()
+    if len(sample):
+        return _value_kind(sample.iloc[0])
+    return "text"
+
+
+def _value_kind(value) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, np.integer)):
+        return "int"
+    if isinstance(value, (float, np.floating)):
+        return "float"
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    return "text"
+
+
+def _to_sql(value, kind: Optional[str] = None):
+    """Converts a pandas/numpy/date value to something sqlite3 can bind.
+
+    `kind` is the column's stored kind: a datetime written to a "date" column is stored as its
+    date, so text comparisons against other dates (range filters) still hold.
+    """
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, datetime):
+        if kind == "date":
+            return value.date().isoformat()
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+class SQLiteDB:
+    """
+    Durable storage with the same interface as MockDB, on an embedded SQLite file.
+    Edits are written straight to disk and shared by every session. Tables are
+    indexed on id / deployment_id / date and get_partition()/get_by_id() push
+    their filters down to SQL, so views read only the rows they show.
+    Selected with MODE = "sqlite" in foundry_config.json; each app session
+    wraps it in a SQLiteSession for its own change journal and user.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (table_name TEXT, column_name TEXT, kind TEXT, PRIMARY KEY (table_name, column_name))")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {IDS_TABLE} (table_name TEXT PRIMARY KEY, next_id INTEGER)")
+        # `serial` has no declared type so int fallback keys round-trip as ints
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {HISTORY_STORE} (pos INTEGER PRIMARY KEY, serial, status TEXT, start TEXT, end TEXT)")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {SEQUENCE_STORE} (day TEXT, segment TEXT, last INTEGER, PRIMARY KEY (day, segment))")
+
+        # Full-table reads are memoized until the table is written to
+        self._versions: Dict[str, int] = {}
+        self._tables: Dict[str, tuple] = {}  # name -> (version, df)
+        self._kind_cache: Dict[str, Dict[str, str]] = {}
+        self._rollup: Optional[tuple] = None  # (flights version, DailyRollup)
+        self._history: Optional[StatusHistory] = None
+        self._sequence: Optional[MissionSequence] = None
+
+        # Row version stamps for optimistic concurrency. They only need to be
+        # comparable within this process (sessions keep the versions they saw),
+        # so they live in memory like the SharedStore's
+        self._clock = 0
+        self._row_stamps: Dict[str, Dict[Any, int]] = {}
+        self._floors: Dict[str, int] = {}
+
+        # Same hooks as MockDB; the writer is normally unused in this mode
+        self.writer = None
+        self.journal = ChangeJournal()
+        self.user: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], base_dir: str = ".") -> Optional["SQLiteDB"]:
+        """
+        Opens SQLITE_PATH when MODE is "sqlite", otherwise returns None.
+        A relative path is taken from `base_dir` (the config file's directory),
+        not the working directory the app was launched from.
+        """
+        if config.get("MODE", "local").lower() != "sqlite":
+            return None
+        path = config.get("SQLITE_PATH", "spark_local.db")
+        if path != ":memory:" and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        return cls(path)
+
+    # --- Schema ---
+    def table_names(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE '\\_%' ESCAPE '\\' AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def _kinds(self, table_name: str) -> Dict[str, str]:
+        if table_name not in self._kind_cache:
+            rows = self._conn.execute(f"SELECT column_name, kind FROM {META_TABLE} WHERE table_name = ?", (table_name,)).fetchall()
+            self._kind_cache[table_name] = dict(rows)
+        return self._kind_cache[table_name]
+
+    def _columns(self, table_name: str) -> List[str]:
+        return [r[1] for r in self._conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()]
+
+    def _ensure_columns(self, table_name: str, record: Dict[str, Any]):
+        existing = set(self._columns(table_name))
+        for col, val in record.items():
+            if col not in existing:
+                self._conn.execute(f"ALTER TABLE {_quote(table_name)} ADD COLUMN {_quote(col)}")
+                kind = _value_kind(val) if _to_sql(val) is not None else "text"
+                self._conn.execute(f"INSERT OR REPLACE INTO {META_TABLE} VALUES (?, ?, ?)", (table_name, col, kind))
+                self._kind_cache.pop(table_name, None)
+                existing.add(col)
+
+    def _create_indexes(self, table_name: str):
+        columns = self._columns(table_name)
+        for col in INDEXED_COLUMNS:
+            if col in columns:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{table_name}_{col}')} ON {_quote(table_name)} ({_quote(col)})"
+                )
+
+    def _write_table(self, table_name: str, df: pd.DataFrame):
+        self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        self._conn.execute(f"DELETE FROM {META_TABLE} WHERE table_name = ?", (table_name,))
+        kinds = {col: _column_kind(df[col]) for col in df.columns}
+        affinity = {"int": "INTEGER", "bool": "INTEGER", "float": "REAL"}
+        cols = ", ".join(f"{_quote(c)} {affinity.get(k, 'TEXT')}" for c, k in kinds.items())
+        self._conn.execute(f"CREATE TABLE {_quote(table_name)} ({cols})")
+        if len(df.columns):
+            placeholders = ", ".join("?" * len(df.columns))
+            row_kinds = [kinds[c] for c in df.columns]
+            rows = ([_to_sql(v, k) for v, k in zip(row, row_kinds)] for row in df.itertuples(index=False, name=None))
+            self._conn.executemany(f"INSERT INTO {_quote(table_name)} VALUES ({placeholders})", rows)
+        self._conn.executemany(f"INSERT OR REPLACE INTO {META_TABLE} VALUES (?, ?, ?)",
+                               [(table_name, col, kind) for col, kind in kinds.items()])
+        self._kind_cache.pop(table_name, None)
+        self._create_indexes(table_name)
+        self._touch(table_name)
+        self._floors[table_name] = self._tick()
+        self._row_stamps.pop(table_name, None)
+
+    def missing_tables(self, names) -> List[str]:
+        """Which of `names` have no table yet."""
+        existing = set(self.table_names())
+        return [name for name in names if name not in existing]
+
+    def seed(self, tables: Dict[str, pd.DataFrame]):
+        """Creates any table that does not exist yet (first run / new dataset)."""
+        with self._lock:
+            existing = set(self.table_names())
+            self._conn.execute("BEGIN")
+            try:
+                for name, df in tables.items():
+                    if name not in existing:
+                        self._write_table(name, df)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- Reads ---
+    def version(self, table_name: str) -> int:
+        return self._versions.get(table_name, 0)
+
+    def _touch(self, table_name: str):
+        self._versions[table_name] = self._versions.get(table_name, 0) + 1
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _stamp(self, table_name: str, record_id):
+        self._row_stamps.setdefault(table_name, {})[record_id] = self._tick()
+
+    def version_clock(self) -> int:
+        return self._clock
+
+    def row_version(self, table_name: str, record_id) -> int:
+        """Version stamp of a row; changes on every write to it."""
+        with self._lock:
+            return max(self._floors.get(table_name, 0), self._row_stamps.get(table_name, {}).get(record_id, 0))
+
+    def row_versions(self, table_name: str, record_ids) -> Dict[Any, int]:
+        with self._lock:
+            return {record_id: self.row_version(table_name, record_id) for record_id in record_ids}
+
+    def _query(self, table_name: str, where: str = "", params: tuple = ()) -> Optional[pd.DataFrame]:
+        with self._lock:
+            if table_name not in self.table_names():
+                return None
+            df = pd.read_sql_query(f"SELECT * FROM {_quote(table_name)} {where}", self._conn, params=params)
+            kinds = self._kinds(table_name)
+        return self._restore_types(df, kinds)
+
+    @staticmethod
+    def _restore_types(df: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+        for col, kind in kinds.items():
+            if col not in df.columns:
+                continue
+            if kind == "date":
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.date
+                df[col] = df[col].where(df[col].notna(), None)
+            elif kind == "datetime":
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+            elif kind == "int":
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype("Int64")
+            elif kind == "bool":
+                df[col] = df[col].astype("boolean")
+        return df
+
+    def get_table(self, table_name: str):
+        """Returns the whole table. Treat it as read-only: it is cached until the next write."""
+        with self._lock:
+            version = self.version(table_name)
+            cached = self._tables.get(table_name)
+            if cached and cached[0] == version:
+                return cached[1]
+            df = self._query(table_name)
+            if df is not None:
+                self._tables[table_name] = (version, df)
+            return df
+
+    def daily_rollup(self) -> DailyRollup:
+        """Daily flights rollup: built on first use, then rolled forward by each write."""
+        with self._lock:
+            version = self.version(ROLLUP_TABLE)
+            if self._rollup and self._rollup[0] == version:
+                return self._rollup[1]
+            rollup = DailyRollup(self.get_table(ROLLUP_TABLE))
+            self._rollup = (version, rollup)
+            return rollup
+
+    def _roll_forward(self, table_name: str, old_rows: List[Dict[str, Any]], new_rows: List[Dict[str, Any]]):
+        """Applies one write to the rollup; call right after _touch, under the lock."""
+        if table_name != ROLLUP_TABLE or not self._rollup:
+            return
+        version = self.version(table_name)
+        if self._rollup[0] == version - 1:
+            rollup = self._rollup[1].applied(pd.DataFrame(old_rows), pd.DataFrame(new_rows))
+            self._rollup = (version, rollup)
+
+    def status_history(self) -> StatusHistory:
+        """
+        Equipment status intervals, persisted in HISTORY_STORE. The first use
+        seeds them from the equipment table; every write then records transitions.
+        """
+        with self._lock:
+            if self._history is None:
+                rows = self._conn.execute(f"SELECT serial, status, start, end FROM {HISTORY_STORE} ORDER BY pos").fetchall()
+                if rows:
+                    self._history = StatusHistory.from_intervals(
+                        [(serial, status, self._iso_date(start), self._iso_date(end)) for serial, status, start, end in rows]
+                    )
+                else:
+                    self._history = StatusHistory.from_table(self.get_table(HISTORY_TABLE))
+                    self._save_history()
+            return self._history
+
+    @staticmethod
+    def _iso_date(value) -> Optional[date]:
+        return date.fromisoformat(value) if value else None
+
+    def _save_history(self):
+        """Writes the intervals changed since the last save."""
+        history = self._history
+        rows = []
+        for pos in sorted(history.dirty):
+            serial, status, start, end = history.interval(pos)
+            rows.append((pos, _to_sql(serial), status, start.isoformat() if start else None, end.isoformat() if end else None))
+        self._conn.executemany(f"INSERT OR REPLACE INTO {HISTORY_STORE} VALUES (?, ?, ?, ?, ?)", rows)
+        history.dirty.clear()
+
+    def _sync_history(self, table_name: str, rows: pd.DataFrame, close_missing: bool = False):
+        """Records status transitions in written equipment rows; call under the lock."""
+        if table_name != HISTORY_TABLE or self._history is None:
+            return
+        if self._history.sync(rows, close_missing=close_missing):
+            self._save_history()
+
+    def mission_sequence(self) -> MissionSequence:
+        """
+        Mission number counters, persisted in SEQUENCE_STORE so numbers of
+        deleted flights stay used across restarts. The first use raises them
+        to cover the flights table; every write then advances them.
+        """
+        with self._lock:
+            if self._sequence is None:
+                rows = self._conn.execute(f"SELECT day, segment, last FROM {SEQUENCE_STORE}").fetchall()
+                self._sequence = MissionSequence.from_counters(
+                    [(date.fromisoformat(day), segment, last) for day, segment, last in rows]
+                )
+                self._sequence.observe_table(self.get_table(SEQUENCE_TABLE))
+                self._save_sequence()
+            return self._sequence
+
+    def _save_sequence(self):
+        """Writes the counters changed since the last save."""
+        sequence = self._sequence
+        rows = [(day.isoformat(), segment, last) for day, segment, last in sequence.counters(sequence.dirty)]
+        self._conn.executemany(f"INSERT OR REPLACE INTO {SEQUENCE_STORE} VALUES (?, ?, ?)", rows)
+        sequence.dirty.clear()
+
+    def _advance_sequence(self, rows: List[Dict[str, Any]], previous: Optional[Dict[Any, Dict[str, Any]]] = None):
+        """Counts written flights; call under the lock after mission_sequence() has been seeded."""
+        self._sequence.observe(rows, previous)
+        if self._sequence.dirty:
+            self._save_sequence()
+
+    def get_by_id(self, table_name: str, record_id) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if table_name not in self.table_names():
+                return None
+            cur = self._conn.execute(f"SELECT * FROM {_quote(table_name)} WHERE id = ? LIMIT 1", (_to_sql(record_id),))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            names = [d[0] for d in cur.description]
+            kinds = self._kinds(table_name)
+        return {name: self._restore_value(value, kinds.get(name)) for name, value in zip(names, row)}
+
+    @staticmethod
+    def _restore_value(value, kind: Optional[str]):
+        if value is None:
+            return None
+        if kind == "date":
+            try:
+                return date.fromisoformat(str(value)[:10])
+            except ValueError:
+                return value
+        if kind == "datetime":
+            return pd.Timestamp(value)
+        if kind == "bool":
+            return bool(value)
+        return value
+
+    def get_partition(self, table_name: str, column: str, values=None, between: Optional[tuple] = None):
+        """Rows where `column` is one of `values`, or within `between` = (start, end) inclusive."""
+        if values is not None and not isinstance(values, (list, tuple, set)):
+            values = [values]
+        col = _quote(column)
+        with self._lock:
+            kind = self._kinds(table_name).get(column)
+        if between is not None:
+            start, end = between
+            clauses, params = [], []
+            if start is not None:
+                clauses.append(f"{col} >= ?")
+                params.append(_to_sql(start, kind))
+            if end is not None:
+                if kind == "date":
+                    # Half-open on the next day, so rows stored with a time part still match
+                    clauses.append(f"{col} < ?")
+                    params.append(_to_sql(pd.Timestamp(end).date() + timedelta(days=1)))
+                else:
+                    clauses.append(f"{col} <= ?")
+                    params.append(_to_sql(end, kind))
+            where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        else:
+            values = [_to_sql(v, kind) for v in (values or [])]
+            if not values:
+                where, params = "WHERE 0", []
+            else:
+                where, params = f"WHERE {col} IN ({', '.join('?' * len(values))})", values
+        with self._lock:
+            if table_name in self.table_names() and column not in self._columns(table_name):
+                where, params = "WHERE 0", []
+        return self._query(table_name, where, tuple(params))
+
+    # --- Writes ---
+    def _next_id(self, table_name: str) -> int:
+        row = self._conn.execute(f"SELECT next_id FROM {IDS_TABLE} WHERE table_name = ?", (table_name,)).fetchone()
+        max_id = self._conn.execute(f"SELECT MAX(CAST(id AS INTEGER)) FROM {_quote(table_name)}").fetchone()[0]
+        value = max(row[0] if row else 1, (max_id or 0) + 1)
+        self._claim_id(table_name, value)
+        return value
+
+    def _claim_id(self, table_name: str, value):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return
+        self._conn.execute(
+            f"INSERT INTO {IDS_TABLE} VALUES (?, ?) ON CONFLICT(table_name) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)",
+            (table_name, value + 1),
+        )
+
+    def add_record(self, table_name: str, record: Dict[str, Any]):
+        return self.add_records(table_name, [record]) == 1
+
+    def add_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        """Inserts rows in one transaction. Returns the number added (0 if the table does not exist)."""
+        return self._add_records(table_name, records, self.journal, self.user)
+
+    def _add_records(self, table_name: str, records: List[Dict[str, Any]], journal: ChangeJournal, user: Optional[str]) -> int:
+        if not records:
+            return 0
+        with self._lock:
+            if table_name not in self.table_names():
+                return 0
+            if table_name == HISTORY_TABLE:
+                self.status_history()  # seeded from the rows as they were
+            if table_name == SEQUENCE_TABLE:
+                self.mission_sequence()
+            self._conn.execute("BEGIN")
+            try:
+                for record in records:
+                    # Monotonic IDs: never reuse one, even after deletes
+                    if 'id' not in record or pd.isna(record['id']):
+                        record['id'] = self._next_id(table_name)
+                    else:
+                        self._claim_id(table_name, record['id'])
+                    self._ensure_columns(table_name, record)
+                    kinds = self._kinds(table_name)
+                    cols = list(record.keys())
+                    self._conn.execute(
+                        f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(c) for c in cols)}) VALUES ({', '.join('?' * len(cols))})",
+                        [_to_sql(record[c], kinds.get(c)) for c in cols],
+                    )
+                    self._stamp(table_name, record['id'])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._touch(table_name)
+            self._roll_forward(table_name, [], records)
+            self._sync_history(table_name, pd.DataFrame(records))
+            if table_name == SEQUENCE_TABLE:
+                self._advance_sequence(records)
+        for record in records:
+            journal.record_insert(table_name, record, user=record.get('updated_by', user))
+            self._write_back(table_name, record)
+        return len(records)
+
+    def update_record(self, table_name: str, record_id: int, updates: Dict[str, Any]):
+        return self._update_record(table_name, record_id, updates, self.journal, self.user)
+
+    def _update_record(self, table_name: str, record_id, updates: Dict[str, Any], journal: ChangeJournal, user: Optional[str]):
+        with self._lock:
+            if table_name not in self.table_names() or not updates:
+                return False
+            old_row = self.get_by_id(table_name, record_id)
+            if old_row is None:
+                return False
+            if table_name == HISTORY_TABLE:
+                self.status_history()
+            if table_name == SEQUENCE_TABLE:
+                self.mission_sequence()
+            self._ensure_columns(table_name, updates)
+            kinds = self._kinds(table_name)
+            sets = ", ".join(f"{_quote(c)} = ?" for c in updates)
+            cur = self._conn.execute(
+                f"UPDATE {_quote(table_name)} SET {sets} WHERE rowid = (SELECT rowid FROM {_quote(table_name)} WHERE id = ? LIMIT 1)",
+                [_to_sql(v, kinds.get(c)) for c, v in updates.items()] + [_to_sql(record_id)],
+            )
+            if cur.rowcount == 0:
+                return False
+            self._touch(table_name)
+            self._stamp(table_name, record_id)
+            row = self.get_by_id(table_name, record_id)
+            self._roll_forward(table_name, [old_row], [row] if row is not None else [])
+            if row is not None:
+                self._sync_history(table_name, pd.DataFrame([row]))
+                if table_name == SEQUENCE_TABLE:
+                    self._advance_sequence([row], {record_id: old_row})
+        journal.record_update(table_name, record_id, old_row, updates, user=updates.get('updated_by', user))
+        if row is not None:
+            self._write_back(table_name, row)
+        return True
+
+    def delete_record(self, table_name: str, record_id: int):
+        self._delete_record(table_name, record_id, self.journal, self.user)
+
+    def _delete_record(self, table_name: str, record_id, journal: ChangeJournal, user: Optional[str]):
+        with self._lock:
+            if table_name in self.table_names():
+                old_rows = None
+                if table_name == HISTORY_TABLE:
+                    self.status_history()
+                if table_name == SEQUENCE_TABLE:
+                    self.mission_sequence()  # its number stays used
+                if (table_name == ROLLUP_TABLE and self._rollup) or table_name == HISTORY_TABLE:
+                    old_rows = self._query(table_name, "WHERE id = ?", (_to_sql(record_id),))
+                cur = self._conn.execute(f"DELETE FROM {_quote(table_name)} WHERE id = ?", (_to_sql(record_id),))
+                self._touch(table_name)
+                if old_rows is not None:
+                    self._roll_forward(table_name, old_rows.to_dict('records'), [])
+                    # A removed asset's open interval ends today
+                    self._sync_history(table_name, old_rows.assign(status=None))
+                if cur.rowcount:
+                    self._stamp(table_name, record_id)
+                    journal.record_delete(table_name, record_id, user=user)
+
+    def update_checked(self, table_name: str, record_id, updates: Dict[str, Any],
+                       seen_version: Optional[int] = None,
+                       base_row: Optional[Dict[str, Any]] = None) -> UpdateResult:
+        """Same contract as MockDB.update_checked; the check and write happen under one lock."""
+        return self._update_checked(table_name, record_id, updates, seen_version, base_row, self.journal, self.user)
+
+    def _update_checked(self, table_name: str, record_id, updates: Dict[str, Any], seen_version: Optional[int],
+                        base_row: Optional[Dict[str, Any]], journal: ChangeJournal, user: Optional[str]) -> UpdateResult:
+        with self._lock:
+            current = self.get_by_id(table_name, record_id)
+            if current is None:
+                return UpdateResult(record_id, "missing")
+            to_apply, conflicts, status = resolve_update(
+                current, updates, self.row_version(table_name, record_id), seen_version, base_row
+            )
+            if to_apply:
+                self._update_record(table_name, record_id, to_apply, journal, user)
+            return UpdateResult(record_id, status, to_apply, conflicts, self.row_version(table_name, record_id))
+
+    def replace_table(self, table_name: str, df: pd.DataFrame):
+        with self._lock:
+            if table_name == HISTORY_TABLE and table_name in self.table_names():
+                self.status_history()
+            if table_name == SEQUENCE_TABLE and table_name in self.table_names():
+                self.mission_sequence()
+            self._conn.execute("BEGIN")
+            try:
+                self._write_table(table_name, df)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._sync_history(table_name, df, close_missing=True)
+            if table_name == SEQUENCE_TABLE and self._sequence is not None:
+                self._sequence.observe_table(df)
+                self._save_sequence()
+
+    def _write_back(self, table_name: str, record: Dict[str, Any]):
+        if self.writer is not None:
+            self.writer.write_record(table_name, record)
+
+
+class SQLiteSession:
+    """
+    One session's handle on the shared SQLiteDB. Reads and writes go straight
+    to the database; the change journal and user are this session's own, so
+    "Export Changes" holds only the edits made here, as with MockDB.
+    """
+
+    def __init__(self, db: SQLiteDB):
+        self.db = db
+        self.journal = ChangeJournal()
+        self.user: Optional[str] = None
+
+    def __getattr__(self, name):
+        # Everything that is not per-session (reads, versions, the writer) is the database's
+        return getattr(self.db, name)
+
+    def add_record(self, table_name: str, record: Dict[str, Any]):
+        return self.add_records(table_name, [record]) == 1
+
+    def add_records(self, table_name: str, records: List[Dict[str, Any]]) -> int:
+        return self.db._add_records(table_name, records, self.journal, self.user)
+
+    def update_record(self, table_name: str, record_id: int, updates: Dict[str, Any]):
+        return self.db._update_record(table_name, record_id, updates, self.journal, self.user)
+
+    def delete_record(self, table_name: str, record_id: int):
+        self.db._delete_record(table_name, record_id, self.journal, self.user)
+
+    def update_checked(self, table_name: str, record_id, updates: Dict[str, Any],
+                       seen_version: Optional[int] = None,
+                       base_row: Optional[Dict[str, Any]] = None) -> UpdateResult:
+        return self.db._update_checked(table_name, record_id, updates, seen_version, base_row, self.journal, self.user)
@@ -0,0 +1,62 @@
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+# Columns with a partition index, per table
+PARTITION_COLUMNS = {
+    "flights": ["deployment_id", "date"],
+}
+DEFAULT_PARTITION_COLUMNS = ["deployment_id"]
+
+
+class TableIndex:
+    """
+    Lookup structures over one version of a table:
+    a hash index of `key` -> row position and, per partition column,
+    value -> array of row positions. Positions are for `.iloc`.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str = "id", partition_columns: Optional[List[str]] = None):
+        self.size = len(df)
+        self.positions: Dict[Any, int] = {}
+        self.max_id = 0
+        if key in df.columns and len(df):
+            ids = pd.Series(np.arange(len(df)), index=df[key].to_numpy())
+            # First occurrence wins, like the boolean scans this replaces
+            self.positions = ids[~ids.index.duplicated()].to_dict()
+            numeric = pd.to_numeric(df[key], errors='coerce').max()
+            self.max_id = int(numeric) if pd.notna(numeric) else 0
+
+        self.partitions: Dict[str, Dict[Any, np.ndarray]] = {}
+        for col in partition_columns or []:
+            if col in df.columns:
+                self.partitions[col] = df.groupby(col, sort=False, dropna=False).indices
+
+    @classmethod
+    def for_table(cls, name: str, df: pd.DataFrame) -> "TableIndex":
+        return cls(df, partition_columns=PARTITION_COLUMNS.get(name, DEFAULT_PARTITION_COLUMNS))
+
+    def lookup(self, record_id) -> Optional[int]:
+        return self.positions.get(record_id)
+
+    def has_partition(self, column: str) -> bool:
+        return column in self.partitions
+
+    def partition(self, column: str, values: List[Any]) -> np.ndarray:
+        """Sorted row positions where `column` is any of `values`."""
+        groups = self.partitions[column]
+        hits = [groups[v] for v in values if v in groups]
+        return np.sort(np.concatenate(hits)) if hits else np.array([], dtype=np.intp)
+
+    def partition_between(self, column: str, start=None, end=None) -> np.ndarray:
+        """Sorted row positions where start <= `column` <= end (either bound optional)."""
+        keys = []
+        for value in self.partitions[column]:
+            try:
+                if (start is None or value >= start) and (end is None or value <= end):
+                    keys.append(value)
+            except TypeError:
+                # Missing or non-comparable values never match a range
+                continue
+        return self.partition(column, keys)
@@ -0,0 +1,41 @@
+from concurrency import resolve_update
+
+ROW = {"id": 1, "status": "FMC", "hours": 1.0, "notes": None, "updated_by": "Ops"}
+
+
+def test_unchanged_row_applies_changed_cells_only():
+    to_apply, conflicts, status = resolve_update(ROW, {"status": "PMC", "hours": 1.0}, current_version=3, seen_version=5)
+    assert (to_apply, conflicts, status) == ({"status": "PMC"}, {}, "applied")
+
+
+def test_no_changes_is_unchanged():
+    assert resolve_update(ROW, {"status": "FMC", "notes": float("nan")}, 3)[2] == "unchanged"
+
+
+def test_untouched_cells_merge_after_concurrent_write():
+    base = dict(ROW, notes="old")
+    current = dict(ROW, notes="theirs")  # they changed notes only
+    to_apply, conflicts, status = resolve_update(current, {"status": "NMC", "updated_by": "Admin"},
+                                                 current_version=9, seen_version=5, base_row=base)
+    assert status == "merged"
+    assert to_apply == {"status": "NMC", "updated_by": "Admin"}
+    assert conflicts == {}
+
+
+def test_same_cell_changed_by_both_is_a_conflict():
+    base = dict(ROW)
+    current = dict(ROW, status="NMC", hours=2.0)
+    to_apply, conflicts, status = resolve_update(current, {"status": "PMC", "notes": "mine", "updated_by": "Admin"},
+                                                 current_version=9, seen_version=5, base_row=base)
+    assert status == "conflict"
+    assert conflicts == {"status": ("NMC", "PMC")}
+    assert to_apply == {"notes": "mine", "updated_by": "Admin"}
+
+
+def test_matching_their_value_is_not_a_conflict():
+    current = dict(ROW, status="NMC")
+    assert resolve_update(current, {"status": "NMC"}, 9, 5, ROW) == ({}, {}, "unchanged")
+
+
+def test_without_base_row_any_change_conflicts():
+    assert resolve_update(ROW, {"status": "PMC"}, 9, 5)[1] == {"status": ("FMC", "PMC")}
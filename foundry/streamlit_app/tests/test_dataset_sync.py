@@ -0,0 +1,138 @@
+import json
+
+import pandas as pd
+import pytest
+
+from foundry_backend import FoundryBackend, merge_by_key
+
+RID = "ri.foundry.main.dataset.flights"
+
+
+class FakeDataset:
+    """A dataset's transaction log; reads return what Foundry's dataset view would."""
+
+    def __init__(self):
+        self.transactions = []  # (rid, type, rows)
+        self.reads = []  # params of each table read
+
+    def commit(self, kind: str, rows: list):
+        self.transactions.append((f"tx{len(self.transactions) + 1}", kind, pd.DataFrame(rows)))
+
+    def latest(self):
+        return self.transactions[-1][0] if self.transactions else None
+
+    def history(self):
+        return [{"rid": rid, "transactionType": kind, "createdTime": f"{i:04d}"}
+                for i, (rid, kind, _) in enumerate(self.transactions)]
+
+    def read(self, params=None):
+        self.reads.append(params)
+        rids = [rid for rid, _, _ in self.transactions]
+        if params:
+            bounds = dict(params)
+            selected = self.transactions[rids.index(bounds["startTransactionRid"]):rids.index(bounds["endTransactionRid"]) + 1]
+        else:
+            # The current view: the last SNAPSHOT and everything appended on top of it
+            start = max(i for i, (_, kind, _) in enumerate(self.transactions) if kind == "SNAPSHOT")
+            selected = self.transactions[start:]
+        return pd.concat([rows for _, _, rows in selected], ignore_index=True)
+
+
+@pytest.fixture
+def dataset():
+    return FakeDataset()
+
+
+@pytest.fixture
+def backend(tmp_path, dataset):
+    config = {"MODE": "foundry", "FOUNDRY_URL": "https://foundry.example.com", "FOUNDRY_TOKEN": "x",
+              "CACHE_DIR": "", "DATASETS": {"flights": RID}}
+    path = tmp_path / "foundry_config.json"
+    path.write_text(json.dumps(config))
+    backend = FoundryBackend(str(path))
+    backend.get_latest_transaction = lambda rid: dataset.latest()
+    backend.list_transactions = lambda rid: dataset.history()
+    backend._read_table = lambda name, rid, columns=None, params=None: dataset.read(params)
+    return backend
+
+
+def _by_id(df):
+    return df.set_index("id")["status"].to_dict()
+
+
+def test_unchanged_dataset_is_not_read(backend, dataset):
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}])
+    current = backend.read_dataset("flights")
+
+    table, mode = backend.sync_dataset("flights", current)
+    assert mode == "unchanged"
+    assert table is current
+    assert len(dataset.reads) == 1
+
+
+def test_append_fetches_only_new_transactions(backend, dataset):
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}, {"id": 2, "status": "CNX"}])
+    current = backend.read_dataset("flights")
+    dataset.commit("APPEND", [{"id": 3, "status": "COMPLETE"}])
+    dataset.commit("APPEND", [{"id": 2, "status": "DELAY"}])
+
+    table, mode = backend.sync_dataset("flights", current)
+    assert mode == "append"
+    assert dataset.reads[-1] == [("startTransactionRid", "tx2"), ("endTransactionRid", "tx3")]
+    assert _by_id(table) == {1: "COMPLETE", 2: "DELAY", 3: "COMPLETE"}
+    assert backend.sync_state[RID] == "tx3"
+
+
+def test_snapshot_triggers_full_read(backend, dataset):
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}])
+    current = backend.read_dataset("flights")
+    dataset.commit("APPEND", [{"id": 2, "status": "CNX"}])
+    dataset.commit("SNAPSHOT", [{"id": 9, "status": "DELAY"}])
+
+    table, mode = backend.sync_dataset("flights", current)
+    assert mode == "full"
+    assert dataset.reads[-1] is None
+    assert _by_id(table) == {9: "DELAY"}
+    assert backend.sync_state[RID] == "tx3"
+
+
+def test_unknown_history_triggers_full_read(backend, dataset):
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}])
+    dataset.commit("APPEND", [{"id": 2, "status": "CNX"}])
+    _, mode = backend.sync_dataset("flights", pd.DataFrame())
+    assert mode == "full"
+
+
+def test_full_read_keeps_latest_row_per_key(backend, dataset):
+    # Saved edits are appended as whole rows under their existing id
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}, {"id": 2, "status": "CNX"}])
+    dataset.commit("APPEND", [{"id": 2, "status": "DELAY"}])
+    dataset.commit("APPEND", [{"id": 2, "status": "ABORTED"}, {"id": 3, "status": "COMPLETE"}])
+
+    table = backend.read_dataset("flights")
+    assert len(table) == 3
+    assert _by_id(table) == {1: "COMPLETE", 2: "ABORTED", 3: "COMPLETE"}
+
+    projected = backend.read_dataset("flights", columns=["status"])
+    assert list(projected.columns) == ["status"]
+    assert sorted(projected["status"]) == ["ABORTED", "COMPLETE", "COMPLETE"]
+
+
+def test_merge_by_key_upserts():
+    current = pd.DataFrame({"id": [1, 2], "status": ["COMPLETE", "CNX"]})
+    new_rows = pd.DataFrame({"id": [2, 3, 2], "status": ["DELAY", "COMPLETE", "ABORTED"]})
+    assert _by_id(merge_by_key(current, new_rows)) == {1: "COMPLETE", 2: "ABORTED", 3: "COMPLETE"}
+
+
+def test_tombstones_remove_rows(backend, dataset):
+    dataset.commit("SNAPSHOT", [{"id": 1, "status": "COMPLETE"}, {"id": 2, "status": "CNX"}])
+    dataset.commit("APPEND", [{"id": 2, "status": "CNX", "_deleted": True}])
+    current = backend.read_dataset("flights")
+    assert _by_id(current) == {1: "COMPLETE"}
+    assert "_deleted" not in current.columns
+    assert list(backend.read_dataset("flights", columns=["status"]).columns) == ["status"]
+
+    dataset.commit("APPEND", [{"id": 3, "status": "DELAY"}, {"id": 1, "status": "COMPLETE", "_deleted": "true"}])
+    table, mode = backend.sync_dataset("flights", current)
+    assert mode == "append"
+    assert _by_id(table) == {3: "DELAY"}
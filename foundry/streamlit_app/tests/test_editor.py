@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mock_db import MockDB
+from services.editor import apply_editor_changes, diff_frames
+from shared_store import SharedStore
+
+
+def _grid() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "status": ["FMC", "PMC", "NMC"],
+        "hours": [1.5, np.nan, 3.0],
+        "notes": [None, "check", None],
+    })
+
+
+@pytest.fixture
+def db():
+    store = SharedStore()
+    store.publish({"equipment": _grid()})
+    return MockDB(store)
+
+
+def test_unchanged_grid_has_no_changes():
+    cells, added, deleted = diff_frames(_grid(), _grid())
+    assert cells == {}
+    assert added.empty
+    assert deleted == []
+
+
+def test_missing_values_compare_equal():
+    edited = _grid()
+    edited["hours"] = edited["hours"].astype(object).where(edited["hours"].notna(), None)
+    edited["notes"] = pd.array([pd.NA, "check", np.nan], dtype=object)
+    assert diff_frames(_grid(), edited)[0] == {}
+
+
+def test_reports_changed_cells_as_old_new():
+    edited = _grid()
+    edited.loc[1, "status"] = "FMC"
+    edited.loc[1, "hours"] = 2.0
+    edited.loc[2, "notes"] = "swap"
+    cells, _, _ = diff_frames(_grid(), edited)
+    assert cells == {2: {"status": ("PMC", "FMC"), "hours": (None, 2.0)},
+                     3: {"notes": (None, "swap")}}
+
+
+def test_columns_limits_the_comparison():
+    edited = _grid()
+    edited.loc[0, "status"] = "NMC"
+    edited.loc[0, "notes"] = "ignored"
+    cells, _, _ = diff_frames(_grid(), edited, columns=["status"])
+    assert cells == {1: {"status": ("FMC", "NMC")}}
+
+
+def test_added_and_deleted_rows():
+    # A row added in data_editor has no id, which turns the id column into floats
+    edited = pd.concat([_grid().iloc[[0, 2]], pd.DataFrame([{"status": "FMC", "hours": 0.5}])], ignore_index=True)
+    edited.loc[1, "status"] = "PMC"
+    cells, added, deleted = diff_frames(_grid(), edited)
+    assert list(cells) == [3]
+    assert type(list(cells)[0]) is not float
+    assert added["status"].tolist() == ["FMC"]
+    assert deleted == [2]
+
+
+def test_apply_writes_only_changed_cells(db):
+    original = db.get_table("equipment")
+    seen = db.version_clock()
+    edited = original.copy()
+    edited.loc[edited["id"] == 2, "status"] = "FMC"
+
+    changes = apply_editor_changes(db, "equipment", original, edited, seen_clock=seen)
+    assert changes.cell_count == 1
+    assert [r.applied for r in changes.saved] == [{"status": "FMC"}]
+    assert db.get_by_id("equipment", 2)["status"] == "FMC"
+    assert db.get_by_id("equipment", 2)["notes"] == "check"
+
+
+def test_apply_merges_and_reports_conflicts(db):
+    original = db.get_table("equipment").copy()
+    seen = db.version_clock()
+    # Someone else saves row 1 (status) and row 3 (notes) after the grid was read
+    db.update_record("equipment", 1, {"status": "NMC"})
+    db.update_record("equipment", 3, {"notes": "theirs"})
+
+    edited = original.copy()
+    edited.loc[edited["id"] == 1, "status"] = "PMC"  # same cell: conflict
+    edited.loc[edited["id"] == 3, "hours"] = 9.0     # other cell: merged
+    changes = apply_editor_changes(db, "equipment", original, edited, seen_df=original, seen_clock=seen)
+
+    statuses = {r.record_id: r.status for r in changes.results}
+    assert statuses == {1: "conflict", 3: "merged"}
+    assert changes.rejected[0].conflicts == {"status": ("NMC", "PMC")}
+    assert db.get_by_id("equipment", 1)["status"] == "NMC"
+    assert db.get_by_id("equipment", 3)["hours"] == 9.0
+    assert db.get_by_id("equipment", 3)["notes"] == "theirs"
+
+
+def test_apply_adds_and_deletes_when_allowed(db):
+    original = db.get_table("equipment")
+    edited = pd.concat([original[original["id"] != 2], pd.DataFrame([{"status": "FMC"}])], ignore_index=True)
+
+    changes = apply_editor_changes(db, "equipment", original, edited, defaults={"notes": "new"})
+    assert changes.added == [] and changes.deleted == []
+    assert len(db.get_table("equipment")) == 3
+
+    changes = apply_editor_changes(db, "equipment", original, edited, defaults={"notes": "new"},
+                                   allow_add=True, allow_delete=True)
+    table = db.get_table("equipment")
+    assert changes.deleted == [2]
+    assert sorted(table["id"]) == [1, 3, 4]
+    assert table.loc[table["id"] == 4, "notes"].item() == "new"
+
+
+def test_prepare_maps_grid_columns(db):
+    original = db.get_table("equipment")
+    edited = original.assign(status_label=original["status"])
+    original = original.assign(status_label=original["status"])
+    edited.loc[0, "status_label"] = "Down (NMC)"
+
+    changes = apply_editor_changes(db, "equipment", original, edited, columns=["status_label"],
+                                   prepare=lambda u: {"status": u.pop("status_label").split("(")[1][:-1]})
+    assert changes.saved[0].applied == {"status": "NMC"}
+    assert db.get_by_id("equipment", 1)["status"] == "NMC"
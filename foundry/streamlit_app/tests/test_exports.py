@@ -0,0 +1,67 @@
+import io
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from exports import HAS_OPENPYXL, HAS_PYARROW, excel_cell, export_file, iter_chunks
+
+
+def _frame(n: int = 23) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "date": [date(2025, 1, 1 + i % 28) for i in range(n)],
+        "notes": [None if i % 3 else f"note {i}" for i in range(n)],
+        "hours": np.where(np.arange(n) % 4 == 0, np.nan, np.arange(n) / 2),
+    })
+
+
+def test_iter_chunks_covers_every_row():
+    chunks = list(iter_chunks(_frame(), 10))
+    assert [len(c) for c in chunks] == [10, 10, 3]
+
+
+def test_excel_cell():
+    assert excel_cell(np.int64(3)) == 3 and type(excel_cell(np.int64(3))) is int
+    assert excel_cell(np.nan) is None
+    assert excel_cell(pd.NA) is None
+    assert excel_cell(pd.NaT) is None
+    assert excel_cell(date(2025, 1, 1)) == date(2025, 1, 1)
+
+
+def test_csv_round_trip():
+    df = _frame()
+    out = pd.read_csv(export_file(df, "CSV", chunk_rows=5))
+    assert len(out) == len(df)
+    assert list(out.columns) == list(df.columns)
+    assert out["hours"].isna().sum() == df["hours"].isna().sum()
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+def test_parquet_writes_one_row_group_per_chunk():
+    import pyarrow.parquet as pq
+    df = _frame()
+    # notes is empty in the first chunk; its type comes from later rows
+    df.loc[:9, "notes"] = None
+    parquet = pq.ParquetFile(io.BytesIO(export_file(df, "Parquet", chunk_rows=10).read()))
+    assert parquet.num_row_groups == 3
+    out = parquet.read().to_pandas()
+    assert len(out) == len(df)
+    assert out["notes"].dropna().tolist() == df["notes"].dropna().tolist()
+
+
+@pytest.mark.skipif(not HAS_OPENPYXL, reason="openpyxl not installed")
+def test_excel_rows():
+    from openpyxl import load_workbook
+    df = _frame()
+    sheet = load_workbook(export_file(df, "Excel", chunk_rows=7)).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == tuple(df.columns)
+    assert len(rows) == len(df) + 1
+    assert rows[2][3] == 0.5 and rows[1][3] is None
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export_file(_frame(), "XML")
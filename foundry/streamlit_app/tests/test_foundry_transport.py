@@ -0,0 +1,104 @@
+import io
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from foundry_transport import FoundryTransport
+
+URL = "https://foundry.example.com/api/v1/datasets/ri.foundry.main.dataset.x/transactions"
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(b"")
+    return response
+
+
+def _refused() -> requests.ConnectionError:
+    return requests.ConnectionError(MaxRetryError(None, URL, NewConnectionError(None, "Connection refused")))
+
+
+def _transport(outcomes, max_retries: int = 3):
+    """Transport whose session plays back `outcomes` (status codes or exceptions), one per attempt."""
+    transport = FoundryTransport(max_retries=max_retries, backoff_base=0)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(method)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _response(outcome)
+
+    transport.session.request = request
+    return transport, calls
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504, 429])
+def test_get_retries_server_errors(status):
+    transport, calls = _transport([status, status, 200])
+    assert transport.get(URL).status_code == 200
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_post_is_not_replayed_after_ambiguous_errors(status):
+    transport, calls = _transport([status, 200])
+    assert transport.post(URL).status_code == status
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_post_retries_rejected_requests(status):
+    transport, calls = _transport([status, 200])
+    assert transport.post(URL).status_code == 200
+    assert len(calls) == 2
+
+
+def test_read_timeout_retries_get_only():
+    transport, calls = _transport([requests.ReadTimeout(), 200])
+    assert transport.get(URL).status_code == 200
+    assert len(calls) == 2
+
+    transport, calls = _transport([requests.ReadTimeout(), 200])
+    with pytest.raises(requests.ReadTimeout):
+        transport.post(URL)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("error", [requests.ConnectTimeout(), _refused()])
+def test_post_retries_when_never_sent(error):
+    transport, calls = _transport([error, 200])
+    assert transport.post(URL).status_code == 200
+    assert len(calls) == 2
+
+
+def test_post_is_not_replayed_after_dropped_connection():
+    aborted = requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError()))
+    transport, calls = _transport([aborted, 200])
+    with pytest.raises(requests.ConnectionError):
+        transport.post(URL)
+    assert len(calls) == 1
+
+
+def test_last_response_returned_when_retries_run_out():
+    transport, calls = _transport([503], max_retries=2)
+    assert transport.get(URL).status_code == 503
+    assert len(calls) == 3
+
+
+def test_retries_override():
+    transport, calls = _transport([503, 200])
+    assert transport.post(URL, retries=0).status_code == 503
+    assert len(calls) == 1
+
+
+def test_latency_summary_groups_by_endpoint():
+    transport, _ = _transport([500, 200])
+    transport.get(URL)
+    summary = transport.latency_summary()
+    stats = summary["GET /api/v1/datasets/{rid}/transactions"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 1
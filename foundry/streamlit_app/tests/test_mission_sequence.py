@@ -0,0 +1,68 @@
+from datetime import date
+
+import pandas as pd
+
+from mission_sequence import MissionSequence, format_mission_number, mission_segment
+
+DAY = date(2025, 1, 2)
+
+
+def _flights() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "date": [DAY, DAY, DAY, date(2025, 1, 3)],
+        "aircraft_number": ["VBAT-001", "VBAT-001", "VBAT-002", "VBAT-001"],
+        "status": ["COMPLETE", "COMPLETE", "ALERT - NO LAUNCH", "CNX"],
+        "mission_number": ["M-20250102-001-01", "M-20250102-001-05", None, "M-20250103-001-01"],
+    })
+
+
+def test_segment_and_format():
+    assert mission_segment("VBAT-001", "COMPLETE") == "001"
+    assert mission_segment("VBAT-001", "ALERT - NO LAUNCH") == "ALERT"
+    assert mission_segment(None, "COMPLETE") == "XXX"
+    assert format_mission_number(DAY, "001", 3) == "M-20250102-001-03"
+
+
+def test_from_table_takes_highest_issued_or_count():
+    sequence = MissionSequence.from_table(_flights())
+    assert sequence.next(DAY, "001") == 6        # highest issued number
+    assert sequence.next(DAY, "ALERT") == 2      # unnumbered: one flight counted
+    assert sequence.next(date(2025, 1, 3), "001") == 2
+    assert sequence.next(DAY, "002") == 1
+
+
+def test_counters_never_move_back():
+    sequence = MissionSequence.from_table(_flights())
+    sequence.observe_table(_flights().iloc[:1])
+    assert sequence.last(DAY, "001") == 5
+
+
+def test_observe_inserts_and_moves():
+    sequence = MissionSequence.from_table(_flights())
+    sequence.dirty.clear()
+
+    sequence.observe([{"id": 5, "date": DAY, "aircraft_number": "VBAT-001", "mission_number": "M-20250102-001-06"}])
+    assert sequence.last(DAY, "001") == 6
+
+    # Edited in place: stays where it is
+    previous = {1: _flights().iloc[0].to_dict()}
+    sequence.observe([dict(previous[1], status="DELAY")], previous)
+    assert sequence.last(DAY, "001") == 6
+
+    # Moved to another aircraft: takes a number there
+    sequence.observe([dict(previous[1], aircraft_number="VBAT-002")], previous)
+    assert sequence.last(DAY, "002") == 1
+    assert sequence.dirty == {(DAY, "001"), (DAY, "002")}
+
+
+def test_base_layering_and_persisted_counters():
+    shared = MissionSequence.from_table(_flights())
+    session = MissionSequence(base=shared)
+    session.observe([{"id": 9, "date": DAY, "aircraft_number": "VBAT-001"}])
+    assert session.next(DAY, "001") == 7
+    assert shared.next(DAY, "001") == 6
+
+    restored = MissionSequence.from_counters(shared.counters())
+    assert restored.next(DAY, "001") == 6
+    assert len(restored) == len(shared)
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup import DailyRollup, STATUS_PREFIX
+
+STATUSES = ["COMPLETE", "DELAY", "CNX", "ABORTED", "ALERT - NO LAUNCH"]
+
+
+def _flights(n: int = 200, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "date": [date(2025, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 10, n)],
+        "deployment_id": rng.choice(["DEP-001", "DEP-002"], n),
+        "status": rng.choice(STATUSES, n),
+        "responsible_part": rng.choice(["", "Shield AI", "Govt"], n),
+        "flight_hours": rng.uniform(0, 5, n).round(1),
+        "tois": rng.integers(0, 3, n),
+    })
+
+
+def _normalized(rollup: DailyRollup) -> pd.DataFrame:
+    """Order-independent view; statuses no flight has any more may linger as zero columns."""
+    frame = rollup.frame.sort_index().sort_index(axis=1)
+    empty = [c for c in frame.columns if c.startswith(STATUS_PREFIX) and not frame[c].any()]
+    return frame.drop(columns=empty).astype(float)
+
+
+def _assert_same(incremental: DailyRollup, rebuilt: DailyRollup):
+    pd.testing.assert_frame_equal(_normalized(incremental), _normalized(rebuilt), check_exact=False)
+
+
+def test_matches_rebuild_after_edits_inserts_and_deletes():
+    flights = _flights()
+    rollup = DailyRollup(flights)
+
+    edited = flights.copy()
+    changed = [3, 10, 57]
+    edited.loc[edited["id"].isin(changed), "status"] = "CNX"
+    edited.loc[edited["id"] == 10, "date"] = date(2025, 3, 1)  # moves to a new bucket
+    edited.loc[edited["id"] == 57, "deployment_id"] = "DEP-003"
+    deleted = [5, 6]
+    edited = edited[~edited["id"].isin(deleted)]
+    added = _flights(5, seed=1).assign(id=lambda df: df["id"] + 1000)
+    edited = pd.concat([edited, added], ignore_index=True)
+
+    old_rows = flights[flights["id"].isin(changed + deleted)]
+    new_rows = edited[edited["id"].isin(changed + list(added["id"]))]
+    _assert_same(rollup.applied(old_rows, new_rows), DailyRollup(edited))
+
+
+def test_applied_leaves_original_untouched():
+    flights = _flights(20)
+    rollup = DailyRollup(flights)
+    before = rollup.frame.copy()
+    rollup.applied(flights.head(3), None)
+    pd.testing.assert_frame_equal(rollup.frame, before)
+
+
+def test_emptied_buckets_are_dropped():
+    flights = pd.DataFrame({"id": [1, 2], "date": [date(2025, 1, 1), date(2025, 1, 2)],
+                            "deployment_id": ["DEP-001"] * 2, "status": ["COMPLETE"] * 2,
+                            "responsible_part": [""] * 2, "flight_hours": [1.0, 2.0]})
+    rollup = DailyRollup(flights).applied(flights.head(1), None)
+    assert list(rollup.to_frame()["date"]) == [date(2025, 1, 2)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sequence_of_applies_matches_rebuild(seed):
+    rng = np.random.default_rng(seed)
+    flights = _flights(100, seed)
+    rollup = DailyRollup(flights)
+    for _ in range(10):
+        ids = rng.choice(flights["id"], 4, replace=False)
+        old_rows = flights[flights["id"].isin(ids)]
+        new_rows = old_rows.assign(status=rng.choice(STATUSES, len(old_rows)),
+                                   flight_hours=rng.uniform(0, 5, len(old_rows)))
+        flights = pd.concat([flights[~flights["id"].isin(ids)], new_rows], ignore_index=True)
+        rollup.apply(old_rows, new_rows)
+    _assert_same(rollup, DailyRollup(flights))
+    assert rollup.frame["flights"].sum() == len(flights)
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from mock_db import MockDB
+from shared_store import SharedStore
+
+
+class FlakyLoader:
+    """Raises for the first `failures` calls, then returns `table`."""
+
+    def __init__(self, failures: int, table: pd.DataFrame = None):
+        self.failures = failures
+        self.table = table if table is not None else pd.DataFrame({"id": [1, 2], "kit_name": ["A", "B"]})
+        self.calls = 0
+
+    def __call__(self, name):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("503 - busy")
+        return self.table
+
+
+@pytest.fixture
+def store():
+    store = SharedStore()
+    store.publish({"flights": pd.DataFrame({"id": [1]})})
+    return store
+
+
+def test_lazy_table_loads_once(store):
+    loader = FlakyLoader(0)
+    store.set_loader(loader, ["kits"])
+    assert len(store.get("kits")) == 2
+    assert len(store.get("kits")) == 2
+    assert loader.calls == 1
+
+
+def test_failed_load_stays_pending_and_is_retried(store):
+    loader = FlakyLoader(1)
+    store.set_loader(loader, ["kits"])
+    store.retry_seconds = 0
+
+    placeholder = store.get("kits")
+    assert placeholder.empty and "kit_name" in placeholder.columns
+    assert not store.is_materialized("kits")
+    assert store.load_errors() == {"kits": "503 - busy"}
+
+    assert len(store.get("kits")) == 2
+    assert loader.calls == 2
+    assert store.load_errors() == {}
+    assert store.version("kits") == 1
+
+
+def test_failed_load_backs_off(store):
+    loader = FlakyLoader(1)
+    store.set_loader(loader, ["kits"])
+    store.retry_seconds = 3600
+    store.get("kits")
+    assert store.get("kits").empty
+    assert loader.calls == 1
+
+
+def test_history_of_unloaded_table_is_not_kept(store):
+    equipment = pd.DataFrame({"id": [1, 2], "serial_number": ["S1", "S2"], "status": ["FMC", "NMC"]})
+    store.set_loader(FlakyLoader(1, equipment), ["equipment"])
+    store.retry_seconds = 0
+    assert len(store.status_history("equipment")) == 0
+    assert len(store.status_history("equipment")) == 2
+
+
+class ImmediateWriter:
+    """Commits each written record straight into the store, as the writeback's on_commit hook does."""
+
+    def __init__(self, store):
+        self.store = store
+        self.records = []
+
+    def write_record(self, name, record):
+        self.records.append(record)
+        self.store.merge_records(name, [record])
+        return True
+
+    def pending_ids(self, name):
+        return set()
+
+
+def test_deletes_are_written_back_as_tombstones():
+    store = SharedStore()
+    store.publish({"equipment": pd.DataFrame({"id": [1, 2], "serial_number": ["S1", "S2"], "status": ["FMC", "NMC"]})})
+    assert store.status_history("equipment").current("S2") == "NMC"
+    mine, theirs = MockDB(store), MockDB(store)
+    mine.writer = ImmediateWriter(store)
+
+    mine.delete_record("equipment", 2)
+    assert mine.writer.records == [{"id": 2, "serial_number": "S2", "status": "NMC", "_deleted": True}]
+    assert list(store.get("equipment")["id"]) == [1]
+    assert list(theirs.get_table("equipment")["id"]) == [1]
+    assert store.status_history("equipment").current("S2") is None
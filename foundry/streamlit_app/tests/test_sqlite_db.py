@@ -0,0 +1,54 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from sqlite_db import SQLiteDB, SQLiteSession
+
+
+@pytest.fixture
+def db():
+    db = SQLiteDB(":memory:")
+    db.seed({"flights": pd.DataFrame({"id": [1, 2], "date": [date(2025, 1, 1), date(2025, 1, 2)],
+                                      "status": ["COMPLETE", "CNX"]})})
+    return db
+
+
+def test_timestamps_in_date_columns_are_stored_as_dates(db):
+    db.add_records("flights", [{"date": pd.Timestamp("2025-01-02"), "status": "DELAY"}])
+    rows = db.get_partition("flights", "date", between=(date(2025, 1, 1), date(2025, 1, 2)))
+    assert sorted(rows["id"]) == [1, 2, 3]
+
+    db.update_record("flights", 1, {"date": pd.Timestamp("2025-01-03 14:30")})
+    stored = db._conn.execute("SELECT date FROM flights WHERE id = 1").fetchone()[0]
+    assert stored == "2025-01-03"
+    assert db.get_by_id("flights", 1)["date"] == date(2025, 1, 3)
+
+
+def test_date_range_includes_rows_stored_with_a_time(db):
+    # Rows written before dates were coerced on write
+    db._conn.execute("INSERT INTO flights (id, date, status) VALUES (9, '2025-01-02 00:00:00', 'DELAY')")
+    rows = db.get_partition("flights", "date", between=(pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-02")))
+    assert sorted(rows["id"]) == [1, 2, 9]
+    assert db.get_partition("flights", "date", between=(None, date(2025, 1, 1)))["id"].tolist() == [1]
+
+
+def test_partition_values_match_by_date(db):
+    rows = db.get_partition("flights", "date", values=[pd.Timestamp("2025-01-02")])
+    assert rows["id"].tolist() == [2]
+
+
+def test_sessions_share_rows_but_keep_their_own_journal(db):
+    alice, bob = SQLiteSession(db), SQLiteSession(db)
+    alice.user, bob.user = "alice", "bob"
+    alice.update_record("flights", 1, {"status": "DELAY"})
+    bob.add_record("flights", {"date": date(2025, 1, 3), "status": "COMPLETE"})
+    bob.update_checked("flights", 2, {"status": "ABORTED"}, seen_version=db.row_version("flights", 2))
+    bob.delete_record("flights", 3)
+
+    assert alice.get_by_id("flights", 1)["status"] == "DELAY"
+    assert bob.get_by_id("flights", 1)["status"] == "DELAY"
+    assert {e.user for e in alice.journal.entries()} == {"alice"}
+    assert {e.user for e in bob.journal.entries()} == {"bob"}
+    assert {e.id for e in bob.journal.entries()} == {2, 3}
+    assert len(db.journal) == 0
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from foundry_writeback import WritebackQueue
+
+
+class Committer:
+    def __init__(self, fail: int = 0):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, dataset_name, records):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("commit failed")
+        self.batches.append((dataset_name, [r["id"] for r in records]))
+
+
+def _wait_for(condition, timeout: float = 3.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_records_are_coalesced_until_flushed():
+    commit = Committer()
+    queue = WritebackQueue(commit, batch_size=100, flush_seconds=3600)
+    for i in range(3):
+        queue.enqueue("flights", {"id": i})
+    queue.enqueue("equipment", {"id": 9})
+
+    assert queue.flush(force=False) == {}
+    assert queue.pending_ids("flights") == {0, 1, 2}
+    assert queue.flush() == {"flights": None, "equipment": None}
+    assert sorted(commit.batches) == [("equipment", [9]), ("flights", [0, 1, 2])]
+    assert queue.pending_count() == 0
+
+
+def test_full_batch_is_committed_in_the_background():
+    commit = Committer()
+    queue = WritebackQueue(commit, batch_size=2, flush_seconds=3600)
+    queue.enqueue("flights", {"id": 1})
+    queue.enqueue("flights", {"id": 2})
+    assert _wait_for(lambda: commit.batches == [("flights", [1, 2])])
+
+
+def test_failed_batch_goes_back_ahead_of_newer_records():
+    commit = Committer(fail=1)
+    queue = WritebackQueue(commit, batch_size=100, flush_seconds=3600)
+    queue.enqueue("flights", {"id": 1})
+    assert queue.flush() == {"flights": "commit failed"}
+    assert queue.status()["flights"]["last_error"] == "commit failed"
+
+    queue.enqueue("flights", {"id": 2})
+    assert queue.flush() == {"flights": None}
+    assert commit.batches == [("flights", [1, 2])]
+    status = queue.status()["flights"]
+    assert (status["committed"], status["pending"], status["last_error"]) == (2, 0, None)
+
+
+@pytest.mark.parametrize("age, expected", [(0, {}), (10, {"flights": None})])
+def test_old_batches_are_due(age, expected):
+    queue = WritebackQueue(Committer(), batch_size=100, flush_seconds=5)
+    queue.enqueue("flights", {"id": 1})
+    queue._oldest["flights"] -= age
+    assert queue.flush(force=False) == expected